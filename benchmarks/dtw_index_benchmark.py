@@ -0,0 +1,97 @@
+"""
+Benchmark del índice DTW de vecinos más cercanos (preprocessing/dtw_index.py).
+
+Sobre curvas epidémicas sintéticas escaladas a [0, 1] mide:
+    - tiempo de construcción del índice (envolventes y PAA);
+    - latencia de consultas exactas (cascada de cotas) y fracción de series
+      para las que hizo falta el DTW completo;
+    - latencia y recall@k de consultas aproximadas (PAA + refinamiento) para
+      distintos tamaños de lista de candidatos;
+    - latencia de la búsqueda por fuerza bruta como referencia.
+
+El recall se mide contra la fuerza bruta con el mismo radio que el índice
+(el DTW con banda para el que la cascada es exacta) y contra el DTW sin
+banda con el que se forman los clusters.
+
+Uso:
+    python dtw_index_benchmark.py
+    python dtw_index_benchmark.py --series 128 1000 --days 675 --queries 20
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'preprocessing'))
+
+from dtw_index import DTWIndex, brute_force_knn, scale_min_max  # noqa: E402
+
+
+def synthetic_curves(n_series, n_days, n_shapes=6, seed=0):
+    """Olas epidémicas (mezclas de gaussianas) con desfase y ruido Poisson."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_days)
+    centers = rng.uniform(0.1, 0.9, (n_shapes, 3)) * n_days
+    shape = rng.integers(n_shapes, size=n_series)
+    shift = rng.normal(0, n_days * 0.02, (n_series, 1))
+    widths = rng.uniform(0.02, 0.08, (n_series, 3)) * n_days
+    heights = rng.lognormal(2, 1, (n_series, 3))
+    waves = heights[:, :, None] * np.exp(-0.5 * ((t[None, None, :] - centers[shape][:, :, None] - shift[:, :, None])
+                                                 / widths[:, :, None]) ** 2)
+    return rng.poisson(waves.sum(axis=1)).astype(float)
+
+
+def _ms(seconds):
+    return f'{seconds * 1000:.1f}'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--series', type=int, nargs='+', default=[128, 1000])
+    parser.add_argument('--days', type=int, default=675)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=10)
+    parser.add_argument('--candidates', type=int, nargs='+', default=[20, 50, 100])
+    args = parser.parse_args()
+
+    for n_series in args.series:
+        series = scale_min_max(synthetic_curves(n_series, args.days))
+        t0 = time.perf_counter()
+        index = DTWIndex(series)
+        build = time.perf_counter() - t0
+        print(f"\n{n_series} series x {args.days} días  radio={index.radius}  PAA={index.paa_segments}"
+              f"  construcción {_ms(build)} ms")
+
+        queries = np.random.default_rng(1).choice(n_series, min(args.queries, n_series), replace=False)
+        truth, unbanded, brute_time = {}, {}, 0.0
+        for q in queries:
+            t0 = time.perf_counter()
+            truth[q] = set(brute_force_knn(series, q, args.k, index.radius)[0])
+            brute_time += time.perf_counter() - t0
+            unbanded[q] = set(brute_force_knn(series, q, args.k, args.days)[0])
+        print(f"  fuerza bruta        {_ms(brute_time / len(queries)):>9} ms/consulta")
+
+        def recalls(found):
+            banded = sum(len(truth[q] & set(ids)) for q, ids in found.items()) / args.k / len(found)
+            full = sum(len(unbanded[q] & set(ids)) for q, ids in found.items()) / args.k / len(found)
+            return f"recall@{args.k} {banded:.3f} (sin banda {full:.3f})"
+
+        exact_time, computed, found = 0.0, 0, {}
+        for q in queries:
+            t0 = time.perf_counter()
+            found[q], _, n_dtw = index.query(int(q), args.k)
+            exact_time += time.perf_counter() - t0
+            computed += n_dtw
+        print(f"  exacta (cascada)    {_ms(exact_time / len(queries)):>9} ms/consulta  "
+              f"DTW completos {computed / len(queries) / (n_series - 1):.1%}  {recalls(found)}")
+
+        for candidates in args.candidates:
+            approx_time, found = 0.0, {}
+            for q in queries:
+                t0 = time.perf_counter()
+                found[q], _, _ = index.query(int(q), args.k, exact=False, candidates=candidates)
+                approx_time += time.perf_counter() - t0
+            print(f"  aprox. ({candidates:>4} cand.) {_ms(approx_time / len(queries)):>9} ms/consulta  "
+                  f"{recalls(found)}")
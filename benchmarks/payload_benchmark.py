@@ -0,0 +1,263 @@
+"""
+Benchmark de tamaño y costo de parseo de los datos que carga cada dashboard.
+
+Para cada archivo referenciado por ``dashboards/*.html`` (y los bundles por
+vista listados en ``dashboard_data/bundles/manifest.json``) registra:
+    - tamaño crudo, gzip y brotli (si está instalado);
+    - filas (CSV), features (GeoJSON) o claves de primer nivel (JSON);
+    - tiempo de parseo en Python (mediana de varias repeticiones);
+    - estimación de parseo en JS con Node (JSON.parse y un parseo CSV estilo
+      d3.csvParse), sin navegador; se omite si ``node`` no está disponible.
+
+Compara contra ``payload_baseline.json`` y termina con código 1 si algún
+archivo crece más que el umbral de tamaño o de tiempo.
+
+Uso:
+    python payload_benchmark.py                    # compara con el baseline
+    python payload_benchmark.py --update-baseline  # regenera el baseline
+"""
+import argparse
+import gzip
+import io
+import json
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).resolve().parent / 'payload_baseline.json'
+BUNDLES_DIR = 'dashboard_data/bundles'
+
+DATA_REF = re.compile(r"""(["'])([^"'\s]+?\.(?:csv|json|geojson))\1""")
+# Hash de contenido en el nombre de los bundles: map.1a2b3c4d.json
+HASH_SUFFIX = re.compile(r'\.[0-9a-f]{8}(\.\w+)$')
+
+# Script de Node: mide JSON.parse o un parseo CSV a objetos (como d3.csvParse)
+NODE_PARSE_SCRIPT = r"""
+const fs = require('fs');
+const [file, kind, repeats] = process.argv.slice(1);
+const text = fs.readFileSync(file, 'utf8');
+function csvParse(t) {
+  const lines = t.split(/\r?\n/).filter(l => l.length);
+  const header = lines[0].split(',');
+  const rows = new Array(lines.length - 1);
+  for (let i = 1; i < lines.length; i++) {
+    const cells = lines[i].split(',');
+    const row = {};
+    for (let j = 0; j < header.length; j++) row[header[j]] = cells[j];
+    rows[i - 1] = row;
+  }
+  return rows;
+}
+const parse = kind === 'csv' ? csvParse : JSON.parse;
+parse(text);
+const times = [];
+for (let i = 0; i < +repeats; i++) {
+  const t0 = process.hrtime.bigint();
+  parse(text);
+  times.push(Number(process.hrtime.bigint() - t0) / 1e6);
+}
+times.sort((a, b) => a - b);
+console.log(times[Math.floor(times.length / 2)]);
+"""
+
+
+def dashboard_artifacts(root=ROOT):
+    """
+    Archivos de datos que carga cada dashboard.
+
+    Returns:
+        dict dashboard -> lista de rutas relativas a root
+    """
+    root = Path(root)
+    artifacts = {}
+    for page in sorted((root / 'dashboards').glob('*.html')):
+        html = page.read_text(encoding='utf-8')
+        refs = []
+        for _, ref in DATA_REF.findall(html):
+            source = (page.parent / ref).resolve()
+            if source.is_file() and root in source.parents:
+                rel = source.relative_to(root).as_posix()
+                if rel not in refs:
+                    refs.append(rel)
+
+        manifest_file = root / BUNDLES_DIR / 'manifest.json'
+        if BUNDLES_DIR in html and manifest_file.is_file():
+            with open(manifest_file, 'r') as f:
+                manifest = json.load(f)
+            refs.append(f'{BUNDLES_DIR}/manifest.json')
+            refs += [f"{BUNDLES_DIR}/{v['file']}" for v in manifest['views'].values()]
+        artifacts[page.name] = refs
+    return artifacts
+
+
+def _median_time(func, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def js_parse_estimate(file_path, kind, repeats=5):
+    """Mediana (ms) de parseo en Node, o None si Node no está disponible."""
+    node = shutil.which('node')
+    if node is None:
+        return None
+    result = subprocess.run([node, '-e', NODE_PARSE_SCRIPT, str(file_path), kind, str(repeats)],
+                            capture_output=True, text=True, check=True)
+    return round(float(result.stdout.strip()), 3)
+
+
+def measure_artifact(file_path, repeats=5, with_js=True):
+    """
+    Mide tamaño, conteo de registros y costo de parseo de un archivo.
+
+    Returns:
+        dict con bytes, gzip_bytes, brotli_bytes, records, python_parse_ms,
+        js_parse_ms
+    """
+    data = Path(file_path).read_bytes()
+    kind = 'csv' if file_path.suffix == '.csv' else 'json'
+
+    if kind == 'csv':
+        parse = lambda: pd.read_csv(io.BytesIO(data))
+        records = len(parse())
+    else:
+        parse = lambda: json.loads(data)
+        obj = parse()
+        if isinstance(obj, dict) and 'features' in obj:
+            records = len(obj['features'])
+        elif isinstance(obj, (dict, list)):
+            records = len(obj)
+        else:
+            records = 1
+
+    return {
+        'bytes': len(data),
+        'gzip_bytes': len(gzip.compress(data, compresslevel=6, mtime=0)),
+        'brotli_bytes': len(brotli.compress(data)) if brotli is not None else None,
+        'records': records,
+        'python_parse_ms': round(_median_time(parse, repeats) * 1000, 3),
+        'js_parse_ms': js_parse_estimate(file_path, kind, repeats) if with_js else None,
+    }
+
+
+def run_benchmark(root=ROOT, repeats=5, with_js=True):
+    """
+    Ejecuta el benchmark sobre todos los archivos de todos los dashboards.
+
+    Returns:
+        dict con 'artifacts' (ruta -> métricas) y 'dashboards'
+        (dashboard -> totales)
+    """
+    root = Path(root)
+    # Las claves omiten el hash del nombre para comparar entre builds
+    per_dashboard = {page: [(HASH_SUFFIX.sub(r'\1', rel), rel) for rel in refs]
+                     for page, refs in dashboard_artifacts(root).items()}
+    artifacts = {}
+    for refs in per_dashboard.values():
+        for key, rel in refs:
+            if key not in artifacts:
+                artifacts[key] = measure_artifact(root / rel, repeats, with_js)
+
+    dashboards = {}
+    for page, refs in per_dashboard.items():
+        dashboards[page] = {
+            'artifacts': len(refs),
+            'bytes': sum(artifacts[k]['bytes'] for k, _ in refs),
+            'gzip_bytes': sum(artifacts[k]['gzip_bytes'] for k, _ in refs),
+            'python_parse_ms': round(sum(artifacts[k]['python_parse_ms'] for k, _ in refs), 3),
+        }
+    return {'artifacts': artifacts, 'dashboards': dashboards}
+
+
+def compare_with_baseline(results, baseline, size_threshold=0.05, time_threshold=0.5, min_time_ms=5.0):
+    """
+    Detecta regresiones respecto al baseline.
+
+    Args:
+        results: salida de run_benchmark
+        baseline: salida guardada de run_benchmark
+        size_threshold: crecimiento relativo permitido en bytes y gzip_bytes
+        time_threshold: crecimiento relativo permitido en python_parse_ms
+        min_time_ms: diferencias de tiempo menores a esto se ignoran (ruido)
+
+    Returns:
+        lista de mensajes de regresión (vacía si no hay)
+    """
+    regressions = []
+    for rel, current in results['artifacts'].items():
+        previous = baseline['artifacts'].get(rel)
+        if previous is None:
+            continue
+        for key in ('bytes', 'gzip_bytes'):
+            if current[key] > previous[key] * (1 + size_threshold):
+                regressions.append(f"{rel}: {key} {previous[key]:,} -> {current[key]:,}")
+        before, after = previous['python_parse_ms'], current['python_parse_ms']
+        if after - before > min_time_ms and after > before * (1 + time_threshold):
+            regressions.append(f"{rel}: python_parse_ms {before:.1f} -> {after:.1f}")
+
+    for page, current in results['dashboards'].items():
+        previous = baseline['dashboards'].get(page)
+        if previous and current['bytes'] > previous['bytes'] * (1 + size_threshold):
+            regressions.append(f"{page}: total bytes {previous['bytes']:,} -> {current['bytes']:,}")
+    return regressions
+
+
+def print_report(results):
+    print(f"{'archivo':<70}{'bytes':>12}{'gzip':>11}{'registros':>10}{'py ms':>9}{'js ms':>9}")
+    for rel, m in sorted(results['artifacts'].items()):
+        js = f"{m['js_parse_ms']:.1f}" if m['js_parse_ms'] is not None else '-'
+        print(f"{rel:<70}{m['bytes']:>12,}{m['gzip_bytes']:>11,}{m['records']:>10,}"
+              f"{m['python_parse_ms']:>9.1f}{js:>9}")
+    print()
+    for page, t in results['dashboards'].items():
+        print(f"{page:<20} {t['artifacts']:>2} archivos  {t['bytes']:>12,} B  "
+              f"{t['gzip_bytes']:>10,} B gzip  {t['python_parse_ms']:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--baseline', default=str(BASELINE_FILE))
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--no-js', action='store_true', help='omite la estimación con Node')
+    parser.add_argument('--size-threshold', type=float, default=0.05)
+    parser.add_argument('--time-threshold', type=float, default=0.5)
+    args = parser.parse_args()
+
+    results = run_benchmark(repeats=args.repeats, with_js=not args.no_js)
+    print_report(results)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline guardado en: {args.baseline}")
+        sys.exit(0)
+
+    if not Path(args.baseline).is_file():
+        print(f"No hay baseline en {args.baseline}; ejecute con --update-baseline")
+        sys.exit(0)
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline, args.size_threshold, args.time_threshold)
+    if regressions:
+        print("\n❌ Regresiones respecto al baseline:")
+        for message in regressions:
+            print(f"  - {message}")
+        sys.exit(1)
+    print("\n✅ Sin regresiones respecto al baseline")
@@ -0,0 +1,359 @@
+"""
+Benchmark de escalabilidad de las etapas de preprocesamiento con datos sintéticos.
+
+Para cada combinación de regiones x días x casos genera un conjunto con el
+esquema de NSW (synthetic_data.py) y mide el tiempo de:
+    - process_covid_data (lectura de la lista de casos y matriz diaria);
+    - cdist_dtw (tslearn) y dtw_distance_matrix (DTW por lotes);
+    - la matriz de distancias del Data Context Map, MDS y KDE (context_map.py);
+    - estadísticas por ventana, cubo de tasas, Rt y adelanto/retraso;
+    - rasterización, rasters de densidad e I de Moran con pesos de contigüidad.
+
+Las etapas cuadráticas en el número de regiones (DTW, Data Context Map, MDS,
+adelanto/retraso) usan una submuestra de --max-pairwise regiones; el
+informe indica cuántas se usaron. Las etapas cuyas dependencias no están
+instaladas se informan como no disponibles.
+
+Compara contra ``pipeline_baseline.json`` y termina con código 1 si alguna
+etapa es más lenta que el umbral.
+
+Uso:
+    python pipeline_benchmark.py                                  # compara con el baseline
+    python pipeline_benchmark.py --update-baseline
+    python pipeline_benchmark.py --regions 100 1000 20000 --days 365 3650 --cases 1e5 1e7
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'preprocessing'))
+
+from synthetic_data import (case_matrix, synthetic_census, synthetic_polygons,  # noqa: E402
+                            write_line_list)
+
+BASELINE_FILE = Path(__file__).resolve().parent / 'pipeline_baseline.json'
+START_DATE = '2020-01-25'
+
+
+class Unavailable(Exception):
+    """La etapa no puede correr en este entorno (falta una dependencia)."""
+
+    def __init__(self, message, missing=None):
+        super().__init__(message)
+        self.missing = missing
+
+
+def _import(module, *names):
+    try:
+        imported = __import__(module, fromlist=list(names))
+    except ImportError as exc:
+        raise Unavailable(f"{module}: {exc}", missing=exc.name) from exc
+    return [getattr(imported, name) for name in names]
+
+
+def _subsample(ctx, n):
+    return ctx['rng'].choice(ctx['regions'], min(n, ctx['regions']), replace=False)
+
+
+def stage_process_covid_data(ctx):
+    process_covid_data, = _import('cluster_series2', 'process_covid_data')
+    process_covid_data(ctx['cases_file'])
+    return ctx['regions']
+
+
+def stage_cdist_dtw(ctx):
+    cdist_dtw, = _import('tslearn.metrics', 'cdist_dtw')
+    rows = _subsample(ctx, ctx['max_pairwise'])
+    cdist_dtw(ctx['scaled'][rows][:, :, None])
+    return len(rows)
+
+
+def stage_dtw_distance_matrix(ctx):
+    dtw_distance_matrix, = _import('multires_clustering', 'dtw_distance_matrix')
+    rows = _subsample(ctx, ctx['max_pairwise'])
+    dtw_distance_matrix(ctx['scaled'][rows], max(1, ctx['days'] // 10))
+    return len(rows)
+
+
+def stage_context_distance(ctx):
+    compute, = _import('context_map', 'compute_data_context_distance_matrix')
+    rows = _subsample(ctx, ctx['max_pairwise'])
+    ctx['context_rows'] = rows
+    ctx['context_D'] = compute(ctx['census_scaled'][rows])
+    return len(rows)
+
+
+def stage_mds(ctx):
+    MDS, = _import('sklearn.manifold', 'MDS')
+    if 'context_D' not in ctx:
+        raise Unavailable('requiere context_distance')
+    mds = MDS(n_components=2, dissimilarity='precomputed', random_state=42)
+    ctx['mds_coords'] = mds.fit_transform(ctx['context_D'])
+    return len(ctx['context_D'])
+
+
+def stage_kde(ctx):
+    compute_akde_density, = _import('context_map', 'compute_akde_density')
+    if 'mds_coords' in ctx:
+        points = ctx['mds_coords'][:len(ctx['context_rows'])]
+    else:
+        # Sin MDS: proyección a las 2 componentes principales del censo
+        u, s, _ = np.linalg.svd(ctx['census_scaled'], full_matrices=False)
+        points = u[:, :2] * s[:2]
+    compute_akde_density(points)
+    return len(points)
+
+
+def stage_window_stats(ctx):
+    compute_window_stats, = _import('cluster_stats', 'compute_window_stats')
+    compute_window_stats(ctx['counts'], ctx['dates'], {'synthetic': ctx['labels']})
+    return ctx['regions']
+
+
+def stage_rate_cube(ctx):
+    compute_rate_cube, = _import('incidence_cube', 'compute_rate_cube')
+    compute_rate_cube(ctx['counts'], ctx['population'], ctx['labels'], windows={'7d': 7, '14d': 14})
+    return ctx['regions']
+
+
+def stage_rt(ctx):
+    discretize_serial_interval, estimate_rt = _import('rt_estimation', 'discretize_serial_interval',
+                                                      'estimate_rt')
+    estimate_rt(ctx['counts'].astype(float), discretize_serial_interval())
+    return ctx['regions']
+
+
+def stage_lead_lag(ctx):
+    cross_correlation, normalize_rows = _import('lead_lag', 'cross_correlation', 'normalize_rows')
+    rows = _subsample(ctx, ctx['max_pairwise'])
+    cross_correlation(normalize_rows(ctx['counts'][rows]))
+    return len(rows)
+
+
+def stage_rasterize(ctx):
+    load_polygons, rasterize_polygons = _import('density_rasters', 'load_polygons', 'rasterize_polygons')
+    _, ctx['rings'], bbox = load_polygons(ctx['geojson_file'])
+    ctx['raster'], _, _ = rasterize_polygons(ctx['rings'], bbox)
+    return ctx['regions']
+
+
+def stage_density_frames(ctx):
+    compute_density_frames, = _import('density_rasters', 'compute_density_frames')
+    if 'raster' not in ctx:
+        raise Unavailable('requiere rasterize')
+    compute_density_frames(ctx['raster'], ctx['monthly'].T, ctx['population'])
+    return ctx['regions']
+
+
+def stage_moran(ctx):
+    contiguity_weights, morans_i = _import('spatial_weights', 'contiguity_weights', 'morans_i')
+    if 'rings' not in ctx:
+        raise Unavailable('requiere rasterize')
+    weights = contiguity_weights(ctx['rings'])
+    rates = ctx['monthly'] / np.maximum(ctx['population'], 1)[:, None] * 1e5
+    morans_i(rates, weights, n_permutations=99)
+    return ctx['regions']
+
+
+STAGES = {
+    'process_covid_data': stage_process_covid_data,
+    'cdist_dtw': stage_cdist_dtw,
+    'dtw_distance_matrix': stage_dtw_distance_matrix,
+    'context_distance': stage_context_distance,
+    'mds': stage_mds,
+    'kde': stage_kde,
+    'window_stats': stage_window_stats,
+    'rate_cube': stage_rate_cube,
+    'rt': stage_rt,
+    'lead_lag': stage_lead_lag,
+    'rasterize': stage_rasterize,
+    'density_frames': stage_density_frames,
+    'moran': stage_moran,
+}
+
+
+def warm_imports():
+    """Importa de antemano los módulos de las etapas para no medir su carga."""
+    # Los scripts importan scipy, sklearn y tslearn dentro de las funciones que
+    # los usan: también se cargan aquí
+    for module in ('cluster_series2', 'tslearn.metrics', 'tslearn.preprocessing', 'multires_clustering',
+                   'context_map', 'sklearn.manifold', 'sklearn.metrics.pairwise', 'scipy.spatial.distance',
+                   'scipy.stats', 'scipy.signal', 'cluster_stats', 'incidence_cube', 'rt_estimation', 'lead_lag',
+                   'density_rasters', 'spatial_weights'):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+def scenario_key(regions, days, cases):
+    return f'{regions}x{days}x{cases:.0e}'
+
+
+def build_context(regions, days, cases, work_dir, max_pairwise, seed=0):
+    """
+    Genera el conjunto sintético (en memoria y los archivos que leen las
+    etapas) y devuelve el contexto compartido por las etapas.
+    """
+    census = synthetic_census(regions, seed=seed)
+    population = census['Population'].to_numpy(dtype=float)
+    counts = case_matrix(population, days, cases, seed=seed)
+    codes = census['lga_code19'].to_numpy()
+
+    work_dir = Path(work_dir)
+    cases_file, geojson_file = work_dir / 'cases.csv', work_dir / 'polygons.geojson'
+    write_line_list(cases_file, counts, codes, census['LGA_Name'], START_DATE)
+    with open(geojson_file, 'w') as f:
+        json.dump(synthetic_polygons(regions, seed=seed), f, separators=(',', ':'))
+
+    numeric = census.select_dtypes(include='number').drop(columns=['lga_code19', 'lga_code19_2'])
+    values = numeric.to_numpy(dtype=float)
+    std = values.std(axis=0)
+    low, high = counts.min(axis=1, keepdims=True), counts.max(axis=1, keepdims=True)
+    calendar = pd.date_range(START_DATE, periods=days, freq='D')
+    months = calendar.to_period('M')
+    month_index = np.unique(months.asi8, return_inverse=True)[1]
+    monthly = np.zeros((regions, month_index.max() + 1))
+    np.add.at(monthly.T, month_index, counts.T)
+    rng = np.random.default_rng(seed)
+    return {
+        'regions': regions, 'days': days, 'cases': cases, 'max_pairwise': max_pairwise, 'rng': rng,
+        'cases_file': cases_file, 'geojson_file': geojson_file,
+        'counts': counts, 'dates': list(calendar.date), 'population': population,
+        'labels': rng.integers(1, 5, size=regions), 'monthly': monthly,
+        'scaled': (counts - low) / np.where(high > low, high - low, 1),
+        'census_scaled': np.nan_to_num((values - values.mean(axis=0)) / np.where(std > 0, std, 1)),
+    }
+
+
+def run_scenario(regions, days, cases, stages, max_pairwise, seed=0):
+    """
+    Returns:
+        dict etapa -> {'seconds', 'n', 'status'}; las etapas no disponibles
+        llevan además 'missing' (módulo que no se pudo importar, o None si
+        dependen de otra etapa)
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        t0 = time.perf_counter()
+        ctx = build_context(regions, days, cases, work_dir, max_pairwise, seed)
+        results['generate'] = {'seconds': round(time.perf_counter() - t0, 4), 'n': regions, 'status': 'ok'}
+        for name in stages:
+            t0 = time.perf_counter()
+            try:
+                n = STAGES[name](ctx)
+                results[name] = {'seconds': round(time.perf_counter() - t0, 4), 'n': int(n), 'status': 'ok'}
+            except Unavailable as exc:
+                results[name] = {'seconds': None, 'n': 0, 'status': f'no disponible ({exc})',
+                                 'missing': exc.missing}
+    return results
+
+
+def compare_with_baseline(results, baseline, time_threshold=0.5, min_seconds=0.1):
+    """
+    Regresiones de tiempo respecto al baseline (mismo escenario, misma
+    etapa y mismo número de regiones usadas).
+
+    Returns:
+        lista de mensajes de regresión (vacía si no hay)
+    """
+    regressions = []
+    for scenario, stages in results.items():
+        for name, current in stages.items():
+            previous = baseline.get(scenario, {}).get(name)
+            if not previous or current['seconds'] is None or previous['seconds'] is None:
+                continue
+            if current['n'] != previous['n']:
+                continue
+            before, after = previous['seconds'], current['seconds']
+            if after - before > min_seconds and after > before * (1 + time_threshold):
+                regressions.append(f"{scenario} {name}: {before:.3f} s -> {after:.3f} s")
+    return regressions
+
+
+def untracked_stages(results, baseline):
+    """
+    Etapas que no se pueden comparar: sin tiempo en el baseline o en esta
+    corrida (p. ej. el baseline se grabó sin una dependencia que ahora está).
+    """
+    untracked = []
+    for scenario, stages in results.items():
+        for name, current in stages.items():
+            previous = baseline.get(scenario, {}).get(name)
+            if not previous:
+                continue
+            if (current['seconds'] is None) != (previous['seconds'] is None):
+                missing = previous.get('missing') if current['seconds'] is not None else current.get('missing')
+                untracked.append(f"{scenario} {name}" + (f" (falta {missing})" if missing else ''))
+    return untracked
+
+
+def print_report(results):
+    for scenario, stages in results.items():
+        print(f"\n{scenario}  (regiones x días x casos)")
+        for name, r in stages.items():
+            if r['seconds'] is None:
+                print(f"  {name:<22} {'-':>10}          {r['status']}")
+            else:
+                print(f"  {name:<22} {r['seconds']:>10.3f} s  n={r['n']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--regions', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--days', type=int, nargs='+', default=[365])
+    parser.add_argument('--cases', type=float, nargs='+', default=[1e5])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--max-pairwise', type=int, default=300,
+                        help='regiones para las etapas cuadráticas')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=str(BASELINE_FILE))
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--time-threshold', type=float, default=0.5)
+    args = parser.parse_args()
+
+    warm_imports()
+    results = {}
+    for regions, days, cases in product(args.regions, args.days, args.cases):
+        key = scenario_key(regions, days, cases)
+        print(f"Escenario {key}...", flush=True)
+        results[key] = run_scenario(regions, days, int(cases), args.stages, args.max_pairwise, args.seed)
+    print_report(results)
+
+    if args.update_baseline:
+        baseline = {}
+        if Path(args.baseline).is_file():
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n✅ Baseline guardado en: {args.baseline}")
+        sys.exit(0)
+
+    if not Path(args.baseline).is_file():
+        print(f"\nNo hay baseline en {args.baseline}; ejecute con --update-baseline")
+        sys.exit(0)
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    untracked = untracked_stages(results, baseline)
+    if untracked:
+        print("\nEtapas sin comparar (disponibles solo en el baseline o solo en esta corrida; "
+              "regrabe con --update-baseline):")
+        for message in untracked:
+            print(f"  - {message}")
+    regressions = compare_with_baseline(results, baseline, args.time_threshold)
+    if regressions:
+        print("\n❌ Regresiones respecto al baseline:")
+        for message in regressions:
+            print(f"  - {message}")
+        sys.exit(1)
+    print("\n✅ Sin regresiones respecto al baseline")
@@ -0,0 +1,93 @@
+"""
+Benchmark del estimador de Rt vectorizado (preprocessing/rt_estimation.py).
+
+Sobre matrices sintéticas región x día compara:
+    - batched: estimate_rt sobre la matriz completa (una convolución FFT y
+      sumas acumuladas para todas las series);
+    - loop: la referencia de una región a la vez (np.convolve y sumas por
+      ventana en Python), como se ajustaría con herramientas por serie.
+
+Verifica que ambas den el mismo resultado y reporta tiempos y speedup.
+
+Uso:
+    python rt_benchmark.py
+    python rt_benchmark.py --regions 128 1000 --days 675 --loop-max 1000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'preprocessing'))
+
+from rt_estimation import discretize_serial_interval, estimate_rt  # noqa: E402
+
+
+def synthetic_incidence(n_regions, n_days, seed=0):
+    """Curvas epidémicas con Rt variable por región (renovación con ruido Poisson)."""
+    rng = np.random.default_rng(seed)
+    w = discretize_serial_interval()
+    rt = 1 + 0.6 * np.sin(np.linspace(0, 6 * np.pi, n_days)[None, :] + rng.uniform(0, 2 * np.pi, (n_regions, 1)))
+    incidence = np.zeros((n_regions, n_days))
+    incidence[:, 0] = rng.integers(5, 50, n_regions)
+    for t in range(1, n_days):
+        lags = incidence[:, max(0, t - len(w) + 1):t][:, ::-1]
+        pressure = lags @ w[1:lags.shape[1] + 1]
+        incidence[:, t] = rng.poisson(np.minimum(rt[:, t] * pressure, 1e6))
+    return incidence
+
+
+def estimate_rt_loop(incidence, w, window=7, prior_shape=1.0, prior_scale=5.0, min_cases=12):
+    """Referencia: una región y un día a la vez."""
+    n_series, n_days = incidence.shape
+    mean = np.full((n_series, n_days), np.nan)
+    upper = np.full((n_series, n_days), np.nan)
+    for i in range(n_series):
+        pressure = np.convolve(incidence[i], w)[:n_days]
+        for t in range(window - 1, n_days):
+            cases = incidence[i, t - window + 1:t + 1].sum()
+            lam = pressure[t - window + 1:t + 1].sum()
+            if cases >= min_cases and lam > 0:
+                shape, scale = prior_shape + cases, 1 / (1 / prior_scale + lam)
+                mean[i, t] = shape * scale
+                upper[i, t] = stats.gamma.ppf(0.975, shape, scale=scale)
+    return mean, upper
+
+
+def _timed(func, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return result, sorted(times)[len(times) // 2]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--regions', type=int, nargs='+', default=[128, 1000, 5000])
+    parser.add_argument('--days', type=int, nargs='+', default=[675])
+    parser.add_argument('--loop-max', type=int, default=1000,
+                        help='no corre la referencia por región por encima de este número de regiones')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    w = discretize_serial_interval()
+    print(f"{'regiones':>9}{'días':>7}{'batched s':>12}{'loop s':>10}{'speedup':>9}{'series-día/s':>15}")
+    for n_days in args.days:
+        for n_regions in args.regions:
+            incidence = synthetic_incidence(n_regions, n_days)
+            batched, t_batched = _timed(lambda: estimate_rt(incidence, w), args.repeats)
+
+            loop_time, speedup = '-', '-'
+            if n_regions <= args.loop_max:
+                (mean, upper), t_loop = _timed(lambda: estimate_rt_loop(incidence, w), 1)
+                assert np.allclose(batched['mean'], mean, equal_nan=True, rtol=1e-6, atol=1e-8)
+                assert np.allclose(batched[0.975], upper, equal_nan=True, rtol=1e-6, atol=1e-8)
+                loop_time, speedup = f'{t_loop:.2f}', f'{t_loop / t_batched:.0f}x'
+
+            throughput = n_regions * n_days / t_batched
+            print(f"{n_regions:>9}{n_days:>7}{t_batched:>12.3f}{loop_time:>10}{speedup:>9}{throughput:>15,.0f}")
@@ -0,0 +1,210 @@
+"""
+Generador de datos sintéticos con el mismo esquema que los datos de NSW.
+
+Produce, para N regiones y D días:
+    - una capa de polígonos GeoJSON (properties.lgacode), con regiones
+      contiguas que comparten vértices, como nsw_lga_polygon_V5.geojson;
+    - una tabla de censo con las columnas de census_clean.csv (filas del
+      censo real remuestreadas con ruido, con códigos y nombres nuevos);
+    - una lista de casos (una fila por caso) con las columnas de
+      cases_NSW.csv, escrita por tramos de días para no tenerla en memoria.
+
+Uso:
+    python synthetic_data.py out_dir --regions 1000 --days 730 --cases 1e6
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+CENSUS_FILE = ROOT / 'dashboard_data' / 'common' / 'census_clean.csv'
+# Caja aproximada de NSW (lon_min, lat_min, lon_max, lat_max)
+NSW_BBOX = (141.0, -37.5, 153.6, -28.2)
+FIRST_CODE = 10000
+
+
+def region_codes(n_regions):
+    """Códigos de 5 dígitos como lga_code19 (10000, 10001, ...)."""
+    return np.arange(FIRST_CODE, FIRST_CODE + n_regions)
+
+
+def synthetic_polygons(n_regions, bbox=NSW_BBOX, points_per_edge=8, jitter=0.25, seed=0):
+    """
+    Regiones en una grilla deformada: los vértices de la grilla se desplazan
+    al azar y cada arista compartida tiene `points_per_edge` puntos
+    intermedios ondulados, idénticos para las dos regiones que la comparten.
+
+    Returns:
+        dict GeoJSON FeatureCollection
+    """
+    rng = np.random.default_rng(seed)
+    lon_min, lat_min, lon_max, lat_max = bbox
+    aspect = (lon_max - lon_min) / (lat_max - lat_min)
+    cols = int(np.ceil(np.sqrt(n_regions * aspect)))
+    rows = int(np.ceil(n_regions / cols))
+    dx, dy = (lon_max - lon_min) / cols, (lat_max - lat_min) / rows
+
+    # Vértices de la grilla, desplazados salvo en el borde exterior
+    gx, gy = np.meshgrid(lon_min + dx * np.arange(cols + 1), lat_min + dy * np.arange(rows + 1))
+    vertices = np.stack([gx, gy], axis=-1)
+    if rows > 1 and cols > 1:
+        vertices[1:-1, 1:-1] += rng.uniform(-jitter, jitter, (rows - 1, cols - 1, 2)) * [dx, dy]
+
+    t = (np.arange(1, points_per_edge + 1) / (points_per_edge + 1))[:, None]
+
+    def edge_points(a, b, wiggle=True):
+        # a, b: [..., 2]; puntos intermedios con ruido perpendicular a la arista
+        direction = b - a
+        points = a[..., None, :] + t * direction[..., None, :]
+        if wiggle:
+            normal = np.stack([-direction[..., 1], direction[..., 0]], axis=-1)
+            offset = rng.normal(0, jitter * 0.2, a.shape[:-1] + (points_per_edge, 1)) * np.sin(np.pi * t)
+            points += offset * normal[..., None, :]
+        return points
+
+    horizontal = edge_points(vertices[:, :-1], vertices[:, 1:])      # (rows+1, cols, k, 2)
+    vertical = edge_points(vertices[:-1, :], vertices[1:, :])        # (rows, cols+1, k, 2)
+    # El borde exterior queda recto
+    horizontal[[0, -1]] = edge_points(vertices[[0, -1], :-1], vertices[[0, -1], 1:], wiggle=False)
+    vertical[:, [0, -1]] = edge_points(vertices[:-1, [0, -1]], vertices[1:, [0, -1]], wiggle=False)
+
+    features = []
+    for k, code in enumerate(region_codes(n_regions)):
+        r, c = divmod(k, cols)
+        ring = np.concatenate([vertices[r, c][None], horizontal[r, c], vertices[r, c + 1][None],
+                               vertical[r, c + 1], vertices[r + 1, c + 1][None], horizontal[r + 1, c][::-1],
+                               vertices[r + 1, c][None], vertical[r, c][::-1], vertices[r, c][None]])
+        features.append({'type': 'Feature',
+                         'geometry': {'type': 'Polygon', 'coordinates': [np.round(ring, 6).tolist()]},
+                         'properties': {'lgacode': int(code), 'lganame': f'Region {k}'}})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def synthetic_census(n_regions, census_file=CENSUS_FILE, noise=0.1, seed=0):
+    """
+    Censo con las columnas de census_clean.csv: cada región toma una fila del
+    censo real al azar (conserva las correlaciones entre variables) y se le
+    aplica ruido multiplicativo a las columnas numéricas.
+    """
+    rng = np.random.default_rng(seed)
+    real = pd.read_csv(census_file).dropna(subset=['Population'])
+    census = real.iloc[rng.integers(len(real), size=n_regions)].reset_index(drop=True)
+    numeric = census.select_dtypes(include='number').columns
+    factors = rng.lognormal(0, noise, (n_regions, len(numeric)))
+    census[numeric] = census[numeric].to_numpy(dtype=float) * factors
+
+    codes = region_codes(n_regions)
+    census['LGA_code'] = [f'LGA{code}' for code in codes]
+    census['LGA_Name'] = [f'Region{k}(S)' for k in range(n_regions)]
+    census['LGA_Name_abbr'] = [f'Region{k}' for k in range(n_regions)]
+    census['lga_code19'] = codes
+    census['lga_code19_2'] = codes
+    census['Population'] = census['Population'].round()
+    return census
+
+
+def case_matrix(population, n_days, n_cases, n_waves=3, seed=0):
+    """
+    Casos diarios [regiones x días]: olas gaussianas con centros compartidos
+    y desfase por región, proporcionales a la población, con ruido Poisson
+    escalado para sumar ~n_cases.
+    """
+    rng = np.random.default_rng(seed)
+    n_regions = len(population)
+    t = np.arange(n_days, dtype=np.float32)
+    centers = np.sort(rng.uniform(0.1, 0.9, n_waves)) * n_days
+    shift = rng.normal(0, n_days * 0.03, (n_regions, 1)).astype(np.float32)
+    widths = (rng.uniform(0.02, 0.08, n_waves) * n_days).astype(np.float32)
+    heights = rng.lognormal(0, 0.5, (n_regions, n_waves)).astype(np.float32)
+
+    intensity = np.zeros((n_regions, n_days), dtype=np.float32)
+    for w in range(n_waves):
+        intensity += heights[:, w:w + 1] * np.exp(-0.5 * ((t - centers[w] - shift) / widths[w]) ** 2)
+    intensity *= (np.asarray(population, dtype=np.float32) / np.mean(population))[:, None]
+    intensity *= np.float32(n_cases / intensity.sum())
+    return rng.poisson(intensity).astype(np.int32)
+
+
+def write_line_list(out_file, counts, codes, names, start_date='2020-01-25', chunk_days=30):
+    """
+    Escribe la lista de casos (una fila por caso, ordenada por fecha) con las
+    columnas de cases_NSW.csv, por tramos de `chunk_days` días.
+
+    Returns:
+        número de filas escritas
+    """
+    calendar = pd.date_range(start_date, periods=counts.shape[1], freq='D').strftime('%Y-%m-%d')
+    codes, names = np.asarray(codes), np.asarray(names)
+    postcodes = 2000 + codes % 900
+    written = 0
+    with open(out_file, 'w', newline='') as f:
+        f.write('notification_date,postcode,lhd_2010_code,lhd_2010_name,lga_code19,lga_name19\n')
+        for start in range(0, counts.shape[1], chunk_days):
+            block = counts[:, start:start + chunk_days]
+            # Celdas con casos en orden de fecha
+            day, region = np.nonzero(block.T)
+            repeats = block[region, day]
+            rows = np.repeat(np.arange(len(region)), repeats)
+            frame = pd.DataFrame({
+                'notification_date': calendar[start + day[rows]],
+                'postcode': postcodes[region[rows]],
+                'lhd_2010_code': 'X' + pd.Series(700 + region[rows] % 20).astype(str),
+                'lhd_2010_name': 'Synthetic LHD',
+                'lga_code19': codes[region[rows]],
+                'lga_name19': names[region[rows]],
+            })
+            frame.to_csv(f, header=False, index=False)
+            written += len(frame)
+    return written
+
+
+def monthly_summary(counts, codes, start_date='2020-01-25'):
+    """Casos mensuales y acumulados por región (formato covid_monthly_summary_filled.csv)."""
+    calendar = pd.date_range(start_date, periods=counts.shape[1], freq='D')
+    months = calendar.to_period('M').astype(str)
+    wide = pd.DataFrame(counts, index=codes, columns=months).T.groupby(level=0).sum().T
+    summary = wide.stack().rename('MonthlyCases').reset_index()
+    summary.columns = ['lga_code19', 'year_month', 'MonthlyCases']
+    summary['CumulativeCases'] = summary.groupby('lga_code19')['MonthlyCases'].cumsum()
+    return summary
+
+
+def write_dataset(out_dir, n_regions, n_days, n_cases, seed=0):
+    """
+    Escribe un conjunto completo con la estructura de original_data/:
+    cases_NSW.csv, census_clean.csv y nsw_lga_polygon_V5.geojson.
+
+    Returns:
+        dict con las rutas escritas y la matriz de casos
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    census = synthetic_census(n_regions, seed=seed)
+    counts = case_matrix(census['Population'].to_numpy(), n_days, n_cases, seed=seed)
+    paths = {
+        'cases': out_dir / 'cases_NSW.csv',
+        'census': out_dir / 'census_clean.csv',
+        'geojson': out_dir / 'nsw_lga_polygon_V5.geojson',
+    }
+    census.to_csv(paths['census'], index=False)
+    with open(paths['geojson'], 'w') as f:
+        json.dump(synthetic_polygons(n_regions, seed=seed), f, separators=(',', ':'))
+    write_line_list(paths['cases'], counts, census['lga_code19'], census['LGA_Name'])
+    return {**paths, 'counts': counts}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('out_dir')
+    parser.add_argument('--regions', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--cases', type=float, default=1e6)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    dataset = write_dataset(args.out_dir, args.regions, args.days, int(args.cases), args.seed)
+    print(f"✅ {int(dataset['counts'].sum()):,} casos en {args.regions} regiones x {args.days} días "
+          f"guardados en: {args.out_dir}")
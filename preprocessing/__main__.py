@@ -0,0 +1,139 @@
+"""
+Punto de entrada único del preprocesamiento: un subcomando por etapa.
+
+Cada subcomando ejecuta el script de la etapa como __main__ desde su carpeta
+(igual que pipeline.py), pasándole el resto de los argumentos. Los scripts no
+hacen trabajo al importarse y cargan matplotlib, seaborn, sklearn y tslearn
+solo dentro de las funciones que los usan.
+
+Uso (desde la raíz del repositorio):
+    python -m preprocessing list
+    python -m preprocessing clustering --method multires
+    python -m preprocessing pipeline --jobs 4
+    python -m preprocessing startup --repeat 5 --out build/startup.json
+"""
+import argparse
+import json
+import os
+import runpy
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from pipeline import ROOT, STAGES
+
+# Scripts que no son etapas del pipeline
+EXTRA_COMMANDS = {
+    'pipeline': 'preprocessing/pipeline.py',
+    'datasets': 'preprocessing/datasets.py',
+    'time_series2': 'preprocessing/serie_temporal2.py',
+    'context_map2': 'preprocessing/context_map2.py',
+    'cluster_series': 'preprocessing/cluster_series.py',
+    'quantile_sketch': 'preprocessing/quantile_sketch.py',
+    'aed': 'preprocessing/aed.py',
+}
+COMMANDS = {**{stage['name']: stage['script'] for stage in STAGES}, **EXTRA_COMMANDS}
+
+# Módulos cuya carga al importar un script delata una importación pesada
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'sklearn', 'tslearn', 'scipy.stats', 'scipy.signal']
+
+_COLD_IMPORT = """
+import json, os, runpy, sys
+script = {script!r}
+os.chdir(os.path.dirname(script))
+sys.path.insert(0, os.path.dirname(script))
+runpy.run_path(script, run_name='__cold__')
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+
+def run_command(name, args):
+    """Ejecuta el script del subcomando como __main__ desde su carpeta."""
+    script = ROOT / COMMANDS[name]
+    os.chdir(script.parent)
+    sys.path.insert(0, str(script.parent))
+    sys.argv = [str(script), *args]
+    runpy.run_path(str(script), run_name='__main__')
+
+
+def _timed(cmd, repeat):
+    """Mediana del tiempo de reloj (ms) de `repeat` procesos nuevos y la última salida."""
+    times, proc = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), proc
+
+
+def measure_startup(commands=None, repeat=3):
+    """
+    Arranque en frío de cada subcomando: importar su script en un proceso
+    nuevo sin ejecutar la etapa, descontando el arranque del intérprete.
+
+    Returns:
+        dict con 'python_ms', 'list_ms' y, por comando, 'import_ms', los
+        módulos pesados que quedaron cargados y el error si no importa
+    """
+    baseline, _ = _timed([sys.executable, '-c', 'pass'], repeat)
+    listing, _ = _timed([sys.executable, '-m', 'preprocessing', 'list'], repeat)
+    results = {}
+    for name in commands or COMMANDS:
+        code = _COLD_IMPORT.format(script=str(ROOT / COMMANDS[name]), heavy=HEAVY_MODULES)
+        elapsed, proc = _timed([sys.executable, '-c', code], repeat)
+        entry = {'import_ms': round(elapsed - baseline, 1)}
+        if proc.returncode == 0:
+            entry['heavy_loaded'] = json.loads(proc.stdout.strip().splitlines()[-1])
+        else:
+            entry['error'] = proc.stderr.strip().splitlines()[-1]
+        results[name] = entry
+    return {'python_ms': round(baseline, 1), 'list_ms': round(listing - baseline, 1), 'commands': results}
+
+
+def print_startup(report):
+    print(f"Intérprete: {report['python_ms']:.0f} ms   'list': +{report['list_ms']:.0f} ms")
+    print(f"{'Comando':<16} {'Import (ms)':>11}  Pesados cargados / error")
+    for name, entry in report['commands'].items():
+        detail = entry.get('error') or ', '.join(entry['heavy_loaded']) or '-'
+        print(f"{name:<16} {entry['import_ms']:>11.0f}  {detail}")
+
+
+def main():
+    # Los argumentos de un script (incluido --help) pasan sin que argparse los mire
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        run_command(sys.argv[1], sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(prog='python -m preprocessing',
+                                     description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='lista los subcomandos')
+    startup = sub.add_parser('startup', help='mide el arranque en frío de cada subcomando')
+    startup.add_argument('names', nargs='*', choices=[[]] + list(COMMANDS), metavar='COMANDO')
+    startup.add_argument('--repeat', type=int, default=3)
+    startup.add_argument('--out', help='guarda las mediciones en JSON')
+    for name, script in COMMANDS.items():
+        command = sub.add_parser(name, help=script, add_help=False)
+        command.add_argument('args', nargs=argparse.REMAINDER)
+
+    args = parser.parse_args()
+    if args.command == 'list':
+        for name, script in COMMANDS.items():
+            print(f"{name:<16} {script}")
+    elif args.command == 'startup':
+        report = measure_startup(args.names, args.repeat)
+        print_startup(report)
+        if args.out:
+            out = ROOT / args.out
+            out.parent.mkdir(parents=True, exist_ok=True)
+            with open(out, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"✅ Mediciones guardadas en: {out}")
+
+
+if __name__ == "__main__":
+    main()
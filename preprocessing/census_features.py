@@ -0,0 +1,239 @@
+import operator
+import re
+from functools import reduce
+from pathlib import Path
+
+import pandas as pd
+
+# Especificación declarativa de las columnas derivadas del censo y de sus
+# controles de consistencia. Cada columna es una expresión:
+#   'Columna'              referencia (derivada antes, entrada extra o columna del censo)
+#   2.5                    constante
+#   ('sum', a, b, ...)     suma fila a fila (NA si falta algún término)
+#   ('match', regex)       todas las columnas del censo cuyo nombre cumple regex
+#                          (dentro de 'sum'; así la regla sirve para otras ediciones)
+#   ('sub' | 'mul' | 'div', a, b)
+#   ('number', a)          número al final del texto ('1,234.5 km2' -> 1234.5)
+#   ('digits', a)          primer grupo de dígitos, como texto ('LGA10050' -> '10050')
+#   ('nonzero', a)         0 -> NA
+#   ('fill', a, valor)     NA -> valor
+# y, en los controles, ('eq', a, b, tolerancia relativa), ('gt', a, b) y
+# ('between', a, min, max), que dan True en las filas correctas.
+#
+# Todas las operaciones son vectorizadas sobre columnas completas, así que el
+# costo no depende de cuántas áreas tenga la tabla. Las expresiones se
+# evalúan en orden y una derivada puede usar las anteriores.
+
+# Código de cada nivel geográfico en las tablas del censo y nombre de la
+# clave numérica que usan los scripts
+GEOGRAPHIES = {
+    'lga': {'code': 'LGA_code', 'key': 'lga_code19'},
+    'sa2': {'code': 'SA2_MAINCODE_2016', 'key': 'sa2_code16'},
+    'postcode': {'code': 'POA_CODE_2016', 'key': 'postcode'},
+}
+
+BEDROOM_COLUMNS = ['NoneBedroom', '1Bedroom', '2Bedrooms', '3Bedrooms', '4Bedrooms', '5Bedrooms',
+                   'Bedrooms(Over6)', 'NotStated']
+
+
+def census_features(geography='lga'):
+    """
+    Columnas que cleaning.py deriva del censo, en el orden en que se agregan.
+    'case_count' es una entrada extra: casos por área alineados con el censo.
+    """
+    key = GEOGRAPHIES[geography]['key']
+    return {
+        'Area': ('number', 'Area'),
+        key: ('digits', GEOGRAPHIES[geography]['code']),
+        'Population': ('nonzero', 'Population'),
+        'Population_Density': ('div', 'Population', 'Area'),
+        'TotalCases': ('fill', 'case_count', 0),
+        'CasesPerPerson': ('div', 'TotalCases', 'Population'),
+        'CasesPer100k': ('mul', 'CasesPerPerson', 100_000),
+        'Pct_0_1_Bedroom': ('div', ('sum', 'NoneBedroom', '1Bedroom'), ('sum', *BEDROOM_COLUMNS)),
+        'Persons_per_Bedroom': ('div', 'AverageHouseSize', 'AverageBedroom'),
+        'Young': ('sum', ('match', r'^(Male|Female)Age\((0-14|15-24)\)$')),
+        'Adult': ('sum', ('match', r'^(Male|Female)Age\((25-34|35-44|45-54)\)$')),
+        'Elderly': ('sum', ('match', r'^(Male|Female)Age\((55-64|65-74|75-84|0ver85)\)$')),
+        f'{key}_2': key,
+    }
+
+
+# Controles del censo (antes en aed.py). Las diferencias pequeñas en los
+# totales son esperables: el ABS perturba las celdas para proteger la privacidad.
+CENSUS_RULES = {
+    'edades_hombres_suman_total': ('eq', ('sum', ('match', r'^MaleAge\(')), 'TotalMale(allages)', 0.01),
+    'edades_mujeres_suman_total': ('eq', ('sum', ('match', r'^FemaleAge\(')), 'TotalFemale(allages)', 0.01),
+    'hombres_mas_mujeres_es_poblacion': ('eq', ('sum', 'Male', 'Female'), 'Population', 0.01),
+    'area_positiva': ('gt', ('number', 'Area'), 0),
+    'poblacion_positiva': ('gt', 'Population', 0),
+    'pct_0_1_dormitorios_entre_0_y_1': ('between', 'Pct_0_1_Bedroom', 0, 1),
+    'casos_no_superan_poblacion': ('between', 'CasesPerPerson', 0, 1),
+}
+
+
+def _unary(func):
+    return lambda args: func(args[0])
+
+
+def _number(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    text = values.astype('string').str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(text.str.extract(r'(\d+(?:\.\d+)?)$', expand=False), errors='coerce').astype(float)
+
+
+def _equal(args):
+    a, b, tolerance = (*args, 0)[:3]
+    return (a - b).abs() <= tolerance * b.abs()
+
+
+OPERATIONS = {
+    'sum': lambda args: reduce(operator.add, args),
+    'sub': lambda args: args[0] - args[1],
+    'mul': lambda args: args[0] * args[1],
+    'div': lambda args: args[0] / args[1],
+    'number': _unary(_number),
+    'digits': _unary(lambda values: values.astype(str).str.extract(r'(\d+)', expand=False)),
+    'nonzero': _unary(lambda values: values.where(values != 0)),
+    'fill': lambda args: args[0].fillna(args[1]),
+    'eq': _equal,
+    'gt': lambda args: args[0] > args[1],
+    'between': lambda args: (args[0] >= args[1]) & (args[0] <= args[2]),
+}
+
+
+class MissingInput(KeyError):
+    """Una expresión usa una columna que esta tabla no tiene."""
+
+
+def evaluate(expression, frame, values=None):
+    """
+    Evalúa una expresión sobre todas las filas de `frame`.
+
+    Args:
+        expression: ver la especificación al inicio del módulo
+        frame: tabla del censo
+        values: dict nombre -> Series ya calculadas (derivadas o entradas
+            extra), que tienen prioridad sobre las columnas de `frame`
+
+    Returns:
+        pd.Series (o escalar si la expresión es una constante)
+
+    Raises:
+        MissingInput: si falta una columna o un 'match' no encuentra ninguna
+    """
+    values = values or {}
+    if isinstance(expression, str):
+        if expression in values:
+            return values[expression]
+        if expression in frame.columns:
+            return frame[expression]
+        raise MissingInput(expression)
+    if not isinstance(expression, (tuple, list)):
+        return expression
+
+    op, *args = expression
+    if op not in OPERATIONS:
+        raise ValueError(f"Operación desconocida: {op}")
+    operands = []
+    for arg in args:
+        if isinstance(arg, (tuple, list)) and arg[0] == 'match':
+            pattern = re.compile(arg[1])
+            matched = [c for c in frame.columns if pattern.search(c)]
+            if not matched:
+                raise MissingInput(arg[1])
+            operands += [frame[c] for c in matched]
+        else:
+            operands.append(evaluate(arg, frame, values))
+    return OPERATIONS[op](operands)
+
+
+def derive(frame, features, extra=None, strict=True):
+    """
+    Calcula las columnas derivadas en una pasada y las agrega de una vez
+    (las que ya existen se reemplazan en su lugar; las nuevas van al final,
+    en el orden de la especificación).
+
+    Args:
+        frame: tabla del censo (una fila por área)
+        features: dict columna -> expresión
+        extra: dict nombre -> Series alineadas con frame (p. ej. 'case_count')
+        strict: si es False, las columnas cuyas entradas faltan en esta
+            edición del censo se omiten en vez de fallar
+
+    Returns:
+        (DataFrame con las derivadas, lista de columnas omitidas)
+    """
+    values = dict(extra or {})
+    derived, skipped = {}, []
+    for name, expression in features.items():
+        try:
+            derived[name] = values[name] = evaluate(expression, frame, values)
+        except MissingInput:
+            if strict:
+                raise
+            skipped.append(name)
+
+    result = frame.copy()
+    for name in [n for n in derived if n in frame.columns]:
+        result[name] = derived[name]
+    new = pd.DataFrame({n: derived[n] for n in derived if n not in frame.columns}, index=frame.index)
+    return pd.concat([result, new], axis=1), skipped
+
+
+def validate(frame, rules=CENSUS_RULES, key='LGA_code', max_examples=5):
+    """
+    Aplica los controles declarados. Un control cuyas columnas no están en
+    la tabla queda como 'no aplica'.
+
+    Returns:
+        DataFrame con, por control: filas evaluadas, filas que fallan, filas
+        sin dato y códigos de ejemplo de las que fallan
+    """
+    rows = []
+    for name, rule in rules.items():
+        try:
+            ok = evaluate(rule, frame)
+        except MissingInput as missing:
+            rows.append({'control': name, 'filas': 0, 'fallan': 0, 'sin_dato': 0,
+                         'ejemplos': f"no aplica (falta {missing.args[0]})"})
+            continue
+        known = ok.notna()
+        failed = known & ~ok.fillna(True).astype(bool)
+        examples = frame.loc[failed, key].astype(str).head(max_examples) if key in frame.columns else []
+        rows.append({'control': name, 'filas': int(known.sum()), 'fallan': int(failed.sum()),
+                     'sin_dato': int((~known).sum()), 'ejemplos': ', '.join(examples)})
+    return pd.DataFrame(rows)
+
+
+def read_census_tables(paths, geography='lga'):
+    """
+    Une varias tablas del censo del mismo nivel geográfico (una por archivo,
+    como los DataPacks del ABS) por el código de área, en una sola tabla.
+    Las columnas repetidas se toman de la primera tabla que las trae.
+    """
+    code = GEOGRAPHIES[geography]['code']
+    tables = [pd.read_csv(path).set_index(code) for path in paths]
+    merged = pd.concat(tables, axis=1, join='outer')
+    return merged.loc[:, ~merged.columns.duplicated()].reset_index()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Columnas derivadas y controles del censo')
+    parser.add_argument('tables', nargs='+', help='tablas del censo (se unen por código de área)')
+    parser.add_argument('--geography', choices=list(GEOGRAPHIES), default='lga')
+    parser.add_argument('--out', help='guarda el censo con las columnas derivadas')
+    args = parser.parse_args()
+
+    census = read_census_tables(args.tables, args.geography)
+    census, skipped = derive(census, census_features(args.geography), strict=False)
+    if skipped:
+        print(f"Columnas omitidas (faltan entradas): {', '.join(skipped)}")
+    print(validate(census, key=GEOGRAPHIES[args.geography]['code']).to_string(index=False))
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        census.to_csv(args.out, index=False)
+        print(f"✅ {len(census)} áreas guardadas en: {args.out}")
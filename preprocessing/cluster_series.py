@@ -1,8 +1,6 @@
 import pandas as pd
 import numpy as np
 from datetime import timedelta
-from tslearn.preprocessing import TimeSeriesScalerMinMax
-from tslearn.metrics import cdist_dtw
 from scipy.cluster.hierarchy import linkage, fcluster
 import csv
 
@@ -37,6 +35,9 @@ def process_covid_data(file_path='./covid_clean.csv'):
     return cases_matrix, unique_dates
 
 def cluster_and_export(matrix, dates, output_csv='./cluster_timeseries_1year.csv'):
+    from tslearn.metrics import cdist_dtw
+    from tslearn.preprocessing import TimeSeriesScalerMinMax
+
     scaler = TimeSeriesScalerMinMax()
     X_scaled = scaler.fit_transform(matrix)
     distance_matrix = cdist_dtw(X_scaled)
@@ -59,6 +60,7 @@ def cluster_and_export(matrix, dates, output_csv='./cluster_timeseries_1year.csv
                 for day_idx, date in enumerate(dates):
                     writer.writerow([date, cluster_id, 'individual', series[day_idx], f'LGA_{cluster_id}_{i}'])
 
-cases_matrix, dates = process_covid_data()
-cluster_and_export(cases_matrix, dates)
-print("Termine")
\ No newline at end of file
+if __name__ == "__main__":
+    cases_matrix, dates = process_covid_data()
+    cluster_and_export(cases_matrix, dates)
+    print("Termine")
\ No newline at end of file
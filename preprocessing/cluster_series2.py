@@ -1,13 +1,18 @@
 import pandas as pd
 import numpy as np
 from datetime import timedelta
-from tslearn.preprocessing import TimeSeriesScalerMinMax
-from tslearn.metrics import cdist_dtw
 from scipy.cluster.hierarchy import linkage, fcluster
 import json
 import csv
+from pathlib import Path
 
-def process_covid_data(file_path='covid_clean.csv'):
+from multires_clustering import multires_labels, compare_with_full_resolution
+from pairwise import pairwise_distances, square
+from partitional_clustering import partitional_labels
+from profiling import profiled, step
+
+@profiled()
+def process_covid_data(file_path='../dashboard_data/common/covid_clean.csv'):
     """
     Procesa el archivo CSV de datos COVID para generar la matriz de casos diarios
     por LGA para los primeros 2 años de datos.
@@ -17,7 +22,9 @@ def process_covid_data(file_path='covid_clean.csv'):
         - lga_codes (list): Lista de LGA_code19
         - dates (list): Lista de fechas únicas
     """
-    df = pd.read_csv(file_path)
+    with step('read_csv') as s:
+        df = pd.read_csv(file_path)
+        s.read(file_path, len(df))
     df['notification_date'] = pd.to_datetime(df['notification_date'])
     df = df.sort_values(by='notification_date')
 
@@ -38,55 +45,123 @@ def process_covid_data(file_path='covid_clean.csv'):
     date_to_index = {date: i for i, date in enumerate(unique_dates)}
 
     # Crear matriz
-    matrix = np.zeros((len(unique_lgas), len(unique_dates)), dtype=int)
-    for _, row in daily_cases.iterrows():
-        i = lga_to_index[row['lga_code19']]
-        j = date_to_index[row['notification_date']]
-        matrix[i, j] = row['case_count']
+    with step('build_matrix') as s:
+        matrix = np.zeros((len(unique_lgas), len(unique_dates)), dtype=int)
+        for _, row in daily_cases.iterrows():
+            i = lga_to_index[row['lga_code19']]
+            j = date_to_index[row['notification_date']]
+            matrix[i, j] = row['case_count']
+        s.read(rows=len(daily_cases))
 
     return matrix, unique_lgas, unique_dates
 
+@profiled()
 def cluster_and_export(matrix, lga_codes, dates, n_clusters=4,
-                       csv_out='cluster_timeseries_675days.csv',
-                       json_out='lga_clusters.json'):
+                       csv_out='../dashboard_data/cluster_time_series/cluster_timeseries_675days.csv',
+                       json_out='../dashboard_data/cluster_time_series/lga_clusters.json', method='hierarchical', **method_options):
     """
     Realiza clustering con DTW, exporta series y asignación de clusters.
 
+    Métodos:
+    - 'hierarchical': DTW a resolución diaria + linkage 'average'; con
+      method_options n_jobs > 1 o distances_file, las distancias se
+      calculan por bloques en un pool y se pueden retomar (pairwise.py)
+    - 'multires': de grueso a fino (resúmenes semanales y refinamiento
+      diario de las asignaciones dudosas, ver multires_clustering.py)
+    - 'dba_kmeans' / 'kshape': particionales, sin matriz N x N de
+      distancias (ver partitional_clustering.py); method_options pasa
+      n_init, batch_size, n_jobs, seed, etc.
+
     Genera:
     - cluster_timeseries.csv: series por día, cluster y tipo (mean o individual)
     - lga_clusters.json: mapeo LGA_code -> cluster
     """
-    # Normalizar
-    scaler = TimeSeriesScalerMinMax()
-    matrix_scaled = scaler.fit_transform(matrix)
+    # tslearn es lento de importar: solo se carga al clusterizar
+    from tslearn.metrics import cdist_dtw
+    from tslearn.preprocessing import TimeSeriesScalerMinMax
 
-    # Calcular distancias DTW y clustering jerárquico
-    dist_matrix = cdist_dtw(matrix_scaled)
-    Z = linkage(dist_matrix, method='average')
-    labels = fcluster(Z, n_clusters, criterion='maxclust')
+    # Normalizar
+    with step('scale'):
+        scaler = TimeSeriesScalerMinMax()
+        matrix_scaled = scaler.fit_transform(matrix)
+
+    if method == 'hierarchical':
+        # Calcular distancias DTW y clustering jerárquico
+        with step('dtw'):
+            n_jobs, distances_file = method_options.get('n_jobs', 1), method_options.get('distances_file')
+            if n_jobs > 1 or distances_file:
+                if distances_file:
+                    Path(distances_file).parent.mkdir(parents=True, exist_ok=True)
+                # Mismo DTW sin banda que cdist_dtw, por bloques en un pool (ver pairwise.py)
+                dist_matrix = square(pairwise_distances(matrix_scaled[:, :, 0], 'dtw', n_jobs=n_jobs,
+                                                        out_file=distances_file))
+            else:
+                dist_matrix = cdist_dtw(matrix_scaled)
+        with step('linkage'):
+            Z = linkage(dist_matrix, method='average')
+            labels = fcluster(Z, n_clusters, criterion='maxclust')
+    elif method == 'multires':
+        with step('multires'):
+            labels = multires_labels(matrix_scaled[:, :, 0], n_clusters, **method_options)
+    elif method in ('dba_kmeans', 'kshape'):
+        with step(method):
+            labels = partitional_labels(matrix_scaled[:, :, 0], n_clusters, method, **method_options)
+    else:
+        raise ValueError(f"Método de clustering desconocido: {method}")
 
     # Guardar archivo CSV de series
-    with open(csv_out, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['date', 'cluster', 'type', 'value', 'series_id'])
+    with step('export') as s:
+        with open(csv_out, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['date', 'cluster', 'type', 'value', 'series_id'])
 
-        for cluster_id in range(1, n_clusters + 1):
-            cluster_series = matrix[labels == cluster_id]
-            avg_series = cluster_series.mean(axis=0)
+            for cluster_id in range(1, n_clusters + 1):
+                cluster_series = matrix[labels == cluster_id]
+                avg_series = cluster_series.mean(axis=0)
 
-            for day_idx, date in enumerate(dates):
-                writer.writerow([date, cluster_id, 'mean', avg_series[day_idx], 'avg'])
-
-            for i, series in enumerate(cluster_series):
                 for day_idx, date in enumerate(dates):
-                    writer.writerow([date, cluster_id, 'individual', series[day_idx], f'LGA_{cluster_id}_{i}'])
+                    writer.writerow([date, cluster_id, 'mean', avg_series[day_idx], 'avg'])
+
+                for i, series in enumerate(cluster_series):
+                    for day_idx, date in enumerate(dates):
+                        writer.writerow([date, cluster_id, 'individual', series[day_idx], f'LGA_{cluster_id}_{i}'])
+        s.wrote(csv_out, len(dates) * (n_clusters + int(np.isin(labels, np.arange(1, n_clusters + 1)).sum())))
 
-    # Guardar mapeo LGA -> cluster
-    lga_cluster_map = {str(lga_codes[i]): int(labels[i]) for i in range(len(lga_codes))}
-    with open(json_out, 'w') as jf:
-        json.dump(lga_cluster_map, jf, indent=2)
+        # Guardar mapeo LGA -> cluster
+        lga_cluster_map = {str(lga_codes[i]): int(labels[i]) for i in range(len(lga_codes))}
+        with open(json_out, 'w') as jf:
+            json.dump(lga_cluster_map, jf, indent=2)
+        s.wrote(json_out, len(lga_cluster_map))
 
 # Ejecutar todo
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Clustering DTW de las series de casos por LGA')
+    parser.add_argument('--method', choices=['hierarchical', 'multires', 'dba_kmeans', 'kshape'],
+                        default='hierarchical')
+    parser.add_argument('--n-init', type=int, default=3, help='reinicios (dba_kmeans / kshape)')
+    parser.add_argument('--batch-size', type=int, default=None, help='mini-lote (dba_kmeans / kshape)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='procesos para las distancias DTW (hierarchical) o la asignación (dba_kmeans)')
+    parser.add_argument('--distances-file', default=None,
+                        help='guarda las distancias DTW (hierarchical) en este archivo y retoma si se interrumpe')
+    parser.add_argument('--compare', action='store_true',
+                        help='compara el modo multires con el clustering a resolución diaria')
+    args = parser.parse_args()
+
     matrix, lga_codes, dates = process_covid_data()
-    cluster_and_export(matrix, lga_codes, dates)
\ No newline at end of file
+    options = {}
+    if args.method == 'hierarchical':
+        options = {'n_jobs': args.jobs, 'distances_file': args.distances_file}
+    if args.method in ('dba_kmeans', 'kshape'):
+        options = {'n_init': args.n_init, 'batch_size': args.batch_size, 'n_jobs': args.jobs}
+    cluster_and_export(matrix, lga_codes, dates, method=args.method, **options)
+
+    if args.compare:
+        from tslearn.preprocessing import TimeSeriesScalerMinMax
+
+        report = compare_with_full_resolution(TimeSeriesScalerMinMax().fit_transform(matrix)[:, :, 0])
+        print(f"ARI multires vs diario: {report['ari']:.3f}  concordancia: {report['agreement']:.1%}  "
+              f"refinadas: {report['uncertain']}  "
+              f"tiempo: {report['multires_seconds']:.1f} s vs {report['full_seconds']:.1f} s")
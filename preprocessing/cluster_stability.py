@@ -0,0 +1,290 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from incidence_cube import load_cluster_labels
+from multires_clustering import hierarchical_labels
+from pairwise import pairwise_distances, square
+from profiling import profiled, step
+
+out_folder = '../dashboard_data/cluster_stability'
+# Mismo archivo que `cluster_series2.py --distances-file`: si ya existe con la
+# misma entrada, las distancias DTW no se vuelven a calcular (ver pairwise.py)
+distances_file = '../build/cluster_dtw.dist'
+
+# Estabilidad de los clusters por remuestreo: cada réplica vuelve a agrupar
+# una muestra y se cuenta, para cada par de LGAs muestreadas juntas, cuántas
+# veces quedan en el mismo cluster (co-clustering) y, para cada LGA, a qué
+# cluster de referencia se parece el suyo.
+#
+# - 'lgas': submuestreo de LGAs sin reemplazo. El DTW de un par no depende
+#   de las demás series, así que cada réplica usa el sub-bloque de la matriz
+#   completa y solo repite el linkage.
+# - 'days': bootstrap por bloques de días (en orden cronológico). Las series
+#   cambian, así que cada réplica recalcula el DTW (conviene acotar radius).
+#
+# Las réplicas se reparten en lotes a un pool; la matriz de distancias y las
+# series se copian una vez a memoria compartida. Cada réplica usa su propia
+# semilla (SeedSequence.spawn), así que el resultado no depende de n_jobs.
+
+_worker = {}
+
+
+def _share(array):
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm
+
+
+def _attach(shared):
+    """Inicializador de cada proceso: abre las matrices compartidas."""
+    for key, (name, shape, dtype) in shared.items():
+        _worker[f'{key}_shm'] = SharedMemory(name=name)
+        _worker[key] = np.ndarray(shape, dtype=dtype, buffer=_worker[f'{key}_shm'].buf)
+
+
+def block_bootstrap_days(n_days, block_days, rng):
+    """Índices de días de un bootstrap por bloques, ordenados en el tiempo."""
+    n_blocks = -(-n_days // block_days)
+    starts = np.sort(rng.integers(0, n_days - block_days + 1, n_blocks))
+    return (starts[:, None] + np.arange(block_days)).ravel()[:n_days]
+
+
+def align_labels(labels, reference, n_clusters):
+    """
+    Reetiqueta `labels` (1..k) con el cluster de referencia con el que más
+    se solapa, con una asignación uno a uno (algoritmo húngaro).
+    """
+    table = np.zeros((n_clusters, n_clusters), dtype=int)
+    np.add.at(table, (labels - 1, reference - 1), 1)
+    rows, cols = linear_sum_assignment(-table)
+    mapping = np.zeros(n_clusters, dtype=int)
+    mapping[rows] = cols + 1
+    return mapping[labels - 1]
+
+
+def _replicates(task):
+    """
+    Lote de réplicas. Devuelve sumas (no etiquetas por réplica), así el
+    tráfico entre procesos no crece con el número de réplicas.
+    """
+    seeds, mode, n_clusters, fraction, block_days, radius = task
+    distances, series, reference = _worker['distances'], _worker['series'], _worker['reference']
+    n = len(reference)
+    together = np.zeros((n, n), dtype=np.int32)
+    sampled = np.zeros((n, n), dtype=np.int32)
+    assigned = np.zeros((n, n_clusters), dtype=np.int32)
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        if mode == 'lgas':
+            rows = np.sort(rng.choice(n, size=max(n_clusters, int(round(fraction * n))), replace=False))
+            sub = distances[np.ix_(rows, rows)]
+        else:
+            rows = np.arange(n)
+            days = block_bootstrap_days(series.shape[1], block_days, rng)
+            sub = square(pairwise_distances(series[:, days], 'dtw', radius=radius))
+        labels = align_labels(hierarchical_labels(sub, n_clusters), reference[rows], n_clusters)
+        same = labels[:, None] == labels[None, :]
+        together[np.ix_(rows, rows)] += same
+        sampled[np.ix_(rows, rows)] += 1
+        assigned[rows, labels - 1] += 1
+    return together, sampled, assigned
+
+
+@profiled()
+def bootstrap_stability(series, reference, n_replicates=200, mode='lgas', fraction=0.8, block_days=14,
+                        radius=None, n_jobs=1, seed=0, distances=None, distances_file=None):
+    """
+    Co-clustering y confianza de asignación por remuestreo.
+
+    Args:
+        series: np.ndarray [n_LGA x días], ya escaladas como para clusterizar
+        reference: clusters publicados (1..k) por LGA
+        n_replicates: réplicas de remuestreo
+        mode: 'lgas' (reusa sub-bloques de la matriz DTW) o 'days'
+        fraction: fracción de LGAs por réplica ('lgas')
+        block_days: largo de los bloques del bootstrap de días ('days')
+        radius: banda de Sakoe-Chiba del DTW recalculado ('days')
+        n_jobs: procesos del pool
+        seed: semilla de la que se derivan las de cada réplica
+        distances: matriz DTW [n_LGA x n_LGA] ya calculada ('lgas')
+        distances_file: si no se da `distances`, se calcula (o se retoma)
+            en este archivo con pairwise.py
+
+    Returns:
+        dict con 'coclustering' (np.ndarray [n x n], fracción de las réplicas
+        con ambas LGAs en que quedan juntas; NaN si nunca se muestrearon
+        juntas), 'frequencies' ([n x k], fracción de réplicas en que cada
+        LGA cae en cada cluster de referencia), 'sampled' (réplicas por LGA),
+        'confidence' (frecuencia de su propio cluster) y 'seconds'
+    """
+    reference = np.asarray(reference, dtype=int)
+    n_clusters = int(reference.max())
+    series = np.ascontiguousarray(series, dtype=float)
+    if mode == 'lgas' and distances is None:
+        with step('distances'):
+            distances = square(pairwise_distances(series, 'dtw', n_jobs=n_jobs, out_file=distances_file))
+    distances = np.ascontiguousarray(distances if mode == 'lgas' else np.zeros((0, 0)), dtype=float)
+
+    seeds = np.random.SeedSequence(seed).spawn(n_replicates)
+    batches = [list(batch) for batch in np.array_split(np.array(seeds, dtype=object), max(1, 4 * n_jobs))
+               if len(batch)]
+    tasks = [(batch, mode, n_clusters, fraction, block_days, radius) for batch in batches]
+    arrays = {'distances': distances, 'series': series if mode == 'days' else np.zeros((0, 0)),
+              'reference': reference}
+
+    n = len(reference)
+    together = np.zeros((n, n), dtype=np.int64)
+    sampled = np.zeros((n, n), dtype=np.int64)
+    assigned = np.zeros((n, n_clusters), dtype=np.int64)
+    t0 = time.perf_counter()
+    with step('bootstrap'):
+        if n_jobs <= 1:
+            _worker.update(arrays)
+            try:
+                results = [_replicates(task) for task in tasks]
+            finally:
+                _worker.clear()
+        else:
+            shared = {key: _share(array) for key, array in arrays.items()}
+            initargs = ({key: (shm.name, arrays[key].shape, arrays[key].dtype) for key, shm in shared.items()},)
+            try:
+                with ProcessPoolExecutor(max_workers=n_jobs, initializer=_attach, initargs=initargs) as pool:
+                    results = [future.result() for future in as_completed([pool.submit(_replicates, task)
+                                                                           for task in tasks])]
+            finally:
+                for shm in shared.values():
+                    shm.close()
+                    shm.unlink()
+        for t, s, a in results:
+            together += t
+            sampled += s
+            assigned += a
+    seconds = time.perf_counter() - t0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        coclustering = np.where(sampled > 0, together / sampled, np.nan)
+        frequencies = assigned / np.diag(sampled)[:, None]
+    return {'coclustering': coclustering, 'frequencies': frequencies, 'sampled': np.diag(sampled).copy(),
+            'confidence': frequencies[np.arange(n), reference - 1], 'seconds': seconds}
+
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 3)
+
+
+def cluster_summary(result, reference):
+    """
+    Por cluster de referencia: confianza media de sus LGAs y co-clustering
+    medio dentro del cluster y con el resto.
+    """
+    summary = {}
+    for c in range(1, int(reference.max()) + 1):
+        inside = reference == c
+        block = result['coclustering'][np.ix_(inside, inside)]
+        off_diagonal = block[~np.eye(len(block), dtype=bool)]
+        summary[str(c)] = {
+            'n_lgas': int(inside.sum()),
+            'mean_confidence': round(float(np.nanmean(result['confidence'][inside])), 3) if inside.any() else None,
+            'within': round(float(np.nanmean(off_diagonal)), 3) if off_diagonal.size else None,
+            'between': (round(float(np.nanmean(result['coclustering'][np.ix_(inside, ~inside)])), 3)
+                        if inside.any() and (~inside).any() else None),
+        }
+    return summary
+
+
+def export_stability(matrix, lga_codes, n_replicates=200, mode='lgas', n_jobs=1, out_dir=out_folder,
+                     distances_file=distances_file, **options):
+    """
+    Estabilidad de los clusters publicados (lga_clusters.json).
+
+    Genera:
+    - lga_stability.json: para el mapa, por LGA su cluster, confianza,
+      réplicas en que se muestreó y frecuencia de cada cluster; y el
+      resumen por cluster
+    - coclustering.json: para la vista radial, LGAs ordenadas por cluster
+      y matriz de co-clustering x 100 (entero o null)
+    - coclustering.npz: la matriz en float32
+    """
+    from tslearn.preprocessing import TimeSeriesScalerMinMax
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if distances_file:
+        Path(distances_file).parent.mkdir(parents=True, exist_ok=True)
+
+    lga_codes = [str(code) for code in lga_codes]
+    labels = load_cluster_labels(lga_codes)
+    # Solo las LGAs con cluster publicado; la matriz DTW se calcula (o se lee
+    # de distances_file) con todas las series, igual que en cluster_series2,
+    # y se toma el sub-bloque
+    keep = labels > 0
+    series = TimeSeriesScalerMinMax().fit_transform(matrix)[:, :, 0]
+    distances = None
+    if mode == 'lgas':
+        with step('distances'):
+            distances = square(pairwise_distances(series, 'dtw', n_jobs=n_jobs, out_file=distances_file))
+        distances = distances[np.ix_(keep, keep)]
+    result = bootstrap_stability(series[keep], labels[keep], n_replicates, mode, n_jobs=n_jobs,
+                                 distances=distances, **options)
+    lga_codes, labels = [c for c, k in zip(lga_codes, keep) if k], labels[keep]
+
+    n_clusters = int(labels.max())
+    summary = cluster_summary(result, labels)
+    lgas = {code: {'cluster': int(c), 'confidence': _rounded(conf), 'sampled': int(s),
+                   'frequencies': {str(k + 1): _rounded(f) for k, f in enumerate(freq)}}
+            for code, c, conf, s, freq in zip(lga_codes, labels, result['confidence'], result['sampled'],
+                                               result['frequencies'])}
+    with open(out_dir / 'lga_stability.json', 'w') as f:
+        json.dump({'mode': mode, 'n_replicates': n_replicates, 'n_clusters': n_clusters,
+                   'clusters': summary, 'lgas': lgas}, f, separators=(',', ':'))
+
+    # Orden por cluster y, dentro, por confianza: los bloques quedan contiguos en la vista radial
+    order = np.lexsort((-result['confidence'], labels))
+    scaled = np.round(result['coclustering'][np.ix_(order, order)] * 100)
+    with open(out_dir / 'coclustering.json', 'w') as f:
+        json.dump({'scale': 100, 'lga_codes': [lga_codes[i] for i in order],
+                   'clusters': [int(labels[i]) for i in order],
+                   'matrix': [[None if np.isnan(v) else int(v) for v in row] for row in scaled]},
+                  f, separators=(',', ':'))
+    np.savez_compressed(out_dir / 'coclustering.npz', lga_codes=np.array(lga_codes), clusters=labels,
+                        coclustering=result['coclustering'].astype(np.float32),
+                        frequencies=result['frequencies'].astype(np.float32))
+
+    rate = n_replicates / result['seconds'] if result['seconds'] > 0 else float('inf')
+    print(f"Réplicas: {n_replicates} ({mode}) en {result['seconds']:.1f} s = {rate:.1f}/s "
+          f"({rate / max(n_jobs, 1):.1f}/s por proceso, {n_jobs} procesos)")
+    for c, s in summary.items():
+        print(f"  cluster {c}: {s['n_lgas']} LGAs  confianza media {s['mean_confidence']}  "
+              f"co-clustering dentro {s['within']} / fuera {s['between']}")
+    print(f"✅ Estabilidad de {len(lga_codes)} LGAs guardada en: {out_dir / 'lga_stability.json'}")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from cluster_series2 import process_covid_data
+
+    parser = argparse.ArgumentParser(description='Estabilidad de los clusters por remuestreo')
+    parser.add_argument('--replicates', type=int, default=200)
+    parser.add_argument('--mode', choices=['lgas', 'days'], default='lgas')
+    parser.add_argument('--fraction', type=float, default=0.8, help='fracción de LGAs por réplica (lgas)')
+    parser.add_argument('--block-days', type=int, default=14, help='largo de los bloques de días (days)')
+    parser.add_argument('--radius', type=int, default=None, help='banda del DTW recalculado (days)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--distances-file', default=distances_file,
+                        help='matriz DTW compartida con cluster_series2.py --distances-file')
+    args = parser.parse_args()
+
+    matrix, lga_codes, dates = process_covid_data()
+    export_stability(matrix, lga_codes, args.replicates, args.mode, args.jobs,
+                     distances_file=args.distances_file, fraction=args.fraction,
+                     block_days=args.block_days, radius=args.radius, seed=args.seed)
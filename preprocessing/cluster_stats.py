@@ -0,0 +1,171 @@
+import pandas as pd
+import numpy as np
+import json
+
+PERCENTILES = (10, 25, 50, 75, 90)
+STAT_COLUMNS = ['total', 'min', 'max', 'mean', 'median', 'p10', 'p25', 'p75', 'p90']
+
+
+def to_full_calendar(matrix, dates):
+    """
+    Completa la matriz [n_LGA x días] con los días sin casos en ninguna LGA
+    (process_covid_data solo devuelve las fechas con al menos un caso).
+
+    Returns:
+        full (np.ndarray [n_LGA x días calendario]), calendar (DatetimeIndex)
+    """
+    dates = pd.to_datetime(pd.Index(dates))
+    calendar = pd.date_range(dates.min(), dates.max(), freq='D')
+    full = np.zeros((matrix.shape[0], len(calendar)), dtype=float)
+    full[:, calendar.get_indexer(dates)] = matrix
+    return full, calendar
+
+
+def rolling_sums(matrix, window):
+    """
+    Sumas móviles de `window` días a lo largo del eje temporal en O(1) por
+    ventana, como diferencia de sumas acumuladas.
+
+    Returns:
+        np.ndarray [n_LGA x (días - window + 1)]; la columna j es la ventana
+        que termina en el día j + window - 1
+    """
+    cumulative = np.concatenate([np.zeros((matrix.shape[0], 1)), np.cumsum(matrix, axis=1)], axis=1)
+    return cumulative[:, window:] - cumulative[:, :-window]
+
+
+def _stats_across_rows(values):
+    """
+    Estadísticas por columna a lo largo del eje de LGAs (axis=0).
+
+    Returns:
+        dict estadística -> np.ndarray [columnas]
+    """
+    pct = np.percentile(values, PERCENTILES, axis=0)
+    return {
+        'total': values.sum(axis=0),
+        'min': values.min(axis=0),
+        'max': values.max(axis=0),
+        'mean': values.mean(axis=0),
+        'median': pct[2],
+        'p10': pct[0],
+        'p25': pct[1],
+        'p75': pct[3],
+        'p90': pct[4],
+    }
+
+
+def _stats_over_block(block):
+    """Estadísticas sobre todas las celdas LGA x día de un bloque."""
+    flat = block.ravel()
+    pct = np.percentile(flat, PERCENTILES)
+    return {
+        'total': flat.sum(), 'min': flat.min(), 'max': flat.max(), 'mean': flat.mean(),
+        'median': pct[2], 'p10': pct[0], 'p25': pct[1], 'p75': pct[3], 'p90': pct[4],
+    }
+
+
+def compute_window_stats(matrix, dates, clusterings, rolling_windows=(7, 14), monthly=True):
+    """
+    Calcula en una pasada las estadísticas por cluster para todas las
+    agrupaciones y ventanas temporales, reduciendo sobre la matriz
+    región x día con máscaras de etiquetas.
+
+    Ventanas:
+    - 'daily': por día, estadísticas entre las LGAs del cluster.
+    - 'rolling{w}': suma móvil de w días por LGA (vía sumas acumuladas),
+      estadísticas entre las LGAs del cluster; periodo = último día.
+    - 'monthly': estadísticas sobre todas las celdas LGA x día del mes,
+      incluyendo los días sin casos.
+
+    Args:
+        matrix: np.ndarray [n_LGA x días] (salida de process_covid_data)
+        dates: fechas de las columnas
+        clusterings: dict nombre -> etiquetas por fila (np.ndarray; 0 = sin
+            cluster, solo cuenta para 'all'); el cluster 'all' (todas las
+            LGAs) se agrega siempre
+        rolling_windows: tamaños de ventana móvil en días
+        monthly: si se calculan las ventanas mensuales
+
+    Returns:
+        pd.DataFrame con columnas clustering, cluster, window, period y
+        STAT_COLUMNS
+    """
+    full, calendar = to_full_calendar(matrix, dates)
+
+    # Arreglos por ventana, calculados una sola vez para todas las agrupaciones
+    windows = {'daily': (full, calendar)}
+    for w in rolling_windows:
+        windows[f'rolling{w}'] = (rolling_sums(full, w), calendar[w - 1:])
+
+    if monthly:
+        months = calendar.to_period('M')
+        month_keys, month_starts = np.unique(months.asi8, return_index=True)
+        month_bounds = list(zip(month_starts, list(month_starts[1:]) + [len(calendar)]))
+        month_labels = [str(p) for p in pd.PeriodIndex.from_ordinals(month_keys, freq='M')]
+
+    frames = []
+    for name, labels in clusterings.items():
+        labels = np.asarray(labels)
+        masks = {str(c): labels == c for c in np.unique(labels) if c != 0}
+        masks['all'] = np.ones(len(labels), dtype=bool)
+
+        for cluster, mask in masks.items():
+            for window, (values, periods) in windows.items():
+                stats = _stats_across_rows(values[mask])
+                frame = pd.DataFrame(stats)
+                frame.insert(0, 'period', periods.strftime('%Y-%m-%d'))
+                frame.insert(0, 'window', window)
+                frame.insert(0, 'cluster', cluster)
+                frame.insert(0, 'clustering', name)
+                frames.append(frame)
+
+            if monthly:
+                rows = [_stats_over_block(full[mask, start:end]) for start, end in month_bounds]
+                frame = pd.DataFrame(rows)
+                frame.insert(0, 'period', month_labels)
+                frame.insert(0, 'window', 'monthly')
+                frame.insert(0, 'cluster', cluster)
+                frame.insert(0, 'clustering', name)
+                frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def export_monthly_compat(stats, clustering, out_cluster='../dashboard_data/cluster_time_series/monthly_cluster_stats_fixed.csv',
+                          out_global='../dashboard_data/cluster_time_series/monthly_global_stats_fixed.csv'):
+    """
+    Escribe las estadísticas mensuales con el formato de los antiguos
+    global_stats.py / min_max_cluser.py (cluster, month, total, min, max,
+    mean, median), para que el dashboard siga consumiéndolas sin cambios.
+    """
+    monthly = stats[(stats['clustering'] == clustering) & (stats['window'] == 'monthly')]
+    columns = ['total', 'min', 'max', 'mean', 'median']
+
+    cluster_stats = monthly[monthly['cluster'] != 'all'].rename(columns={'period': 'month'})
+    cluster_stats = cluster_stats.assign(cluster=cluster_stats['cluster'].astype(int))
+    cluster_stats[['cluster', 'month'] + columns].sort_values(['cluster', 'month']).to_csv(out_cluster, index=False)
+    print(f"✅ Estadísticas por cluster guardadas en: {out_cluster}")
+
+    global_stats = monthly[monthly['cluster'] == 'all'].rename(columns={'period': 'month'})
+    global_stats[['month'] + columns].to_csv(out_global, index=False)
+    print(f"✅ Estadísticas globales guardadas en: {out_global}")
+
+
+def labels_from_cluster_map(lga_codes, json_file='../dashboard_data/cluster_time_series/lga_clusters.json'):
+    """Etiquetas por fila a partir de lga_clusters.json (0 si la LGA no está)."""
+    with open(json_file, 'r') as f:
+        cluster_map = json.load(f)
+    return np.array([cluster_map.get(str(code), 0) for code in lga_codes])
+
+
+if __name__ == "__main__":
+    from cluster_series2 import process_covid_data
+
+    matrix, lga_codes, dates = process_covid_data()
+    clusterings = {'dtw_average_4': labels_from_cluster_map(lga_codes)}
+    stats = compute_window_stats(matrix, dates, clusterings)
+    out_file = '../dashboard_data/cluster_time_series/cluster_window_stats.csv'
+    stats.to_csv(out_file, index=False)
+    print(f"✅ Estadísticas por ventana guardadas en: {out_file}")
+    export_monthly_compat(stats, 'dtw_average_4')
@@ -1,15 +1,16 @@
 import numpy as np
-from scipy.spatial.distance import pdist, squareform
-import pandas as pd
-import seaborn as sns
-from sklearn.preprocessing import StandardScaler
-def compute_data_context_distance_matrix(X: np.ndarray) -> np.ndarray:
+
+figures_folder = '../build/context_map'
+
+
+def compute_data_context_distance_matrix(X: np.ndarray, n_jobs: int = 1) -> np.ndarray:
     """
     Construye la matriz de distancia compuesta (m+n) x (m+n)
     a partir de una matriz de datos de tamaño m x n.
 
     Args:
         X: np.ndarray de forma (m, n)
+        n_jobs: procesos para el bloque DD (ver pairwise.py)
 
     Returns:
         D: np.ndarray de forma (m+n, m+n), matriz de distancias compuesta
@@ -17,7 +18,14 @@ def compute_data_context_distance_matrix(X: np.ndarray) -> np.ndarray:
     m, n = X.shape
 
     # 1. Data-to-Data (DD)
-    dd = squareform(pdist(X, metric='euclidean'))  # (m x m)
+    if n_jobs > 1:
+        from pairwise import pairwise_distances, square
+
+        dd = square(pairwise_distances(X, 'euclidean', n_jobs=n_jobs))
+    else:
+        from scipy.spatial.distance import pdist, squareform
+
+        dd = squareform(pdist(X, metric='euclidean'))  # (m x m)
 
     # 2. Variable-to-Variable (VV)
     corr_matrix = np.corrcoef(X.T)                # (n x n)
@@ -41,10 +49,21 @@ def compute_data_context_distance_matrix(X: np.ndarray) -> np.ndarray:
     return D
 
 
-import matplotlib.pyplot as plt
-from sklearn.manifold import MDS
+def finish_figure(out_file=None, show=False):
+    """Guarda la figura actual (si hay out_file) y la muestra solo si show; si no, la cierra."""
+    import matplotlib.pyplot as plt
+    from pathlib import Path
 
-def plot_mds_from_distance_matrix(D, m, n):
+    if out_file:
+        Path(out_file).parent.mkdir(parents=True, exist_ok=True)
+        plt.savefig(out_file, dpi=150)
+    if show:
+        plt.show()
+    else:
+        plt.close()
+
+
+def plot_mds_from_distance_matrix(D, m, n, out_file=None, show=False):
     """
     Aplica MDS a una matriz de distancias (m+n x m+n) y grafica los puntos resultantes.
 
@@ -52,11 +71,15 @@ def plot_mds_from_distance_matrix(D, m, n):
         D: np.ndarray de forma (m+n, m+n), matriz de distancias
         m: int, número de registros (datos)
         n: int, número de variables (atributos)
-        return_coords: bool, si True devuelve las coordenadas 2D resultantes
+        out_file: si se da, la figura se guarda en ese archivo
+        show: abre la ventana de matplotlib (bloquea hasta cerrarla)
 
     Returns:
         coords: np.ndarray de forma (m+n, 2), coordenadas 2D de todos los puntos
     """
+    import matplotlib.pyplot as plt
+    from sklearn.manifold import MDS
+
     mds = MDS(n_components=2, dissimilarity='precomputed', random_state=42)
     coords = mds.fit_transform(D)
 
@@ -78,13 +101,12 @@ def plot_mds_from_distance_matrix(D, m, n):
     plt.grid(True)
     plt.axis('equal')
     plt.tight_layout()
-    plt.show()
+    finish_figure(out_file, show)
 
     return coords
 
 
 
-from scipy.stats import gaussian_kde
 import numpy as np
 
 def compute_akde_density(points_2d, grid_size=100, bandwidth='scott', margin=1.0):
@@ -101,6 +123,8 @@ def compute_akde_density(points_2d, grid_size=100, bandwidth='scott', margin=1.0
         xgrid, ygrid: mallas de coordenadas
         density: matriz de densidad evaluada sobre el grid
     """
+    from scipy.stats import gaussian_kde
+
     kde = gaussian_kde(points_2d.T, bw_method=bandwidth)
 
     x_min, x_max = points_2d[:, 0].min() - margin, points_2d[:, 0].max() + margin
@@ -149,9 +173,6 @@ def nadaraya_watson_regression(points_2d, values, grid_size=100, bandwidth=0.5):
 
 
 
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-
 def plot_contour_boundaries(xgrid, ygrid, surface, ax=None, levels=5, color='k', linewidth=1):
     """
     Traza contornos sobre una superficie (densidad o regresión).
@@ -167,6 +188,9 @@ def plot_contour_boundaries(xgrid, ygrid, surface, ax=None, levels=5, color='k',
     Returns:
         contours: objeto matplotlib.contour.QuadContourSet
     """
+    import matplotlib.pyplot as plt
+    import matplotlib.ticker as ticker
+
     if ax is None:
         ax = plt.gca()
 
@@ -204,75 +228,6 @@ selected_10 = [
 ]
 
 
-df = pd.read_csv('census_clean.csv')
-df_reduced = df.dropna()
-df_reduced = df_reduced.iloc[:, 3:]
-df_reduced_clean = df_reduced.dropna()
-# df_selected = df_reduced_clean[selected_10].dropna()
-df_selected = df_reduced_clean
-
-scaler = StandardScaler()
-
-sns.heatmap(df_selected.corr(), annot=True, cmap='coolwarm')
-plt.title("Correlación entre variables seleccionadas")
-plt.show()
-
-
-df_clean = df_selected.apply(pd.to_numeric, errors='coerce')
-X = df_clean.to_numpy()
-X_scaled = scaler.fit_transform(X)
-D = compute_data_context_distance_matrix(X_scaled)
-print(np.round(D, 2))
-m, n = X_scaled.shape
-coords = plot_mds_from_distance_matrix(D, m, n)
-data_coords = coords[:m]
-
-
-xgrid, ygrid, density = compute_akde_density(data_coords)
-
-
-
-
-
-# fig, ax = plt.subplots(figsize=(8, 6))
-# ax.contourf(xgrid, ygrid, density, levels=100, cmap='Blues', alpha=0.5)
-# plot_contour_boundaries(xgrid, ygrid, density, ax=ax, levels=5)
-
-# ax.scatter(data_coords[:, 0], data_coords[:, 1], color='blue', label='Datos')
-# ax.scatter(coords[m:, 0], coords[m:, 1], color='red', marker='^', label='Variables')
-
-# ax.set_title("Mapa con AKDE + Contornos")
-# ax.legend()
-# plt.tight_layout()
-# plt.show()
-
-
-fig, ax = plt.subplots(figsize=(10, 7))
-
-# Fondo KDE + contornos
-ax.contourf(xgrid, ygrid, density, levels=100, cmap='Blues', alpha=0.5)
-plot_contour_boundaries(xgrid, ygrid, density, ax=ax, levels=5)
-
-# Puntos de datos
-ax.scatter(data_coords[:, 0], data_coords[:, 1], color='blue', label='Datos')
-
-# Variables
-var_coords = coords[m:]
-ax.scatter(var_coords[:, 0], var_coords[:, 1], color='red', marker='^', label='Variables')
-
-# Etiquetar las variables con su nombre real
-for j, var_name in enumerate(selected_10):
-    ax.text(var_coords[j, 0], var_coords[j, 1], var_name, fontsize=8, color='darkred', ha='center', va='bottom')
-
-# Título y estética
-ax.set_title("Mapa de Contexto con Nombres de Variables", fontsize=13)
-ax.legend()
-ax.grid(True)
-plt.tight_layout()
-plt.show()
-
-
-
 #-----------------------------------------------------------------------------------------
 
 import numpy as np
@@ -345,12 +300,108 @@ def export_context_map_json(
     return filename
 
 
-filename = export_context_map_json(
-    coords=coords,
-    m=m,
-    n=n,
-    selected_variable_names=selected_10,
-    dv_matrix=D,  # matriz (m x n) con distancias data ↔ variable
-    contour_paths=None,  # puedes pasar coordenadas de contornos si las tienes
-    filename = "../dashboard/context_map/context_map_2.json"
-)
+def main(show=False, figures_dir=figures_folder):
+    """
+    Calcula el Data Context Map del censo, lo grafica y lo exporta a JSON.
+
+    Las figuras se guardan en figures_dir; con show=True además se abren
+    (el pipeline y la CLI no las abren, para no bloquear la etapa).
+    """
+    import matplotlib
+    import pandas as pd
+
+    if not show:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from sklearn.preprocessing import StandardScaler
+
+    df = pd.read_csv('../dashboard_data/common/census_clean.csv')
+    df_reduced = df.dropna()
+    df_reduced = df_reduced.iloc[:, 3:]
+    df_reduced_clean = df_reduced.dropna()
+    # df_selected = df_reduced_clean[selected_10].dropna()
+    df_selected = df_reduced_clean
+
+    scaler = StandardScaler()
+
+    sns.heatmap(df_selected.corr(), annot=True, cmap='coolwarm')
+    plt.title("Correlación entre variables seleccionadas")
+    finish_figure(f'{figures_dir}/correlation_heatmap.png', show)
+
+
+    df_clean = df_selected.apply(pd.to_numeric, errors='coerce')
+    X = df_clean.to_numpy()
+    X_scaled = scaler.fit_transform(X)
+    D = compute_data_context_distance_matrix(X_scaled)
+    print(np.round(D, 2))
+    m, n = X_scaled.shape
+    coords = plot_mds_from_distance_matrix(D, m, n, f'{figures_dir}/mds.png', show)
+    data_coords = coords[:m]
+
+
+    xgrid, ygrid, density = compute_akde_density(data_coords)
+
+
+
+
+
+    # fig, ax = plt.subplots(figsize=(8, 6))
+    # ax.contourf(xgrid, ygrid, density, levels=100, cmap='Blues', alpha=0.5)
+    # plot_contour_boundaries(xgrid, ygrid, density, ax=ax, levels=5)
+
+    # ax.scatter(data_coords[:, 0], data_coords[:, 1], color='blue', label='Datos')
+    # ax.scatter(coords[m:, 0], coords[m:, 1], color='red', marker='^', label='Variables')
+
+    # ax.set_title("Mapa con AKDE + Contornos")
+    # ax.legend()
+    # plt.tight_layout()
+    # plt.show()
+
+
+    fig, ax = plt.subplots(figsize=(10, 7))
+
+    # Fondo KDE + contornos
+    ax.contourf(xgrid, ygrid, density, levels=100, cmap='Blues', alpha=0.5)
+    plot_contour_boundaries(xgrid, ygrid, density, ax=ax, levels=5)
+
+    # Puntos de datos
+    ax.scatter(data_coords[:, 0], data_coords[:, 1], color='blue', label='Datos')
+
+    # Variables
+    var_coords = coords[m:]
+    ax.scatter(var_coords[:, 0], var_coords[:, 1], color='red', marker='^', label='Variables')
+
+    # Etiquetar las variables con su nombre real
+    for j, var_name in enumerate(selected_10):
+        ax.text(var_coords[j, 0], var_coords[j, 1], var_name, fontsize=8, color='darkred', ha='center', va='bottom')
+
+    # Título y estética
+    ax.set_title("Mapa de Contexto con Nombres de Variables", fontsize=13)
+    ax.legend()
+    ax.grid(True)
+    plt.tight_layout()
+    finish_figure(f'{figures_dir}/context_map.png', show)
+
+
+
+
+    filename = export_context_map_json(
+        coords=coords,
+        m=m,
+        n=n,
+        selected_variable_names=selected_10,
+        dv_matrix=D,  # matriz (m x n) con distancias data ↔ variable
+        contour_paths=None,  # puedes pasar coordenadas de contornos si las tienes
+        filename = "../dashboard_data/context_map/context_map.json"
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Data Context Map del censo')
+    parser.add_argument('--show', action='store_true', help='abre las figuras además de guardarlas')
+    parser.add_argument('--figures-dir', default=figures_folder)
+    args = parser.parse_args()
+    main(args.show, args.figures_dir)
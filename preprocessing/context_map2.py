@@ -1,8 +1,6 @@
 import numpy as np
-from scipy.spatial.distance import pdist, squareform
-import pandas as pd
-import seaborn as sns
-from sklearn.preprocessing import StandardScaler
+
+
 def compute_data_context_distance_matrix(X: np.ndarray) -> np.ndarray:
     """
     Construye la matriz de distancia compuesta (m+n) x (m+n)
@@ -17,6 +15,8 @@ def compute_data_context_distance_matrix(X: np.ndarray) -> np.ndarray:
     m, n = X.shape
 
     # 1. Data-to-Data (DD)
+    from scipy.spatial.distance import pdist, squareform
+
     dd = squareform(pdist(X, metric='euclidean'))  # (m x m)
 
     # 2. Variable-to-Variable (VV)
@@ -41,9 +41,6 @@ def compute_data_context_distance_matrix(X: np.ndarray) -> np.ndarray:
     return D
 
 
-import matplotlib.pyplot as plt
-from sklearn.manifold import MDS
-
 def plot_mds_from_distance_matrix(D, m, n):
     """
     Aplica MDS a una matriz de distancias (m+n x m+n) y grafica los puntos resultantes.
@@ -57,6 +54,9 @@ def plot_mds_from_distance_matrix(D, m, n):
     Returns:
         coords: np.ndarray de forma (m+n, 2), coordenadas 2D de todos los puntos
     """
+    import matplotlib.pyplot as plt
+    from sklearn.manifold import MDS
+
     mds = MDS(n_components=2, dissimilarity='precomputed', random_state=42)
     coords = mds.fit_transform(D)
 
@@ -84,7 +84,6 @@ def plot_mds_from_distance_matrix(D, m, n):
 
 
 
-from scipy.stats import gaussian_kde
 import numpy as np
 
 def compute_akde_density(points_2d, grid_size=100, bandwidth='scott', margin=1.0):
@@ -101,6 +100,8 @@ def compute_akde_density(points_2d, grid_size=100, bandwidth='scott', margin=1.0
         xgrid, ygrid: mallas de coordenadas
         density: matriz de densidad evaluada sobre el grid
     """
+    from scipy.stats import gaussian_kde
+
     kde = gaussian_kde(points_2d.T, bw_method=bandwidth)
 
     x_min, x_max = points_2d[:, 0].min() - margin, points_2d[:, 0].max() + margin
@@ -149,9 +150,6 @@ def nadaraya_watson_regression(points_2d, values, grid_size=100, bandwidth=0.5):
 
 
 
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-
 def plot_contour_boundaries(xgrid, ygrid, surface, ax=None, levels=5, color='k', linewidth=1):
     """
     Traza contornos sobre una superficie (densidad o regresión).
@@ -167,6 +165,9 @@ def plot_contour_boundaries(xgrid, ygrid, surface, ax=None, levels=5, color='k',
     Returns:
         contours: objeto matplotlib.contour.QuadContourSet
     """
+    import matplotlib.pyplot as plt
+    import matplotlib.ticker as ticker
+
     if ax is None:
         ax = plt.gca()
 
@@ -204,45 +205,49 @@ selected_10 = [
 ]
 
 
-df = pd.read_csv('census_clean.csv')
-first_row = list(df.columns)
-df_reduced = df.dropna()
-df_reduced = df_reduced.iloc[:, 3:]
-print("first_row", first_row)
-df_reduced_clean = df_reduced.dropna()
-# df_selected = df_reduced_clean[selected_10].dropna()
-df_selected = df_reduced_clean
-
-scaler = StandardScaler()
+def main():
+    """Exploración del Data Context Map (PCA y MDS) sobre todas las variables del censo."""
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
 
-# Esto es para el mapa de correlacion entre variables
-# sns.heatmap(df_selected.corr(), annot=True, cmap='coolwarm')
-# plt.title("Correlación entre variables seleccionadas")
-# plt.show()
+    df = pd.read_csv('../dashboard_data/common/census_clean.csv')
+    first_row = list(df.columns)
+    df_reduced = df.dropna()
+    df_reduced = df_reduced.iloc[:, 3:]
+    print("first_row", first_row)
+    df_reduced_clean = df_reduced.dropna()
+    # df_selected = df_reduced_clean[selected_10].dropna()
+    df_selected = df_reduced_clean
 
+    scaler = StandardScaler()
 
-df_clean = df_selected.apply(pd.to_numeric, errors='coerce')
-X = df_clean.to_numpy()
-X_scaled = scaler.fit_transform(X)
-from sklearn.preprocessing import RobustScaler
-from sklearn.decomposition import PCA
-# X_scaled = RobustScaler().fit_transform(X)
-np.set_printoptions(threshold=np.inf)
-print(X_scaled)
-pca = PCA(n_components=2)
-X_pca = pca.fit_transform(X_scaled)
-components = pca.components_
-pc1_weights = components[0]
+    # Esto es para el mapa de correlacion entre variables
+    # sns.heatmap(df_selected.corr(), annot=True, cmap='coolwarm')
+    # plt.title("Correlación entre variables seleccionadas")
+    # plt.show()
 
-# Ordenar por valor absoluto (más influencia)
-indices = np.argsort(np.abs(pc1_weights))[::-1]
 
-# Mostrar top variables que más influyen en PC1
-print("Variables que más influyen en PC1:")
-for i in indices[:20]:  # top 5
-    print(f"{first_row[i]}: {pc1_weights[i]:.4f}")
+    df_clean = df_selected.apply(pd.to_numeric, errors='coerce')
+    X = df_clean.to_numpy()
+    X_scaled = scaler.fit_transform(X)
+    from sklearn.preprocessing import RobustScaler
+    from sklearn.decomposition import PCA
+    # X_scaled = RobustScaler().fit_transform(X)
+    np.set_printoptions(threshold=np.inf)
+    print(X_scaled)
+    pca = PCA(n_components=2)
+    X_pca = pca.fit_transform(X_scaled)
+    components = pca.components_
+    pc1_weights = components[0]
 
+    # Ordenar por valor absoluto (más influencia)
+    indices = np.argsort(np.abs(pc1_weights))[::-1]
 
+    # Mostrar top variables que más influyen en PC1
+    print("Variables que más influyen en PC1:")
+    for i in indices[:20]:  # top 5
+        print(f"{first_row[i]}: {pc1_weights[i]:.4f}")
 
 
 
@@ -255,123 +260,129 @@ for i in indices[:20]:  # top 5
 
 
 
-D = compute_data_context_distance_matrix(X_scaled)
-# print(np.round(D, 2))
-m, n = X_scaled.shape
-coords = plot_mds_from_distance_matrix(D, m, n)
-data_coords = coords[:m]
 
 
-xgrid, ygrid, density = compute_akde_density(data_coords)
+    D = compute_data_context_distance_matrix(X_scaled)
+    # print(np.round(D, 2))
+    m, n = X_scaled.shape
+    coords = plot_mds_from_distance_matrix(D, m, n)
+    data_coords = coords[:m]
 
 
+    xgrid, ygrid, density = compute_akde_density(data_coords)
 
 
 
 
 
 
-fig, ax = plt.subplots(figsize=(10, 7))
 
-ax.contourf(xgrid, ygrid, density, levels=100, cmap='Blues', alpha=0.5)
-plot_contour_boundaries(xgrid, ygrid, density, ax=ax, levels=5)
 
-ax.scatter(data_coords[:, 0], data_coords[:, 1], color='blue', label='Datos')
+    fig, ax = plt.subplots(figsize=(10, 7))
 
-# Variables
-var_coords = coords[m:]
-ax.scatter(var_coords[:, 0], var_coords[:, 1], color='red', marker='^', label='Variables')
+    ax.contourf(xgrid, ygrid, density, levels=100, cmap='Blues', alpha=0.5)
+    plot_contour_boundaries(xgrid, ygrid, density, ax=ax, levels=5)
 
-# Etiquetar las variables con su nombre real
-for j, var_name in enumerate(selected_10):
-    ax.text(var_coords[j, 0], var_coords[j, 1], var_name, fontsize=8, color='darkred', ha='center', va='bottom')
+    ax.scatter(data_coords[:, 0], data_coords[:, 1], color='blue', label='Datos')
 
-# Título y estética
-ax.set_title("Mapa de Contexto con Nombres de Variables", fontsize=13)
-ax.legend()
-ax.grid(True)
-plt.tight_layout()
-plt.show()
-
-
-
-# #-----------------------------------------------------------------------------------------
-
-# import numpy as np
-# import json
-
-# def export_context_map_json(
-#     coords,
-#     m,
-#     n,
-#     selected_variable_names,
-#     dv_matrix,
-#     contour_paths=None,
-#     filename='context_map.json'
-# ):
-#     """
-#     Exporta los datos de un Data Context Map a un archivo JSON estructurado para D3.js.
-
-#     Args:
-#         coords: np.ndarray de forma (m+n, 2), coordenadas 2D de los puntos proyectados.
-#         m: int, número de datos (instancias).
-#         n: int, número de variables.
-#         selected_variable_names: lista de nombres de las variables (longitud n).
-#         dv_matrix: np.ndarray de forma (m, n), distancias de cada dato a cada variable.
-#         contour_paths: lista de listas de puntos de contorno (cada punto como dict con x, y), opcional.
-#         filename: nombre del archivo de salida .json
+    # Variables
+    var_coords = coords[m:]
+    ax.scatter(var_coords[:, 0], var_coords[:, 1], color='red', marker='^', label='Variables')
 
-#     Returns:
-#         filename: nombre del archivo guardado
-#     """
-#     data = {
-#         "points": [],
-#         "distances": {},
-#         "contours": contour_paths if contour_paths is not None else []
-#     }
+    # Etiquetar las variables con su nombre real
+    for j, var_name in enumerate(selected_10):
+        ax.text(var_coords[j, 0], var_coords[j, 1], var_name, fontsize=8, color='darkred', ha='center', va='bottom')
 
-#     # Agregar puntos de datos (instancias)
-#     for i in range(m):
-#         data["points"].append({
-#             "type": "data",
-#             "name": f"D{i+1}",
-#             "x": float(coords[i, 0]),
-#             "y": float(coords[i, 1])
-#         })
+    # Título y estética
+    ax.set_title("Mapa de Contexto con Nombres de Variables", fontsize=13)
+    ax.legend()
+    ax.grid(True)
+    plt.tight_layout()
+    plt.show()
 
-#     # Agregar puntos de variables
-#     for j in range(n):
-#         data["points"].append({
-#             "type": "variable",
-#             "name": selected_variable_names[j],
-#             "x": float(coords[m + j, 0]),
-#             "y": float(coords[m + j, 1])
-#         })
 
-#     # Agregar distancias data → variable (ordenadas por cercanía)
-#     for i in range(m):
-#         dists = [
-#             {
-#                 "variable": selected_variable_names[j],
-#                 "distance": float(dv_matrix[i, j])
-#             }
-#             for j in range(n)
-#         ]
-#         dists.sort(key=lambda x: x["distance"])
-#         data["distances"][f"D{i+1}"] = dists
 
-#     # Exportar como archivo JSON
-#     with open(filename, 'w', encoding='utf-8') as f:
-#         json.dump(data, f, indent=2)
-
-#     return filename
-
-
-# filename = export_context_map_json(
-#     coords=coords,
-#     m=m,
-#     n=n,
-#     selected_variable_names=selected_10,
-#     dv_matrix=D,  # matriz (m x n) con distancias data ↔ variable
-#     contour_paths=None  # puedes pasar coordenadas de contornos si las tienes
-# )
+    # #-----------------------------------------------------------------------------------------
+
+    # import numpy as np
+    # import json
+
+    # def export_context_map_json(
+    #     coords,
+    #     m,
+    #     n,
+    #     selected_variable_names,
+    #     dv_matrix,
+    #     contour_paths=None,
+    #     filename='context_map.json'
+    # ):
+    #     """
+    #     Exporta los datos de un Data Context Map a un archivo JSON estructurado para D3.js.
+
+    #     Args:
+    #         coords: np.ndarray de forma (m+n, 2), coordenadas 2D de los puntos proyectados.
+    #         m: int, número de datos (instancias).
+    #         n: int, número de variables.
+    #         selected_variable_names: lista de nombres de las variables (longitud n).
+    #         dv_matrix: np.ndarray de forma (m, n), distancias de cada dato a cada variable.
+    #         contour_paths: lista de listas de puntos de contorno (cada punto como dict con x, y), opcional.
+    #         filename: nombre del archivo de salida .json
+
+    #     Returns:
+    #         filename: nombre del archivo guardado
+    #     """
+    #     data = {
+    #         "points": [],
+    #         "distances": {},
+    #         "contours": contour_paths if contour_paths is not None else []
+    #     }
+
+    #     # Agregar puntos de datos (instancias)
+    #     for i in range(m):
+    #         data["points"].append({
+    #             "type": "data",
+    #             "name": f"D{i+1}",
+    #             "x": float(coords[i, 0]),
+    #             "y": float(coords[i, 1])
+    #         })
+
+    #     # Agregar puntos de variables
+    #     for j in range(n):
+    #         data["points"].append({
+    #             "type": "variable",
+    #             "name": selected_variable_names[j],
+    #             "x": float(coords[m + j, 0]),
+    #             "y": float(coords[m + j, 1])
+    #         })
+
+    #     # Agregar distancias data → variable (ordenadas por cercanía)
+    #     for i in range(m):
+    #         dists = [
+    #             {
+    #                 "variable": selected_variable_names[j],
+    #                 "distance": float(dv_matrix[i, j])
+    #             }
+    #             for j in range(n)
+    #         ]
+    #         dists.sort(key=lambda x: x["distance"])
+    #         data["distances"][f"D{i+1}"] = dists
+
+    #     # Exportar como archivo JSON
+    #     with open(filename, 'w', encoding='utf-8') as f:
+    #         json.dump(data, f, indent=2)
+
+    #     return filename
+
+
+    # filename = export_context_map_json(
+    #     coords=coords,
+    #     m=m,
+    #     n=n,
+    #     selected_variable_names=selected_10,
+    #     dv_matrix=D,  # matriz (m x n) con distancias data ↔ variable
+    #     contour_paths=None  # puedes pasar coordenadas de contornos si las tienes
+    # )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+import json
+import os
+import resource
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+
+import pipeline
+from census_features import census_features
+from pipeline import ROOT
+
+# Registro de datasets: cada entrada describe de dónde salen los casos, el
+# censo y la geometría, el rango de fechas y cómo se llaman sus columnas en
+# el esquema de NSW que esperan los scripts. Rutas relativas a la raíz del
+# repositorio (o absolutas).
+#
+# Cada dataset se procesa en su espacio build/datasets/<name>/, que imita la
+# raíz del repositorio: original_data/ tiene las fuentes con los nombres de
+# NSW (enlaces simbólicos, o copias normalizadas si hay que renombrar
+# columnas o filtrar fechas) y dashboard_data/ apunta a
+# dashboard_data/datasets/<namespace>/. El pipeline se ejecuta sin cambios
+# contra ese espacio, así que las rutas relativas de los scripts caen en el
+# árbol del dataset.
+#
+#   'cases':    {'path', 'columns': {columna NSW: columna fuente}, 'date_format'}
+#   'census':   {'path', 'columns': {columna NSW: columna fuente}}
+#   'geometry': {'path', 'code_property': propiedad con el código de la región}
+#   'date_range': ['AAAA-MM-DD', 'AAAA-MM-DD'] (inclusivo) o None
+#   'namespace': subcarpeta de dashboard_data/datasets/ (por defecto, name)
+DATASETS = [
+    {'name': 'nsw_covid',
+     'description': 'Casos de COVID-19 por LGA de NSW Health y censo ABS 2016',
+     'cases': {'path': pipeline.cases_file},
+     'census': {'path': pipeline.raw_census_file},
+     'geometry': {'path': pipeline.geojson_file},
+     'date_range': None},
+]
+
+CASE_COLUMNS = ['notification_date', 'postcode', 'lhd_2010_code', 'lhd_2010_name', 'lga_code19', 'lga_name19']
+REQUIRED_CASE_COLUMNS = ['notification_date', 'lga_code19']
+# Columnas que cleaning.py agrega al censo (Area y Population se corrigen en
+# su lugar); si la fuente ya las trae se quitan para que cleaning las
+# recalcule con los casos del dataset
+DERIVED_CENSUS_COLUMNS = [c for c in census_features('lga') if c not in ('Area', 'Population')]
+
+workspace_dir = ROOT / 'build' / 'datasets'
+outputs_dir = ROOT / 'dashboard_data' / 'datasets'
+
+# Estimación de memoria de un dataset sin ejecuciones previas: base del
+# intérprete y las librerías, la lista de casos en pandas (~6 veces el CSV)
+# y las matrices de distancias DTW entre regiones (float64, unas 3 copias)
+BASE_MEMORY_MB = 250
+CASES_MEMORY_FACTOR = 6
+PEAK_MARGIN = 1.2
+
+
+def load_registry(registry_file=None):
+    """
+    Datasets registrados: los de DATASETS más los de un JSON opcional (una
+    lista de entradas con el mismo formato).
+
+    Raises:
+        ValueError: si una entrada es inválida o hay nombres repetidos
+    """
+    datasets = list(DATASETS)
+    if registry_file:
+        with open(registry_file, 'r') as f:
+            datasets += json.load(f)
+    names = set()
+    for spec in datasets:
+        validate_dataset(spec)
+        if spec['name'] in names:
+            raise ValueError(f"Dataset repetido: {spec['name']}")
+        names.add(spec['name'])
+    return datasets
+
+
+def validate_dataset(spec):
+    """Comprueba los campos de una entrada del registro (ValueError si falta algo)."""
+    name = spec.get('name', '')
+    if not name or not name.replace('_', '').replace('-', '').isalnum():
+        raise ValueError(f"Nombre de dataset inválido: {name!r}")
+    for kind in ('cases', 'census', 'geometry'):
+        if 'path' not in spec.get(kind, {}):
+            raise ValueError(f"{name}: falta {kind}.path")
+    unknown = set(spec['cases'].get('columns', {})) - set(CASE_COLUMNS)
+    if unknown:
+        raise ValueError(f"{name}: columnas de casos desconocidas {sorted(unknown)}")
+    date_range = spec.get('date_range')
+    if date_range is not None and (len(date_range) != 2 or pd.Timestamp(date_range[0]) > pd.Timestamp(date_range[1])):
+        raise ValueError(f"{name}: date_range debe ser [inicio, fin]")
+
+
+def workspace(spec):
+    return workspace_dir / spec['name']
+
+
+def _source(path):
+    path = Path(path)
+    return path if path.is_absolute() else ROOT / path
+
+
+def _read_json(path, default):
+    if Path(path).is_file():
+        with open(path, 'r') as f:
+            return json.load(f)
+    return default
+
+
+def _write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def normalize_cases(source, target, columns=None, date_range=None, date_format=None, chunksize=500_000):
+    """
+    Copia la lista de casos con las columnas de cases_NSW.csv, por tramos para
+    no cargarla entera: renombra columnas, normaliza la fecha a AAAA-MM-DD y
+    filtra el rango. Las columnas NSW que la fuente no tiene se rellenan con '-'.
+
+    Returns:
+        número de filas escritas
+    """
+    rename = {src: canonical for canonical, src in (columns or {}).items()}
+    tmp = Path(f'{target}.tmp')
+    rows = 0
+    with open(tmp, 'w', newline='') as f:
+        f.write(','.join(CASE_COLUMNS) + '\n')
+        for chunk in pd.read_csv(source, chunksize=chunksize, dtype=str):
+            chunk = chunk.rename(columns=rename)
+            missing = [c for c in REQUIRED_CASE_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"{source}: faltan las columnas {missing}")
+            dates = pd.to_datetime(chunk['notification_date'], format=date_format, errors='coerce')
+            keep = dates.notna()
+            if date_range:
+                keep &= dates.between(pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1]))
+            chunk = chunk[keep].assign(notification_date=dates[keep].dt.strftime('%Y-%m-%d'))
+            for column in CASE_COLUMNS:
+                if column not in chunk.columns:
+                    chunk[column] = '-'
+            chunk[CASE_COLUMNS].to_csv(f, header=False, index=False)
+            rows += len(chunk)
+    os.replace(tmp, target)
+    return rows
+
+
+def normalize_census(source, target, columns=None):
+    """Censo con los nombres de columna de NSW y sin las columnas derivadas."""
+    census = pd.read_csv(source).rename(columns={src: canonical for canonical, src in (columns or {}).items()})
+    census = census.drop(columns=[c for c in DERIVED_CENSUS_COLUMNS if c in census.columns])
+    census.to_csv(target, index=False)
+    return len(census)
+
+
+def normalize_geometry(source, target, code_property):
+    """GeoJSON con el código de cada región en properties.lgacode."""
+    with open(source, 'r') as f:
+        geo = json.load(f)
+    for feature in geo['features']:
+        feature['properties']['lgacode'] = feature['properties'][code_property]
+    with open(target, 'w') as f:
+        json.dump(geo, f, separators=(',', ':'))
+    return len(geo['features'])
+
+
+def _needs_normalization(kind, spec, source):
+    part = spec[kind]
+    if kind == 'cases':
+        return bool(part.get('columns') or part.get('date_format') or spec.get('date_range'))
+    if kind == 'census':
+        header = pd.read_csv(source, nrows=0).columns
+        return bool(part.get('columns')) or any(c in header for c in DERIVED_CENSUS_COLUMNS)
+    return part.get('code_property', 'lgacode') != 'lgacode'
+
+
+def prepare_workspace(spec):
+    """
+    Arma el espacio del dataset (ver arriba). Una fuente se vuelve a
+    normalizar solo si cambió su entrada en el registro o el archivo
+    (tamaño y mtime); si falta, se quita del espacio y las etapas que la
+    usan quedan bloqueadas.
+
+    Returns:
+        Path del espacio
+    """
+    work = workspace(spec)
+    out = outputs_dir / spec.get('namespace', spec['name'])
+    for folder in (work / 'original_data', work / 'preprocessing', out):
+        folder.mkdir(parents=True, exist_ok=True)
+    if not (work / 'dashboard_data').is_symlink():
+        (work / 'dashboard_data').symlink_to(out, target_is_directory=True)
+    # Los scripts suponen que las carpetas de salida existen, como en el repositorio
+    for stage in pipeline.STAGES:
+        for output in stage['outputs']:
+            (work / output).parent.mkdir(parents=True, exist_ok=True)
+
+    state = _read_json(work / 'dataset_state.json', {})
+    stamps = state.setdefault('sources', {})
+    targets = {'cases': pipeline.cases_file, 'census': pipeline.raw_census_file, 'geometry': pipeline.geojson_file}
+    for kind, relative in targets.items():
+        source, target = _source(spec[kind]['path']), work / relative
+        if not source.is_file():
+            target.unlink(missing_ok=True)
+            stamps.pop(kind, None)
+            continue
+        stat = source.stat()
+        stamp = {'spec': spec[kind], 'date_range': spec.get('date_range') if kind == 'cases' else None,
+                 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if stamps.get(kind) == stamp and (target.is_file() or target.is_symlink()):
+            continue
+        target.unlink(missing_ok=True)
+        if not _needs_normalization(kind, spec, source):
+            target.symlink_to(source)
+        elif kind == 'cases':
+            rows = normalize_cases(source, target, spec['cases'].get('columns'), spec.get('date_range'),
+                                   spec['cases'].get('date_format'))
+            print(f"✅ {rows:,} casos normalizados en: {target}")
+        elif kind == 'census':
+            normalize_census(source, target, spec['census'].get('columns'))
+        else:
+            normalize_geometry(source, target, spec['geometry']['code_property'])
+        stamps[kind] = stamp
+    _write_json(work / 'dataset_state.json', state)
+    return work
+
+
+def estimate_memory_mb(spec):
+    """
+    Memoria que reservar para el dataset: el pico medido en la última
+    ejecución (con margen) o, si no hay, una estimación por tamaño de entradas.
+    """
+    state = _read_json(workspace(spec) / 'dataset_state.json', {})
+    if state.get('peak_mb'):
+        return state['peak_mb'] * PEAK_MARGIN
+    cases, census = _source(spec['cases']['path']), _source(spec['census']['path'])
+    cases_mb = cases.stat().st_size / 2 ** 20 if cases.is_file() else 0
+    n_regions = len(pd.read_csv(census, usecols=[0])) if census.is_file() else 0
+    return BASE_MEMORY_MB + CASES_MEMORY_FACTOR * cases_mb + 3 * 8 * n_regions ** 2 / 2 ** 20
+
+
+def available_memory_mb():
+    """Memoria disponible según /proc/meminfo (o la memoria física total)."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 2 ** 20
+
+
+def _run_dataset(job):
+    """
+    Prepara y ejecuta el pipeline de un dataset en un proceso del pool. La
+    salida del proceso (y de sus etapas) va a build/datasets/<name>/run.log.
+    """
+    spec, stage_jobs, force, only = job
+    work = workspace(spec)
+    work.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    with open(work / 'run.log', 'w') as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+    results, error = {}, None
+    try:
+        prepare_workspace(spec)
+        results = pipeline.run_pipeline(only=only, force=force, jobs=stage_jobs,
+                                        state_path=work / 'pipeline_state.json', workdir=work)
+    except Exception:
+        error = traceback.format_exc()
+        print(error)
+    sys.stdout.flush()
+    # ru_maxrss en KB (Linux); las etapas son procesos hijos ya terminados.
+    # RUSAGE_CHILDREN da el pico del hijo más grande, no la suma de las etapas
+    # simultáneas: con stage_jobs > 1 el pico real puede ser mayor
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return {'results': results, 'error': error, 'seconds': time.perf_counter() - t0, 'peak_mb': peak_kb / 1024}
+
+
+def run_datasets(datasets, jobs=None, memory_budget_mb=None, stage_jobs=1, force=False, only=None):
+    """
+    Ejecuta el pipeline de varios datasets a la vez, un proceso por dataset.
+
+    Un dataset entra al pool solo si su memoria estimada cabe en lo que
+    queda del presupuesto; los datasets se admiten en orden, así uno grande
+    no queda relegado por los chicos, y si no cabe ni solo se ejecuta solo.
+    Dentro de cada dataset las etapas corren de a `stage_jobs`, para que el
+    pico de memoria sea el de una etapa.
+
+    Args:
+        datasets: entradas del registro
+        jobs: datasets simultáneos (por defecto, los núcleos disponibles)
+        memory_budget_mb: presupuesto total (por defecto, 80% de la memoria disponible)
+        stage_jobs, force, only: se pasan a pipeline.run_pipeline
+
+    Returns:
+        dict dataset -> {'results', 'error', 'seconds', 'peak_mb', 'estimate_mb'}
+    """
+    budget = memory_budget_mb or 0.8 * available_memory_mb()
+    workers = jobs or os.cpu_count()
+    estimates = {spec['name']: estimate_memory_mb(spec) for spec in datasets}
+    pending, running, summary = list(datasets), {}, {}
+    t_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        while pending or running:
+            in_use = sum(estimates[name] for name in running.values())
+            while pending and len(running) < workers:
+                name = pending[0]['name']
+                if running and in_use + estimates[name] > budget:
+                    break
+                if estimates[name] > budget:
+                    print(f"⚠️ {name}: estimación de {estimates[name]:.0f} MB mayor que el presupuesto, se ejecuta solo")
+                print(f"▶ {name} (~{estimates[name]:.0f} MB)")
+                running[pool.submit(_run_dataset, (pending.pop(0), stage_jobs, force, only))] = name
+                in_use += estimates[name]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                summary[name] = {**future.result(), 'estimate_mb': estimates[name]}
+                state_file = workspace_dir / name / 'dataset_state.json'
+                # Solo cuenta un pico con alguna etapa ejecutada (una corrida con todo en caché
+                # mide casi nada) y nunca baja: es la base de la próxima estimación
+                if any(r['status'] == 'ejecutada' for r in summary[name]['results'].values()):
+                    state = _read_json(state_file, {})
+                    state['peak_mb'] = round(max(state.get('peak_mb') or 0, summary[name]['peak_mb']), 1)
+                    _write_json(state_file, state)
+
+    summary = {spec['name']: summary[spec['name']] for spec in datasets}
+    print_datasets_summary(summary, time.perf_counter() - t_start, budget)
+    return summary
+
+
+def print_datasets_summary(summary, wall_seconds, budget):
+    """Tabla por dataset: etapas por estado, tiempo y pico de memoria frente a la estimación."""
+    statuses = ['ejecutada', 'sin cambios', 'bloqueada', 'omitida', 'error']
+    print(f"\n{'Dataset':<20} {'Ejec.':>5} {'Sin c.':>6} {'Bloq.':>5} {'Omit.':>5} {'Error':>5} "
+          f"{'Tiempo (s)':>10} {'Pico MB':>8} {'Estim. MB':>9}")
+    for name, entry in summary.items():
+        counts = [sum(r['status'] == s for r in entry['results'].values()) for s in statuses]
+        if entry['error']:
+            counts[-1] += 1
+        print(f"{name:<20} {counts[0]:>5} {counts[1]:>6} {counts[2]:>5} {counts[3]:>5} {counts[4]:>5} "
+              f"{entry['seconds']:>10.1f} {entry['peak_mb']:>8.0f} {entry['estimate_mb']:>9.0f}")
+    print(f"Total: {wall_seconds:.1f} s de reloj, presupuesto {budget:.0f} MB; "
+          f"registro de cada dataset en {workspace_dir}/<dataset>/run.log")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pipeline de preprocesamiento para varios datasets')
+    parser.add_argument('datasets', nargs='*', help='datasets a procesar (por defecto, todos)')
+    parser.add_argument('--registry', help='JSON con más entradas del registro')
+    parser.add_argument('--list', action='store_true', help='lista los datasets registrados')
+    parser.add_argument('--jobs', type=int, default=None, help='datasets simultáneos')
+    parser.add_argument('--memory-budget', type=float, default=None, metavar='MB',
+                        help='memoria total para los datasets en curso')
+    parser.add_argument('--stage-jobs', type=int, default=1, help='etapas simultáneas dentro de cada dataset')
+    parser.add_argument('--stages', nargs='+', default=None, help='etapas a ejecutar (más las que necesitan)')
+    parser.add_argument('--force', action='store_true', help='ignora las huellas guardadas')
+    args = parser.parse_args()
+
+    registry = load_registry(args.registry)
+    if args.list:
+        for spec in registry:
+            print(f"{spec['name']:<20} {spec['cases']['path']}  ->  "
+                  f"dashboard_data/datasets/{spec.get('namespace', spec['name'])}")
+        sys.exit(0)
+    unknown = set(args.datasets) - {spec['name'] for spec in registry}
+    if unknown:
+        parser.error(f"datasets desconocidos: {sorted(unknown)}")
+    selected = [spec for spec in registry if not args.datasets or spec['name'] in args.datasets]
+    summary = run_datasets(selected, jobs=args.jobs, memory_budget_mb=args.memory_budget,
+                           stage_jobs=args.stage_jobs, force=args.force, only=args.stages)
+    failed = any(entry['error'] or any(r['status'] == 'error' for r in entry['results'].values())
+                 for entry in summary.values())
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,245 @@
+import pandas as pd
+import numpy as np
+import json
+import struct
+import zlib
+from pathlib import Path
+from scipy.ndimage import gaussian_filter
+
+folder = '../dashboard_data/density'
+
+
+def mercator_y(lat):
+    """Proyección Mercator esférica (la misma que usa d3.geoMercator), en radianes."""
+    return np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+
+
+def inverse_mercator_y(y):
+    return np.degrees(2 * np.arctan(np.exp(y)) - np.pi / 2)
+
+
+def load_polygons(geojson_file='../original_data/nsw_lga_polygon_V5.geojson'):
+    """
+    Lee los polígonos de LGA y los proyecta a Mercator.
+
+    Returns:
+        lga_codes (list), rings (list de listas de np.ndarray (k, 2) en
+        coordenadas (x, y) Mercator), bbox (lon_min, lat_min, lon_max, lat_max)
+    """
+    with open(geojson_file, 'r') as f:
+        geojson = json.load(f)
+
+    lga_codes, rings = [], []
+    lon_min, lat_min, lon_max, lat_max = np.inf, np.inf, -np.inf, -np.inf
+    for feat in geojson['features']:
+        geom = feat['geometry']
+        polys = geom['coordinates'] if geom['type'] == 'MultiPolygon' else [geom['coordinates']]
+        feature_rings = []
+        for poly in polys:
+            for ring in poly:
+                lonlat = np.asarray(ring, dtype=float)
+                lon_min, lat_min = min(lon_min, lonlat[:, 0].min()), min(lat_min, lonlat[:, 1].min())
+                lon_max, lat_max = max(lon_max, lonlat[:, 0].max()), max(lat_max, lonlat[:, 1].max())
+                feature_rings.append(np.column_stack([np.radians(lonlat[:, 0]), mercator_y(lonlat[:, 1])]))
+        lga_codes.append(feat['properties']['lgacode'])
+        rings.append(feature_rings)
+    return lga_codes, rings, (lon_min, lat_min, lon_max, lat_max)
+
+
+def rasterize_polygons(rings, bbox, width=512):
+    """
+    Asigna cada celda de una grilla Mercator regular al polígono que contiene
+    su centro (relleno por filas con la regla par-impar, vectorizado por
+    polígono).
+
+    Args:
+        rings: anillos por polígono (salida de load_polygons)
+        bbox: (lon_min, lat_min, lon_max, lat_max)
+        width: columnas de la grilla; las filas salen de la relación de aspecto
+
+    Returns:
+        labels: np.ndarray (alto, ancho) con el índice del polígono o -1
+        xs, ys: centros de columna y fila en Mercator (fila 0 = norte)
+    """
+    lon_min, lat_min, lon_max, lat_max = bbox
+    x0, x1 = np.radians(lon_min), np.radians(lon_max)
+    y0, y1 = mercator_y(lat_min), mercator_y(lat_max)
+    cell = (x1 - x0) / width
+    height = int(np.ceil((y1 - y0) / cell))
+
+    xs = x0 + (np.arange(width) + 0.5) * cell
+    ys = y1 - (np.arange(height) + 0.5) * cell
+    labels = np.full((height, width), -1, dtype=np.int32)
+
+    for k, feature_rings in enumerate(rings):
+        # Aristas de todos los anillos juntas: la regla par-impar resuelve huecos
+        starts = np.concatenate([r[:-1] for r in feature_rings])
+        ends = np.concatenate([r[1:] for r in feature_rings])
+        ymin, ymax = min(starts[:, 1].min(), ends[:, 1].min()), max(starts[:, 1].max(), ends[:, 1].max())
+
+        rows = np.nonzero((ys >= ymin) & (ys <= ymax))[0]
+        if len(rows) == 0:
+            continue
+        yc = ys[rows][:, None]
+        crosses = (starts[None, :, 1] <= yc) != (ends[None, :, 1] <= yc)        # (filas x aristas)
+        dy = np.where(ends[:, 1] == starts[:, 1], 1.0, ends[:, 1] - starts[:, 1])
+        x_cross = starts[:, 0] + (yc - starts[:, 1]) * (ends[:, 0] - starts[:, 0]) / dy
+
+        for i, row in enumerate(rows):
+            xc = np.sort(x_cross[i][crosses[i]])
+            if len(xc) == 0:
+                continue
+            # Dentro si el número de cruces a la izquierda es impar
+            inside = np.searchsorted(xc, xs) % 2 == 1
+            labels[row, inside] = k
+
+    return labels, xs, ys
+
+
+def monthly_case_matrix(lga_codes, monthly_file='../dashboard_data/map_of_cases_by_lga/covid_monthly_summary_filled.csv'):
+    """
+    Matriz [meses x polígonos] de casos mensuales, alineada con lga_codes.
+
+    Returns:
+        months (list), cases (np.ndarray)
+    """
+    monthly = pd.read_csv(monthly_file, dtype={'lga_code19': str})
+    wide = monthly.pivot_table(index='year_month', columns='lga_code19', values='MonthlyCases',
+                               aggfunc='sum', fill_value=0).sort_index()
+    wide = wide.reindex(columns=lga_codes, fill_value=0)
+    return list(wide.index), wide.to_numpy(dtype=float)
+
+
+def population_vector(lga_codes, census_file='../dashboard_data/common/census_clean.csv'):
+    census = pd.read_csv(census_file, dtype={'lga_code19': str})
+    population = census.set_index('lga_code19')['Population']
+    return population.reindex(lga_codes).fillna(0).to_numpy(dtype=float)
+
+
+def compute_density_frames(labels, cases, population, sigma=3.0):
+    """
+    Reparte los casos y la población de cada LGA de forma uniforme sobre sus
+    celdas, suaviza ambos campos con un kernel gaussiano y devuelve su
+    cociente (incidencia suavizada por 100k habitantes).
+
+    Todos los meses se procesan a la vez: el reparto es una indexación
+    [meses x polígonos] -> [meses x alto x ancho] y el filtro gaussiano se
+    aplica con sigma 0 en el eje temporal.
+
+    Args:
+        labels: grilla de índices de polígono (-1 fuera)
+        cases: np.ndarray [meses x polígonos]
+        population: np.ndarray [polígonos]
+        sigma: desviación del kernel en celdas
+
+    Returns:
+        frames: np.ndarray float32 [meses x alto x ancho] (NaN fuera del estado)
+    """
+    n_polygons = cases.shape[1]
+    inside = labels >= 0
+    cells_per_polygon = np.bincount(labels[inside], minlength=n_polygons).astype(float)
+    cells_per_polygon[cells_per_polygon == 0] = 1
+
+    # Índice -1 -> columna extra con cero
+    safe_labels = np.where(inside, labels, n_polygons)
+    cases_per_cell = np.concatenate([cases / cells_per_polygon, np.zeros((cases.shape[0], 1))], axis=1)
+    pop_per_cell = np.append(population / cells_per_polygon, 0.0)
+
+    case_field = cases_per_cell[:, safe_labels]                    # (meses, alto, ancho)
+    pop_field = pop_per_cell[safe_labels]
+
+    smoothed_cases = gaussian_filter(case_field, sigma=(0, sigma, sigma), mode='constant')
+    smoothed_pop = gaussian_filter(pop_field, sigma=sigma, mode='constant')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frames = np.where(smoothed_pop > 0, smoothed_cases / smoothed_pop * 100_000, 0.0)
+    frames[:, ~inside] = np.nan
+    return frames.astype(np.float32)
+
+
+def quantize(frames, vmax=None):
+    """
+    Cuantiza a uint8 en escala log1p: valor = expm1(q / 255 * log1p(vmax)).
+
+    Returns:
+        q (np.ndarray uint8), vmax (float)
+    """
+    finite = np.nan_to_num(frames, nan=0.0)
+    if vmax is None:
+        vmax = float(finite.max()) or 1.0
+    q = np.round(np.log1p(np.clip(finite, 0, vmax)) / np.log1p(vmax) * 255)
+    return q.astype(np.uint8), vmax
+
+
+def write_png_rgba(filename, rgba):
+    """PNG RGBA de 8 bits sin dependencias (zlib + struct)."""
+    height, width, _ = rgba.shape
+    raw = b''.join(b'\x00' + rgba[row].tobytes() for row in range(height))
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    png = (b'\x89PNG\r\n\x1a\n'
+           + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+           + chunk(b'IDAT', zlib.compress(raw, 9))
+           + chunk(b'IEND', b''))
+    with open(filename, 'wb') as f:
+        f.write(png)
+
+
+def export_density_rasters(out_dir=folder, width=512, sigma=3.0, color=(220, 20, 20)):
+    """
+    Calcula y exporta los rasters mensuales de densidad de casos.
+
+    Genera:
+    - density_<YYYY-MM>.png: superposición RGBA (alfa = valor cuantizado)
+    - density_frames.npz: frames uint8 [meses x alto x ancho] y la grilla
+    - density_meta.json: bbox, meses, escala de cuantización y archivos
+
+    Returns:
+        meta (dict)
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    lga_codes, rings, bbox = load_polygons()
+    labels, xs, ys = rasterize_polygons(rings, bbox, width)
+    months, cases = monthly_case_matrix(lga_codes)
+    population = population_vector(lga_codes)
+
+    frames = compute_density_frames(labels, cases, population, sigma)
+    q, vmax = quantize(frames)
+
+    files = []
+    for month, frame in zip(months, q):
+        rgba = np.zeros(frame.shape + (4,), dtype=np.uint8)
+        rgba[..., :3] = color
+        rgba[..., 3] = frame
+        filename = f'density_{month}.png'
+        write_png_rgba(out_dir / filename, rgba)
+        files.append(filename)
+
+    np.savez_compressed(out_dir / 'density_frames.npz', frames=q, labels=labels, months=np.array(months))
+
+    # Esquinas del raster (bordes de celda) en grados, para ubicarlo con la proyección
+    half = (xs[1] - xs[0]) / 2
+    meta = {
+        'months': months,
+        'files': files,
+        'width': int(labels.shape[1]),
+        'height': int(labels.shape[0]),
+        'bounds': [float(np.degrees(xs[0] - half)), float(inverse_mercator_y(ys[-1] - half)),
+                   float(np.degrees(xs[-1] + half)), float(inverse_mercator_y(ys[0] + half))],
+        'projection': 'mercator',
+        'units': 'casos por 100k (suavizado)',
+        'sigma_cells': sigma,
+        'scale': {'type': 'log1p', 'vmax': vmax},
+    }
+    with open(out_dir / 'density_meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+    print(f"✅ {len(files)} rasters de densidad ({meta['width']}x{meta['height']}) guardados en: {out_dir}")
+    return meta
+
+
+if __name__ == "__main__":
+    export_density_rasters()
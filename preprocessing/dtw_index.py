@@ -0,0 +1,204 @@
+import numpy as np
+import json
+from pathlib import Path
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+
+
+def scale_min_max(matrix):
+    """
+    Escala cada serie a [0, 1], como TimeSeriesScalerMinMax en
+    cluster_and_export. Las series constantes quedan en 0.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    low, high = matrix.min(axis=1, keepdims=True), matrix.max(axis=1, keepdims=True)
+    return (matrix - low) / np.where(high > low, high - low, 1)
+
+
+def envelopes(series, radius):
+    """
+    Envolventes superior e inferior de Keogh: máximo y mínimo en una ventana
+    de ±radius puntos, para todas las series a la vez.
+
+    Returns:
+        upper, lower (np.ndarray con la forma de series)
+    """
+    size = 2 * radius + 1
+    return (maximum_filter1d(series, size, axis=-1, mode='nearest'),
+            minimum_filter1d(series, size, axis=-1, mode='nearest'))
+
+
+def lb_kim(query, series):
+    """Cota inferior LB_Kim (primer y último punto, que DTW siempre alinea)."""
+    return np.sqrt(np.maximum((series[:, 0] - query[0]) ** 2, (series[:, -1] - query[-1]) ** 2))
+
+
+def lb_keogh(query, upper, lower):
+    """
+    Cota inferior LB_Keogh de DTW(query, serie) para todas las series, dadas
+    sus envolventes (mismo radio de banda que el DTW).
+    """
+    above = np.clip(query - upper, 0, None)
+    below = np.clip(lower - query, 0, None)
+    return np.sqrt((above ** 2 + below ** 2).sum(axis=-1))
+
+
+def dtw_batch(query, series, radius):
+    """
+    DTW con banda de Sakoe-Chiba entre una consulta y un lote de series.
+
+    La programación dinámica se recorre por antidiagonales (i + j = k): cada
+    celda depende solo de las dos antidiagonales anteriores, así que cada paso
+    es una operación vectorizada sobre la banda y sobre todo el lote. Costo
+    local al cuadrado y raíz al final, como tslearn.metrics.dtw.
+
+    Args:
+        query: np.ndarray [T], o [B x T] para comparar por pares (fila b
+            contra series[b])
+        series: np.ndarray [B x T]
+        radius: radio de la banda (>= T equivale a DTW sin restricción)
+
+    Returns:
+        np.ndarray [B] de distancias
+    """
+    series = np.atleast_2d(series)
+    batch, t = series.shape
+    radius = min(radius, t)
+    reversed_series = np.ascontiguousarray(series[:, ::-1])
+    # Antidiagonales indexadas por i (0..t); posición 0 = borde de la matriz.
+    # Se rotan tres buffers: fuera del tramo escrito siempre queda inf.
+    prev2, prev1, current = (np.full((batch, t + 3), np.inf) for _ in range(3))
+    prev2[:, 0] = 0.0                    # D[0, 0]
+    for k in range(2, 2 * t + 1):
+        lo, hi = max(1, k - t, (k - radius + 1) // 2), min(t, k - 1, (k + radius) // 2)
+        current[:, [lo - 1, hi + 1, hi + 2]] = np.inf
+        if hi >= lo:
+            # j = k - i recorre la serie hacia atrás: tramo contiguo de la serie invertida
+            cost = query[..., lo - 1:hi] - reversed_series[:, t - k + lo:t - k + hi + 1]
+            cost *= cost
+            best = np.minimum(prev2[:, lo - 1:hi], prev1[:, lo - 1:hi])
+            np.minimum(best, prev1[:, lo:hi + 1], out=best)
+            np.add(cost, best, out=current[:, lo:hi + 1])
+        prev2, prev1, current = prev1, current, prev2
+    return np.sqrt(prev1[:, t])
+
+
+def paa(series, segments):
+    """Aproximación por agregados a trozos: media de `segments` tramos por serie."""
+    series = np.atleast_2d(series)
+    bounds = np.linspace(0, series.shape[1], segments + 1).astype(int)
+    return np.add.reduceat(series, bounds[:-1], axis=1) / np.diff(bounds)
+
+
+class DTWIndex:
+    """
+    Índice de vecinos más cercanos por DTW sobre series escaladas.
+
+    La construcción precalcula las envolventes de Keogh y los resúmenes PAA
+    de todas las series. Las consultas pueden ser:
+    - exactas: cascada LB_Kim -> LB_Keogh (en ambos sentidos) sobre todas
+      las series, y DTW completo solo para los candidatos en orden de cota,
+      por lotes, hasta que la cota supera la k-ésima mejor distancia;
+    - aproximadas: se ordena por DTW sobre los resúmenes PAA y se calcula el
+      DTW completo solo para los `candidates` primeros.
+
+    Todas las distancias usan la banda de Sakoe-Chiba de ancho `radius`
+    (por defecto T // 10, que es lo que hace útiles las envolventes de
+    Keogh): las consultas exactas son exactas para el DTW con banda, no para
+    el DTW sin restricción de cdist_dtw con el que se forman los clusters.
+    radius >= T da el DTW sin banda, con una poda mucho más débil.
+    """
+
+    def __init__(self, series, ids=None, radius=None, paa_segments=None):
+        self.series = np.asarray(series, dtype=float)
+        n, t = self.series.shape
+        self.ids = list(ids) if ids is not None else list(range(n))
+        self.radius = radius if radius is not None else max(1, t // 10)
+        self.upper, self.lower = envelopes(self.series, self.radius)
+        self.paa_segments = paa_segments or max(8, t // 7)
+        self.paa = paa(self.series, self.paa_segments)
+        self.paa_radius = max(1, int(np.ceil(self.radius * self.paa_segments / t)))
+
+    def lower_bounds(self, query):
+        q_upper, q_lower = envelopes(query, self.radius)
+        return np.maximum.reduce([lb_kim(query, self.series),
+                                  lb_keogh(query, self.upper, self.lower),
+                                  lb_keogh(self.series, q_upper, q_lower)])
+
+    def query(self, query, k=10, exact=True, candidates=50, batch_size=None, exclude=None):
+        """
+        Los k vecinos más cercanos de `query` (serie o posición en el índice).
+
+        Returns:
+            ids (list), distancias (np.ndarray), dtw_computed (series para las
+            que se calculó el DTW completo)
+        """
+        if np.isscalar(query):
+            exclude = query if exclude is None else exclude
+            query = self.series[query]
+        mask = np.ones(len(self.series), dtype=bool)
+        if exclude is not None:
+            mask[exclude] = False
+        pool = np.flatnonzero(mask)
+
+        if exact:
+            batch_size = batch_size or 2 * k
+            bounds = self.lower_bounds(query)[pool]
+            order = pool[np.argsort(bounds, kind='stable')]
+            sorted_bounds = np.sort(bounds, kind='stable')
+            best_idx, best_dist = np.empty(0, dtype=int), np.empty(0)
+            computed, start = 0, 0
+            # Lotes que crecen al doble: pocas llamadas si la poda es débil
+            while start < len(order):
+                if len(best_dist) == k and sorted_bounds[start] >= best_dist[-1]:
+                    break
+                batch = order[start:start + batch_size]
+                start += len(batch)
+                batch_size *= 2
+                distances = dtw_batch(query, self.series[batch], self.radius)
+                computed += len(batch)
+                best_idx = np.concatenate([best_idx, batch])
+                best_dist = np.concatenate([best_dist, distances])
+                keep = np.argsort(best_dist, kind='stable')[:k]
+                best_idx, best_dist = best_idx[keep], best_dist[keep]
+        else:
+            coarse = dtw_batch(paa(query, self.paa_segments)[0], self.paa[pool], self.paa_radius)
+            shortlist = pool[np.argsort(coarse, kind='stable')[:max(candidates, k)]]
+            distances = dtw_batch(query, self.series[shortlist], self.radius)
+            keep = np.argsort(distances, kind='stable')[:k]
+            best_idx, best_dist, computed = shortlist[keep], distances[keep], len(shortlist)
+
+        return [self.ids[i] for i in best_idx], best_dist, computed
+
+
+def brute_force_knn(series, query_idx, k, radius):
+    """Referencia: DTW contra todas las series."""
+    distances = dtw_batch(series[query_idx], series, radius)
+    distances[query_idx] = np.inf
+    order = np.argsort(distances, kind='stable')[:k]
+    return order, distances[order]
+
+
+def export_neighbors(matrix, lga_codes, k=10, radius=None,
+                     out_file='../dashboard_data/cluster_time_series/lga_neighbors.json'):
+    """
+    Precalcula los k vecinos DTW de cada LGA para la vista de series
+    temporales ({lga: [[lga_vecina, distancia], ...]}).
+    """
+    index = DTWIndex(scale_min_max(matrix), [str(code) for code in lga_codes], radius)
+    neighbors = {}
+    for i, code in enumerate(index.ids):
+        ids, distances, _ = index.query(i, k)
+        neighbors[code] = [[n, round(float(d), 4)] for n, d in zip(ids, distances)]
+
+    Path(out_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(out_file, 'w') as f:
+        json.dump({'k': k, 'radius': index.radius, 'neighbors': neighbors}, f, separators=(',', ':'))
+    print(f"✅ Vecinos DTW de {len(neighbors)} LGAs guardados en: {out_file}")
+    return neighbors
+
+
+if __name__ == "__main__":
+    from cluster_series2 import process_covid_data
+
+    matrix, lga_codes, dates = process_covid_data()
+    export_neighbors(matrix, lga_codes)
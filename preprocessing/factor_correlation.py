@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+import json
+from pathlib import Path
+
+from cluster_stats import to_full_calendar, rolling_sums
+from incidence_cube import census_file, load_cluster_labels, load_population
+
+out_folder = '../dashboard_data/factor_correlation'
+# Columnas del censo que no son factores: identificadores y las que ya
+# dependen de los casos (correlacionarían consigo mismas)
+EXCLUDED_COLUMNS = ['LGA_code', 'LGA_Name', 'LGA_Name_abbr', 'lga_code19', 'lga_code19_2',
+                    'TotalCases', 'CasesPerPerson', 'CasesPer100k']
+METHODS = ['pearson', 'spearman']
+
+
+def window_incidence(full, population, calendar, window=28, step=7):
+    """
+    Incidencia por 100k de cada LGA en ventanas móviles de `window` días que
+    avanzan de a `step` días.
+
+    Returns:
+        rates (np.ndarray [n_LGA x ventanas]), starts, ends (DatetimeIndex)
+    """
+    sums = rolling_sums(full, window)[:, ::step]
+    ends = calendar[window - 1::step]
+    return sums / population[:, None] * 1e5, ends - pd.Timedelta(days=window - 1), ends
+
+
+def masked_correlation(x, y, min_pairs=5):
+    """
+    Pearson entre cada columna de x [n x a] y cada columna de y [n x b] con
+    solo las filas donde ambos tienen dato (NaN = sin dato), sin recorrer
+    pares: con las máscaras de dato M, las sumas por par (n, Σx, Σy, Σx²,
+    Σy², Σxy) son seis productos de matrices. Las columnas se centran antes
+    para no perder precisión al restar sumas grandes.
+
+    Returns:
+        r (np.ndarray [a x b], NaN si hay menos de min_pairs filas o una de
+        las dos columnas es constante)
+    """
+    mx, my = ~np.isnan(x), ~np.isnan(y)
+    x0, y0 = np.where(mx, x, 0), np.where(my, y, 0)
+    x0 = np.where(mx, x0 - x0.sum(axis=0) / np.maximum(mx.sum(axis=0), 1), 0)
+    y0 = np.where(my, y0 - y0.sum(axis=0) / np.maximum(my.sum(axis=0), 1), 0)
+    mx, my = mx.astype(float), my.astype(float)
+    n = mx.T @ my
+    sx, sy = x0.T @ my, mx.T @ y0
+    sxx, syy = (x0 ** 2).T @ my, mx.T @ (y0 ** 2)
+    sxy = x0.T @ y0
+    var = (n * sxx - sx ** 2) * (n * syy - sy ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (n * sxy - sx * sy) / np.sqrt(var)
+    r[(n < min_pairs) | ~(var > 1e-12 * np.maximum(n * sxx, 1) * np.maximum(n * syy, 1))] = np.nan
+    return np.clip(r, -1, 1)
+
+
+def rank_columns(values):
+    """Rango promedio de cada columna (los NaN quedan NaN), para Spearman."""
+    return pd.DataFrame(values).rank(axis=0).to_numpy()
+
+
+def spearman_correlation(x, y, min_pairs=5):
+    """
+    Spearman entre columnas de x [n x a] y de y [n x b] con filas completas
+    por par, como df.corr('spearman'): x se ordena de nuevo con solo las
+    filas donde el factor tiene dato. Los factores con el mismo patrón de
+    faltantes comparten esos rangos, así que hay un ranking de x por patrón
+    (no por factor).
+    """
+    r = np.full((x.shape[1], y.shape[1]), np.nan)
+    patterns, inverse = np.unique(~np.isnan(y).T, axis=0, return_inverse=True)
+    for p, present in enumerate(patterns):
+        columns = np.flatnonzero(inverse.ravel() == p)
+        x_ranks = rank_columns(np.where(present[:, None], x, np.nan))
+        r[:, columns] = masked_correlation(x_ranks, rank_columns(y[:, columns]), min_pairs)
+    return r
+
+
+def factor_correlation_cube(rates, factors, labels, min_areas=5):
+    """
+    Correlación de la incidencia de cada ventana con cada factor del censo,
+    a través de las LGAs de NSW y de cada cluster.
+
+    Pearson sobre las tasas y Spearman como Pearson sobre rangos, ambos con
+    masked_correlation: una ventana x factor por grupo es un producto de
+    matrices, no una llamada a df.corr(). Los rangos se calculan dentro de
+    cada grupo; con datos faltantes en un factor, se ordenan solo las LGAs
+    que tienen ese factor (ver spearman_correlation).
+
+    Args:
+        rates: np.ndarray [n_LGA x ventanas]
+        factors: np.ndarray [n_LGA x factores] (NaN = sin dato)
+        labels: cluster por LGA (0 = sin cluster, solo cuenta para NSW)
+        min_areas: grupos más chicos quedan en NaN
+
+    Returns:
+        groups (list: 'NSW' y las etiquetas de cluster), n_areas (list),
+        cube (np.ndarray float32 [métodos x grupos x ventanas x factores])
+    """
+    groups = ['NSW'] + sorted(int(c) for c in np.unique(labels) if c != 0)
+    cube = np.full((len(METHODS), len(groups), rates.shape[1], factors.shape[1]), np.nan, dtype=np.float32)
+    n_areas = []
+    for g, group in enumerate(groups):
+        rows = np.ones(len(labels), dtype=bool) if group == 'NSW' else labels == group
+        n_areas.append(int(rows.sum()))
+        if rows.sum() < min_areas:
+            continue
+        x, y = rates[rows], factors[rows]
+        cube[0, g] = masked_correlation(x, y, min_areas)
+        cube[1, g] = spearman_correlation(x, y, min_areas)
+    return groups, n_areas, cube
+
+
+def load_factors(lga_codes, census_file=census_file):
+    """
+    Columnas numéricas del censo (menos EXCLUDED_COLUMNS) alineadas con
+    lga_codes.
+
+    Returns:
+        names (list), values (np.ndarray [n_LGA x factores])
+    """
+    census = pd.read_csv(census_file, dtype={'lga_code19': str}).drop_duplicates('lga_code19')
+    numeric = census.drop(columns=[c for c in EXCLUDED_COLUMNS if c in census.columns])
+    numeric = numeric.select_dtypes(include='number')
+    values = numeric.set_index(census['lga_code19']).reindex(lga_codes)
+    return list(values.columns), values.to_numpy(dtype=float)
+
+
+def export_factor_correlation(matrix, lga_codes, dates, window=28, step=7, min_areas=5, out_dir=out_folder):
+    """
+    Cubo ventana x factor de correlaciones entre incidencia por 100k y censo.
+
+    Genera:
+    - factor_correlation.json: para el tablero, r x 100 redondeado (entero o
+      null) por método y grupo, como lista de ventanas x factores
+    - factor_correlation.npz: el cubo completo en float32
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    full, calendar = to_full_calendar(matrix, dates)
+    lga_codes = [str(code) for code in lga_codes]
+    population = load_population().set_index('lga_code19')['Population'].reindex(lga_codes).to_numpy()
+    # Sin población no hay tasa (p. ej. cuarentena hotelera)
+    known = population > 0
+    lga_codes, full, population = [c for c, k in zip(lga_codes, known) if k], full[known], population[known]
+
+    rates, starts, ends = window_incidence(full, population, calendar, window, step)
+    factor_names, factors = load_factors(lga_codes)
+    groups, n_areas, cube = factor_correlation_cube(rates, factors, load_cluster_labels(lga_codes), min_areas)
+
+    scaled = np.round(cube * 100)
+    compact = {
+        'window_days': window, 'step_days': step, 'scale': 100,
+        'windows': list(starts.strftime('%Y-%m-%d')), 'window_ends': list(ends.strftime('%Y-%m-%d')),
+        'factors': factor_names,
+        'groups': [{'id': str(group), 'n_areas': n} for group, n in zip(groups, n_areas)],
+    }
+    for m, method in enumerate(METHODS):
+        compact[method] = {str(group): [[None if np.isnan(v) else int(v) for v in row] for row in scaled[m, g]]
+                           for g, group in enumerate(groups)}
+    with open(out_dir / 'factor_correlation.json', 'w') as f:
+        json.dump(compact, f, separators=(',', ':'))
+    np.savez_compressed(out_dir / 'factor_correlation.npz', cube=cube, methods=np.array(METHODS),
+                        groups=np.array([str(g) for g in groups]), factors=np.array(factor_names),
+                        window_start=np.array(compact['windows']), window_end=np.array(compact['window_ends']))
+    print(f"✅ Correlaciones de {len(groups)} grupos x {len(starts)} ventanas x {len(factor_names)} factores "
+          f"guardadas en: {out_dir / 'factor_correlation.json'}")
+    return groups, cube
+
+
+if __name__ == "__main__":
+    from cluster_series2 import process_covid_data
+
+    matrix, lga_codes, dates = process_covid_data()
+    export_factor_correlation(matrix, lga_codes, dates)
@@ -1,18 +1,26 @@
 import pandas as pd
 
-folder = '../dashboard_data/grafico_de_barras'
-# Cargar el archivo CSV original
-df = pd.read_csv('census_clean.csv')  # Cambia esto al nombre real del archivo
+folder = '../dashboard_data/bar_chart'
 
-# Filtrar columnas numéricas útiles
-df_numeric = df.select_dtypes(include=['number'])
 
-# Agregamos la columna de nombre del LGA
-df_numeric.insert(0, 'LGA_Name', df['LGA_Name'])
+def main():
+    """Columnas numéricas del censo por LGA para los gráficos de barras."""
+    # Cargar el archivo CSV original
+    df = pd.read_csv('../dashboard_data/common/census_clean.csv')  # Cambia esto al nombre real del archivo
 
-# Guardar un nuevo CSV para usar en D3
-df_numeric.to_csv(f'{folder}/lga_data_clean.csv', index=False)
+    # Filtrar columnas numéricas útiles
+    df_numeric = df.select_dtypes(include=['number'])
 
-# Mostrar columnas numéricas disponibles
-print("Variables disponibles para el gráfico:")
-print(list(df_numeric.columns[1:]))
\ No newline at end of file
+    # Agregamos la columna de nombre del LGA
+    df_numeric.insert(0, 'LGA_Name', df['LGA_Name'])
+
+    # Guardar un nuevo CSV para usar en D3
+    df_numeric.to_csv(f'{folder}/lga_data_clean.csv', index=False)
+
+    # Mostrar columnas numéricas disponibles
+    print("Variables disponibles para el gráfico:")
+    print(list(df_numeric.columns[1:]))
+
+
+if __name__ == "__main__":
+    main()
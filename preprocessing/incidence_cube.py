@@ -0,0 +1,189 @@
+import pandas as pd
+import numpy as np
+import json
+from pathlib import Path
+
+from cluster_stats import to_full_calendar, rolling_sums
+from profiling import current, profiled
+
+folder = '../dashboard_data'
+census_file = f'{folder}/common/census_clean.csv'
+clusters_file = f'{folder}/cluster_time_series/lga_clusters.json'
+covid_file = f'{folder}/common/covid_clean.csv'
+
+
+def name_key(names):
+    """Clave de unión por nombre: 'Albury (C)' y 'Albury(C)' coinciden."""
+    return pd.Series(names, dtype=str).str.replace(r'\s+', '', regex=True).to_numpy()
+
+
+def load_population(census_file=census_file):
+    """
+    Returns:
+        pd.DataFrame con lga_code19 (str), name_key y Population
+    """
+    census = pd.read_csv(census_file, dtype={'lga_code19': str})
+    return pd.DataFrame({'lga_code19': census['lga_code19'], 'name_key': name_key(census['LGA_Name']),
+                         'Population': census['Population'].astype(float)})
+
+
+def load_cluster_labels(lga_codes, clusters_file=clusters_file):
+    """Cluster de cada LGA (0 si no tiene cluster asignado)."""
+    with open(clusters_file, 'r') as f:
+        cluster_map = json.load(f)
+    return np.array([cluster_map.get(str(code), 0) for code in lga_codes])
+
+
+def compute_rate_cube(counts, population, labels, windows=None):
+    """
+    Cubo de conteos e incidencia por 100k para LGAs, clusters y el estado.
+
+    Los agregados se obtienen con una matriz indicadora [grupos x LGAs]:
+    casos y población de cada cluster (y del estado) son un producto de
+    matrices, y la tasa de un grupo es casos del grupo / población del
+    grupo (no el promedio de las tasas).
+
+    Las filas sin población (p. ej. cuarentena hotelera) suman casos al
+    estado, pero su propia tasa queda en NaN.
+
+    Args:
+        counts: np.ndarray [n_LGA x periodos] de casos nuevos
+        population: np.ndarray [n_LGA] (0 o NaN si no se conoce)
+        labels: cluster por LGA (0 = sin cluster)
+        windows: dict sufijo -> periodos de la suma móvil, p. ej.
+            {'7d': 7, '14d': 14} para datos diarios
+
+    Returns:
+        levels (list, 'lga' | 'cluster' | 'state' por fila),
+        group_ids (list de etiquetas de cluster y 'NSW'),
+        cube (np.ndarray [filas x periodos x métricas]), metrics (list)
+    """
+    windows = windows or {}
+    counts = np.asarray(counts, dtype=float)
+    population = np.nan_to_num(np.asarray(population, dtype=float))
+    labels = np.asarray(labels)
+
+    clusters = [c for c in np.unique(labels) if c != 0]
+    indicator = np.vstack([labels == c for c in clusters] + [np.ones(len(labels), dtype=bool)]).astype(float)
+
+    all_counts = np.vstack([counts, indicator @ counts])
+    all_population = np.concatenate([population, indicator @ population])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.where(all_population > 0, 100_000 / all_population, np.nan)[:, None]
+
+    cumulative = np.cumsum(all_counts, axis=1)
+    layers = {'cases': all_counts, 'per100k': all_counts * scale,
+              'cumulative': cumulative, 'cumulative_per100k': cumulative * scale}
+    for suffix, w in windows.items():
+        # Los primeros w-1 periodos no tienen ventana completa
+        rolled = np.full_like(all_counts, np.nan)
+        rolled[:, w - 1:] = rolling_sums(all_counts, w)
+        layers[f'cases_{suffix}'] = rolled
+        layers[f'per100k_{suffix}'] = rolled * scale
+
+    levels = ['lga'] * len(labels) + ['cluster'] * len(clusters) + ['state']
+    group_ids = [str(c) for c in clusters] + ['NSW']
+    return levels, group_ids, np.stack(list(layers.values()), axis=-1), list(layers)
+
+
+def cube_to_frame(ids, levels, periods, cube, metrics, period_name='period'):
+    """Cubo [filas x periodos x métricas] -> tabla larga, una fila por (id, periodo)."""
+    n_rows, n_periods, _ = cube.shape
+    frame = pd.DataFrame(cube.reshape(n_rows * n_periods, -1), columns=metrics)
+    frame.insert(0, period_name, np.tile(np.asarray(periods), n_rows))
+    frame.insert(0, 'id', np.repeat(np.asarray(ids, dtype=object), n_periods))
+    frame.insert(0, 'level', np.repeat(np.asarray(levels, dtype=object), n_periods))
+    counts = [m for m in metrics if not m.startswith('per100k') and not m.endswith('per100k')]
+    frame[counts] = frame[counts].round().astype('Int64')
+    rates = [m for m in metrics if m not in counts]
+    frame[rates] = frame[rates].round(3)
+    return frame
+
+
+@profiled()
+def export_monthly_rates(monthly_file=f'{folder}/map_of_cases_by_lga/covid_monthly_summary_filled.csv',
+                         out_file=f'{folder}/map_of_cases_by_lga/covid_monthly_rates.csv'):
+    """Tasas mensuales por 100k (y acumuladas) junto al CSV de conteos mensuales."""
+    monthly = pd.read_csv(monthly_file, dtype={'lga_code19': str})
+    current().read(monthly_file, len(monthly))
+    wide = monthly.pivot_table(index='lga_code19', columns='year_month', values='MonthlyCases',
+                               aggfunc='sum', fill_value=0).sort_index(axis=1)
+    lga_codes = list(wide.index)
+
+    population = load_population().set_index('lga_code19')['Population'].reindex(lga_codes)
+    levels, group_ids, cube, metrics = compute_rate_cube(wide.to_numpy(), population.to_numpy(),
+                                                         load_cluster_labels(lga_codes))
+    frame = cube_to_frame(lga_codes + group_ids, levels, wide.columns, cube, metrics, 'year_month')
+    frame.to_csv(out_file, index=False)
+    current().wrote(out_file, len(frame))
+    print(f"✅ Tasas mensuales guardadas en: {out_file}")
+    return frame
+
+
+@profiled()
+def export_weekly_rates(weekly_file=f'{folder}/time_series/weekly_cases.csv',
+                        out_file=f'{folder}/time_series/weekly_rates.csv'):
+    """
+    Tasas semanales por 100k junto a weekly_cases.csv. La tasa semanal ya es
+    la de 7 días; se agrega la móvil de 14 días (2 semanas). Las filas de
+    LGA conservan el nombre (lga_name19) como id, igual que weekly_cases.csv.
+    """
+    weekly = pd.read_csv(weekly_file)
+    current().read(weekly_file, len(weekly))
+    weekly = weekly[weekly['lga_name19'].notna() & (weekly['lga_name19'] != 'All NSW')]
+    # Las semanas que cruzan dos trimestres aparecen dos veces
+    wide = weekly.pivot_table(index='lga_name19', columns='week', values='cases',
+                              aggfunc='sum', fill_value=0).sort_index(axis=1)
+    names = list(wide.index)
+
+    census = load_population().set_index('name_key')
+    codes = census['lga_code19'].reindex(name_key(names))
+    population = census['Population'].reindex(name_key(names))
+    levels, group_ids, cube, metrics = compute_rate_cube(wide.to_numpy(), population.to_numpy(),
+                                                         load_cluster_labels(codes.fillna('')),
+                                                         windows={'14d': 2})
+    frame = cube_to_frame(names + group_ids, levels, wide.columns, cube, metrics, 'week')
+    frame.to_csv(out_file, index=False)
+    current().wrote(out_file, len(frame))
+    print(f"✅ Tasas semanales guardadas en: {out_file}")
+    return frame
+
+
+@profiled()
+def export_daily_rates(matrix, lga_codes, dates, out_dir=f'{folder}/cluster_time_series'):
+    """
+    Cubo diario (calendario completo) con tasas diarias y móviles de 7 y 14
+    días, a partir de la matriz de process_covid_data.
+
+    Genera daily_rates.csv (tabla larga) y daily_rates.npz (cubo
+    [filas x días x métricas] con ids, niveles, fechas y métricas).
+    """
+    out_dir = Path(out_dir)
+    full, calendar = to_full_calendar(matrix, dates)
+    lga_codes = [str(code) for code in lga_codes]
+
+    population = load_population().set_index('lga_code19')['Population'].reindex(lga_codes)
+    levels, group_ids, cube, metrics = compute_rate_cube(full, population.to_numpy(),
+                                                         load_cluster_labels(lga_codes),
+                                                         windows={'7d': 7, '14d': 14})
+    ids = lga_codes + group_ids
+    days = calendar.strftime('%Y-%m-%d')
+    frame = cube_to_frame(ids, levels, days, cube, metrics, 'date')
+    frame.to_csv(out_dir / 'daily_rates.csv', index=False)
+    np.savez_compressed(out_dir / 'daily_rates.npz', cube=cube.astype(np.float32), ids=np.array(ids),
+                        levels=np.array(levels), dates=np.array(days), metrics=np.array(metrics))
+    current().wrote(out_dir / 'daily_rates.csv', len(frame))
+    current().wrote(out_dir / 'daily_rates.npz')
+    print(f"✅ Tasas diarias guardadas en: {out_dir / 'daily_rates.csv'}")
+
+
+if __name__ == "__main__":
+    export_monthly_rates()
+    export_weekly_rates()
+
+    # La matriz diaria necesita los datos originales de casos
+    if Path(covid_file).is_file():
+        from cluster_series2 import process_covid_data
+
+        matrix, lga_codes, dates = process_covid_data()
+        export_daily_rates(matrix, lga_codes, dates)
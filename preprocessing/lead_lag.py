@@ -0,0 +1,122 @@
+import numpy as np
+import json
+from pathlib import Path
+from scipy import fft
+
+from cluster_stats import to_full_calendar
+from incidence_cube import load_cluster_labels
+from rt_estimation import aggregate_by_cluster
+
+out_folder = '../dashboard_data/lead_lag'
+
+
+def normalize_rows(matrix, log=True):
+    """
+    z-score por fila (opcionalmente sobre log1p de los casos, para que los
+    picos grandes no dominen la correlación). Las filas constantes quedan
+    en cero.
+    """
+    values = np.log1p(matrix) if log else np.asarray(matrix, dtype=float)
+    std = values.std(axis=1, keepdims=True)
+    return (values - values.mean(axis=1, keepdims=True)) / np.where(std > 0, std, 1)
+
+
+def cross_correlation(z, max_lag=28, block_size=None, memory_mb=256):
+    """
+    Correlación cruzada de todos los pares de series para lags en
+    [-max_lag, max_lag], con FFT por bloques de filas.
+
+    Se calcula una rfft por serie y, por bloque de filas i, el producto
+    conj(F_i) · F_j contra todas las series j a la vez; una irfft devuelve
+    todos los lags. Basta rellenar a T + max_lag (no a 2T) para que los lags
+    pedidos no se mezclen con el solapamiento circular. El costo es
+    O(N² T log T) en lugar de O(N² L T), y la memoria se acota con
+    block_size (o memory_mb).
+
+    Convención: cc[i, j, max_lag + l] = Σ_t z_i(t) z_j(t + l) / T, así que un
+    pico en l > 0 significa que i se adelanta l días a j.
+
+    Args:
+        z: np.ndarray [N x T] normalizado por fila
+        max_lag: lag máximo en días
+
+    Returns:
+        best_lag (np.ndarray int [N x N]), peak (np.ndarray [N x N]) con la
+        correlación máxima en el rango de lags
+    """
+    n, t = z.shape
+    n_fft = fft.next_fast_len(t + max_lag, real=True)
+    spectra = fft.rfft(z.astype(np.float32), n=n_fft, axis=1, workers=-1)
+    if block_size is None:
+        block_size = max(1, int(memory_mb * 2 ** 20 / (n * n_fft * 8)))
+
+    lags = np.arange(-max_lag, max_lag + 1)
+    best_lag = np.zeros((n, n), dtype=np.int16)
+    peak = np.zeros((n, n), dtype=np.float32)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        # irfft(conj(F_i) F_j)[l] = Σ_t z_i(t) z_j(t + l); lags negativos al final
+        cc = fft.irfft(np.conj(spectra[start:stop, None, :]) * spectra[None, :, :], n=n_fft, axis=2, workers=-1)
+        cc = cc[:, :, lags % n_fft] / t
+        idx = cc.argmax(axis=2)
+        best_lag[start:stop] = lags[idx]
+        peak[start:stop] = np.take_along_axis(cc, idx[:, :, None], axis=2)[:, :, 0]
+    return best_lag, peak
+
+
+def lead_edges(ids, best_lag, peak, top_k=5, min_lag=1, min_corr=0.3):
+    """
+    Para cada serie, las top_k series a las que se adelanta (lag >= min_lag)
+    ordenadas por correlación.
+
+    Returns:
+        dict id -> lista de [id_seguidor, lag, correlación]
+    """
+    edges = {}
+    for i, source in enumerate(ids):
+        candidates = np.flatnonzero((best_lag[i] >= min_lag) & (peak[i] >= min_corr))
+        order = candidates[np.argsort(-peak[i, candidates])][:top_k]
+        edges[str(source)] = [[str(ids[j]), int(best_lag[i, j]), round(float(peak[i, j]), 3)] for j in order]
+    return edges
+
+
+def export_lead_lag(matrix, lga_codes, dates, max_lag=28, top_k=5, min_corr=0.3, out_dir=out_folder):
+    """
+    Calcula las relaciones de adelanto/retraso entre LGAs y entre clusters.
+
+    Genera:
+    - lead_lag_edges.json: {'max_lag', 'lgas': {lga: [[seguidora, lag, r], ...]},
+      'clusters': {...}, 'lga_clusters': {lga: cluster}}
+    - lead_lag_matrix.npz: lag y correlación pico de todos los pares de LGAs
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    full, _ = to_full_calendar(matrix, dates)
+    lga_codes = [str(code) for code in lga_codes]
+    labels = load_cluster_labels(lga_codes)
+
+    best_lag, peak = cross_correlation(normalize_rows(full), max_lag)
+    cluster_ids, cluster_series = aggregate_by_cluster(full, labels)
+    cluster_lag, cluster_peak = cross_correlation(normalize_rows(cluster_series), max_lag)
+
+    edges = {
+        'max_lag': max_lag,
+        'lgas': lead_edges(lga_codes, best_lag, peak, top_k, min_corr=min_corr),
+        'clusters': lead_edges(cluster_ids, cluster_lag, cluster_peak, top_k, min_corr=min_corr),
+        'lga_clusters': {code: int(c) for code, c in zip(lga_codes, labels)},
+    }
+    with open(out_dir / 'lead_lag_edges.json', 'w') as f:
+        json.dump(edges, f, separators=(',', ':'))
+    np.savez_compressed(out_dir / 'lead_lag_matrix.npz', lga_codes=np.array(lga_codes),
+                        best_lag=best_lag, peak=peak)
+    n_edges = sum(len(e) for e in edges['lgas'].values())
+    print(f"✅ {n_edges} relaciones de adelanto entre LGAs guardadas en: {out_dir / 'lead_lag_edges.json'}")
+    return edges
+
+
+if __name__ == "__main__":
+    from cluster_series2 import process_covid_data
+
+    matrix, lga_codes, dates = process_covid_data()
+    export_lead_lag(matrix, lga_codes, dates)
@@ -0,0 +1,160 @@
+import numpy as np
+import time
+import warnings
+from scipy.cluster.hierarchy import linkage, fcluster
+from scipy.special import comb
+
+from dtw_index import dtw_batch, paa
+from pairwise import pairwise_distances, square
+
+
+def dtw_distance_matrix(series, radius, n_jobs=1):
+    """
+    Matriz de distancias DTW (banda de Sakoe-Chiba; sin banda si radius es
+    None, como cdist_dtw) entre todas las series, por bloques de pares (ver
+    pairwise.py), en n_jobs procesos.
+    """
+    return square(pairwise_distances(series, 'dtw', n_jobs=n_jobs, radius=radius))
+
+
+def hierarchical_labels(distances, n_clusters):
+    """
+    Mismo criterio que cluster_and_export: linkage 'average' con la matriz de
+    distancias completa (cada fila como observación) y maxclust.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return fcluster(linkage(distances, method='average'), n_clusters, criterion='maxclust')
+
+
+def medoids(distances, labels):
+    """Índice del medoide de cada cluster (menor suma de distancias a su cluster)."""
+    result = {}
+    for c in np.unique(labels):
+        members = np.flatnonzero(labels == c)
+        result[c] = members[distances[np.ix_(members, members)].sum(axis=1).argmin()]
+    return result
+
+
+def adjusted_rand_index(a, b):
+    """Índice de Rand ajustado entre dos particiones (1 = idénticas, ~0 = al azar)."""
+    _, a = np.unique(a, return_inverse=True)
+    _, b = np.unique(b, return_inverse=True)
+    table = np.zeros((a.max() + 1, b.max() + 1))
+    np.add.at(table, (a, b), 1)
+    pairs = comb(table, 2).sum()
+    rows, cols = comb(table.sum(axis=1), 2).sum(), comb(table.sum(axis=0), 2).sum()
+    expected = rows * cols / comb(len(a), 2)
+    maximum = (rows + cols) / 2
+    return 1.0 if maximum == expected else (pairs - expected) / (maximum - expected)
+
+
+def multires_labels(series, n_clusters=4, segment_days=7, radius=None, margin=0.15,
+                    representatives=3, return_info=False):
+    """
+    Clustering de grueso a fino.
+
+    1. Cada serie se resume con PAA en tramos de `segment_days` días y se
+       agrupa con DTW + linkage 'average' sobre los resúmenes (≈ segment_days²
+       veces menos celdas de DTW por par que a resolución diaria).
+    2. Se marcan como inciertas las series cuyo medoide más cercano (a
+       resolución gruesa) no es el de su cluster, o cuya distancia al segundo
+       medoide es menos de (1 + margin) veces la del primero.
+    3. Solo las inciertas se reasignan con DTW diario contra los
+       `representatives` miembros más centrales de cada cluster.
+
+    Args:
+        series: np.ndarray [N x T] escalado (como en cluster_and_export)
+        n_clusters: número de clusters
+        segment_days: días por tramo de PAA
+        radius: radio de banda a resolución diaria (por defecto T // 10)
+        margin: margen relativo para considerar segura una asignación
+        representatives: miembros por cluster contra los que se refina
+
+    Returns:
+        labels (np.ndarray, 1..n_clusters) y, si return_info, un dict con
+        tiempos y cantidad de series refinadas
+    """
+    series = np.asarray(series, dtype=float)
+    n, t = series.shape
+    radius = radius if radius is not None else max(1, t // 10)
+    segments = max(2, int(np.ceil(t / segment_days)))
+    coarse_radius = max(1, int(np.ceil(radius * segments / t)))
+
+    t0 = time.perf_counter()
+    coarse = paa(series, segments)
+    distances = dtw_distance_matrix(coarse, coarse_radius)
+    labels = hierarchical_labels(distances, n_clusters)
+    coarse_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    centers = medoids(distances, labels)
+    clusters = sorted(centers)
+    to_medoids = distances[:, [centers[c] for c in clusters]]
+    ordered = np.sort(to_medoids, axis=1)
+    nearest = np.array(clusters)[to_medoids.argmin(axis=1)]
+    second = ordered[:, 1] if len(clusters) > 1 else np.full(n, np.inf)
+    uncertain = np.flatnonzero((nearest != labels) | (second < (1 + margin) * ordered[:, 0]))
+
+    # Representantes: los miembros más cercanos al medoide de cada cluster
+    reps = {}
+    for c in clusters:
+        members = np.flatnonzero(labels == c)
+        reps[c] = members[np.argsort(distances[centers[c], members])[:representatives]]
+
+    rep_index = np.concatenate([reps[c] for c in clusters])
+    rep_cluster = np.concatenate([np.full(len(reps[c]), k) for k, c in enumerate(clusters)])
+    refined = labels.copy()
+    for i in uncertain:
+        # Un solo lote de DTW contra los representantes de todos los clusters
+        scores = np.bincount(rep_cluster, weights=dtw_batch(series[i], series[rep_index], radius))
+        refined[i] = clusters[int(np.argmin(scores / np.bincount(rep_cluster)))]
+    refine_time = time.perf_counter() - t0
+
+    if not return_info:
+        return refined
+    return refined, {
+        'segments': segments,
+        'coarse_seconds': coarse_time,
+        'refine_seconds': refine_time,
+        'uncertain': len(uncertain),
+        'changed': int((refined != labels).sum()),
+    }
+
+
+def compare_with_full_resolution(series, n_clusters=4, radius=None, **kwargs):
+    """
+    Ejecuta el modo multirresolución y el clustering completo a resolución
+    diaria, e informa tiempos y concordancia (ARI y fracción de series con la
+    misma etiqueta tras alinear clusters por mayoría).
+
+    La referencia es la que publica cluster_and_export('hierarchical'): DTW
+    sin banda (como cdist_dtw) y linkage 'average'; `radius` solo se usa en
+    el modo multirresolución.
+
+    Returns:
+        dict con labels_multires, labels_full, ari, agreement, tiempos e info
+    """
+    series = np.asarray(series, dtype=float)
+    radius = radius if radius is not None else max(1, series.shape[1] // 10)
+
+    t0 = time.perf_counter()
+    labels, info = multires_labels(series, n_clusters, radius=radius, return_info=True, **kwargs)
+    multires_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    full = hierarchical_labels(dtw_distance_matrix(series, None), n_clusters)
+    full_time = time.perf_counter() - t0
+
+    # Alinear etiquetas: cada cluster multirresolución al cluster completo mayoritario
+    mapping = {c: np.bincount(full[labels == c]).argmax() for c in np.unique(labels)}
+    agreement = float(np.mean([mapping[c] == f for c, f in zip(labels, full)]))
+    return {
+        'labels_multires': labels,
+        'labels_full': full,
+        'ari': adjusted_rand_index(labels, full),
+        'agreement': agreement,
+        'multires_seconds': multires_time,
+        'full_seconds': full_time,
+        **info,
+    }
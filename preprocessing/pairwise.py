@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import numpy as np
+from scipy.spatial.distance import cdist
+
+from dtw_index import dtw_batch
+
+# Distancias entre todos los pares repartidas en bloques (tiles) del
+# triángulo superior. La matriz de entrada se copia una sola vez a memoria
+# compartida y cada proceso del pool la lee sin copiarla; cada bloque se
+# escribe directamente en su tramo del vector condensado de salida (el
+# formato de scipy pdist/squareform), que puede ser memoria compartida o un
+# archivo np.memmap. Con archivo, los bloques terminados se anotan en
+# <salida>.tiles y una ejecución interrumpida continúa donde quedó.
+
+
+def euclidean_tile(rows, cols):
+    return cdist(rows, cols)
+
+
+def dtw_tile(rows, cols, radius=None):
+    """
+    DTW (banda de Sakoe-Chiba, sin banda si radius es None) de todos los
+    pares del bloque en una sola programación dinámica por lotes: con
+    a x b pares por paso, el costo por paso de Python se reparte mejor que
+    fila por fila.
+    """
+    radius = rows.shape[1] if radius is None else radius
+    queries = np.repeat(rows, len(cols), axis=0)
+    series = np.tile(cols, (len(rows), 1))
+    return dtw_batch(queries, series, radius).reshape(len(rows), len(cols))
+
+
+def dtw_upper_tile(rows, radius=None):
+    """Bloque de la diagonal: solo los pares i < j (el resto queda en 0)."""
+    radius = rows.shape[1] if radius is None else radius
+    i, j = np.triu_indices(len(rows), 1)
+    block = np.zeros((len(rows), len(rows)))
+    block[i, j] = dtw_batch(rows[i], rows[j], radius)
+    return block
+
+
+# Métricas por nombre; también se acepta cualquier función de módulo
+# f(filas [a x d], columnas [b x d], **opciones) -> [a x b]
+METRICS = {'euclidean': euclidean_tile, 'dtw': dtw_tile}
+# Variantes para los bloques de la diagonal que calculan solo el triángulo
+# superior, f(filas [a x d], **opciones) -> [a x a]; vale la pena cuando cada
+# par es caro (DTW), no con cdist
+UPPER_TILES = {dtw_tile: dtw_upper_tile}
+# Bloques chicos para DTW: con 16 x 16 pares por lote los buffers de la
+# programación dinámica caben en caché (200 series de 365 días, radius 36:
+# 5.8 s, contra 7.1 s fila por fila y 8.9 s con bloques de 32); en la
+# diagonal solo se calculan los pares i < j
+TILE_SIZES = {'euclidean': 256, 'dtw': 16}
+
+_worker = {}
+
+
+def condensed_index(n, i, j):
+    """Posición del par (i, j), i < j, en el vector condensado de n elementos."""
+    return n * i - i * (i + 1) // 2 + (j - i - 1)
+
+
+def upper_tiles(n, tile_size):
+    """Bloques (fila_ini, fila_fin, col_ini, col_fin) del triángulo superior, diagonal incluida."""
+    starts = range(0, n, tile_size)
+    return [(r, min(r + tile_size, n), c, min(c + tile_size, n)) for r in starts for c in starts if c >= r]
+
+
+def _attach(input_name, shape, dtype, out_name, out_file, n_pairs, out_dtype):
+    """Inicializador de cada proceso: abre la entrada compartida y la salida."""
+    _worker['input_shm'] = SharedMemory(name=input_name)
+    _worker['input'] = np.ndarray(shape, dtype=dtype, buffer=_worker['input_shm'].buf)
+    if out_file:
+        _worker['out'] = np.memmap(out_file, dtype=out_dtype, mode='r+', shape=(n_pairs,))
+    else:
+        _worker['out_shm'] = SharedMemory(name=out_name)
+        _worker['out'] = np.ndarray((n_pairs,), dtype=out_dtype, buffer=_worker['out_shm'].buf)
+
+
+def _compute_tile(task):
+    """Calcula un bloque y copia cada fila a su tramo contiguo del vector condensado."""
+    tile_id, (r0, r1, c0, c1), metric, options = task
+    data, out = _worker['input'], _worker['out']
+    n = len(data)
+    if r0 == c0 and metric in UPPER_TILES:
+        block = UPPER_TILES[metric](data[r0:r1], **options)
+    else:
+        block = metric(data[r0:r1], data[c0:c1], **options)
+    for i in range(r0, r1):
+        first = max(c0, i + 1)
+        if first < c1:
+            start = condensed_index(n, i, first)
+            out[start:start + c1 - first] = block[i - r0, first - c0:]
+    if isinstance(out, np.memmap):
+        out.flush()
+    return tile_id
+
+
+def _metric_name(metric):
+    return metric if isinstance(metric, str) else f'{metric.__module__}.{metric.__qualname__}'
+
+
+def _resume_state(out_file, meta):
+    """
+    Bloques ya terminados de una ejecución anterior con la misma entrada,
+    métrica y tamaño de bloque; si no coincide, la salida se crea de nuevo.
+    """
+    meta_file, tiles_file = Path(f'{out_file}.json'), Path(f'{out_file}.tiles')
+    if Path(out_file).is_file() and meta_file.is_file() and tiles_file.is_file():
+        with open(meta_file, 'r') as f:
+            if json.load(f) == meta:
+                return {int(line) for line in tiles_file.read_text().split()}
+    np.memmap(out_file, dtype=meta['dtype'], mode='w+', shape=(meta['n'] * (meta['n'] - 1) // 2,)).flush()
+    with open(meta_file, 'w') as f:
+        json.dump(meta, f, indent=2)
+    tiles_file.write_text('')
+    return set()
+
+
+def pairwise_distances(data, metric='euclidean', n_jobs=1, tile_size=None, out_file=None, dtype=np.float64,
+                       **options):
+    """
+    Distancias entre todas las filas de `data`, en formato condensado.
+
+    Los bloques del triángulo superior (tile_size x tile_size) se reparten
+    en un pool de n_jobs procesos que comparten la entrada y escriben en la
+    misma salida; con n_jobs=1 se calculan en este proceso, igual por
+    bloques.
+
+    Args:
+        data: np.ndarray [n x d] (series o atributos por fila)
+        metric: nombre en METRICS o función de módulo (ver arriba)
+        n_jobs: procesos del pool
+        tile_size: lado de los bloques (por defecto, TILE_SIZES o 64)
+        out_file: si se da, la salida es un np.memmap en ese archivo y la
+            ejecución se puede retomar (ver _resume_state)
+        dtype: tipo de la salida (float32 la reduce a la mitad)
+        options: parámetros de la métrica (p. ej. radius para 'dtw')
+
+    Returns:
+        np.ndarray [n (n - 1) / 2] (np.memmap si hay out_file), como pdist
+    """
+    data = np.ascontiguousarray(data, dtype=float)
+    n = len(data)
+    n_pairs = n * (n - 1) // 2
+    func = METRICS[metric] if isinstance(metric, str) else metric
+    tile_size = tile_size or TILE_SIZES.get(metric, 64)
+    tiles = upper_tiles(n, tile_size)
+
+    done, log = set(), None
+    if out_file:
+        meta = {'n': n, 'shape': list(data.shape), 'tile_size': tile_size, 'metric': _metric_name(metric),
+                'options': options, 'dtype': np.dtype(dtype).name,
+                'input_sha256': hashlib.sha256(data.tobytes()).hexdigest()}
+        done = _resume_state(out_file, meta)
+        log = open(f'{out_file}.tiles', 'a')
+        if done:
+            print(f"Retomando {out_file}: {len(done)} de {len(tiles)} bloques ya calculados")
+    pending = [(k, tile, func, options) for k, tile in enumerate(tiles) if k not in done]
+
+    input_shm = out_shm = None
+    try:
+        if n_jobs <= 1:
+            _worker['input'] = data
+            _worker['out'] = (np.memmap(out_file, dtype=dtype, mode='r+', shape=(n_pairs,)) if out_file
+                              else np.zeros(n_pairs, dtype=dtype))
+            for task in pending:
+                tile_id = _compute_tile(task)
+                if log:
+                    log.write(f'{tile_id}\n')
+                    log.flush()
+            result = _worker['out']
+        else:
+            input_shm = SharedMemory(create=True, size=max(data.nbytes, 1))
+            np.ndarray(data.shape, dtype=data.dtype, buffer=input_shm.buf)[:] = data
+            if not out_file:
+                out_shm = SharedMemory(create=True, size=max(n_pairs * np.dtype(dtype).itemsize, 1))
+                np.ndarray((n_pairs,), dtype=dtype, buffer=out_shm.buf)[:] = 0
+            initargs = (input_shm.name, data.shape, data.dtype, out_shm.name if out_shm else None, out_file,
+                        n_pairs, dtype)
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_attach, initargs=initargs) as pool:
+                for future in as_completed([pool.submit(_compute_tile, task) for task in pending]):
+                    tile_id = future.result()
+                    if log:
+                        log.write(f'{tile_id}\n')
+                        log.flush()
+            if out_file:
+                result = np.memmap(out_file, dtype=dtype, mode='r', shape=(n_pairs,))
+            else:
+                result = np.ndarray((n_pairs,), dtype=dtype, buffer=out_shm.buf).copy()
+    finally:
+        _worker.clear()
+        if log:
+            log.close()
+        for shm in (input_shm, out_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+    return result
+
+
+def square(condensed):
+    """Matriz cuadrada simétrica a partir del vector condensado (como squareform)."""
+    condensed = np.asarray(condensed)
+    n = int(round((1 + np.sqrt(1 + 8 * len(condensed))) / 2))
+    matrix = np.zeros((n, n), dtype=condensed.dtype)
+    matrix[np.triu_indices(n, 1)] = condensed
+    return matrix + matrix.T
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Distancias entre todos los pares por bloques en un pool')
+    parser.add_argument('input', help='.npy con la matriz [n x d]')
+    parser.add_argument('out_file', help='vector condensado de salida (np.memmap); se retoma si existe')
+    parser.add_argument('--metric', choices=list(METRICS), default='euclidean')
+    parser.add_argument('--radius', type=int, default=None, help='banda de Sakoe-Chiba para dtw')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--tile-size', type=int, default=None)
+    parser.add_argument('--float32', action='store_true')
+    args = parser.parse_args()
+
+    data = np.load(args.input)
+    options = {'radius': args.radius} if args.metric == 'dtw' else {}
+    t0 = time.perf_counter()
+    pairwise_distances(data, args.metric, args.jobs, args.tile_size, args.out_file,
+                       np.float32 if args.float32 else np.float64, **options)
+    print(f"✅ {len(data) * (len(data) - 1) // 2:,} distancias ({args.metric}) en {time.perf_counter() - t0:.1f} s "
+          f"guardadas en: {args.out_file}")
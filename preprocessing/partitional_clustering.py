@@ -0,0 +1,296 @@
+import numpy as np
+import time
+from concurrent.futures import ProcessPoolExecutor
+from scipy import fft
+from scipy.linalg import eigh
+
+from dtw_index import dtw_batch
+
+# Series por llamada a dtw_path_sums: la banda guardada ocupa
+# (2T+1) x PATH_CHUNK x (radius+2) float32 (~50 MB con T=675 y radius=67)
+PATH_CHUNK = 128
+# Mini-lotes: se para tras estas iteraciones seguidas sin cambios de
+# etiqueta en las series del lote que ya se habían asignado antes
+STABLE_BATCHES = 3
+
+
+def dtw_path_sums(centroid, series, radius):
+    """
+    DTW con banda entre un centroide y un lote de series, recuperando el
+    camino de alineamiento para DBA (DTW Barycenter Averaging).
+
+    La programación dinámica va por antidiagonales como dtw_batch, pero
+    guarda la banda de cada antidiagonal para luego recorrer hacia atrás los
+    caminos de todo el lote a la vez.
+
+    Returns:
+        distances [B], sums [T] y counts [T]: para cada punto del centroide,
+        la suma de los valores de las series alineados con él y cuántos son
+    """
+    series = np.atleast_2d(series)
+    batch, t = series.shape
+    radius = min(radius, t)
+    width = radius + 2
+    rows = np.arange(batch)
+    reversed_series = np.ascontiguousarray(series[:, ::-1])
+
+    band = np.full((2 * t + 1, batch, width), np.inf, dtype=np.float32)
+    lo_of = np.zeros(2 * t + 1, dtype=int)
+    hi_of = np.full(2 * t + 1, -1)
+    prev2, prev1, current = (np.full((batch, t + 3), np.inf) for _ in range(3))
+    prev2[:, 0] = 0.0
+    for k in range(2, 2 * t + 1):
+        lo, hi = max(1, k - t, (k - radius + 1) // 2), min(t, k - 1, (k + radius) // 2)
+        current[:, [lo - 1, hi + 1, hi + 2]] = np.inf
+        if hi >= lo:
+            cost = centroid[lo - 1:hi] - reversed_series[:, t - k + lo:t - k + hi + 1]
+            cost *= cost
+            best = np.minimum(np.minimum(prev2[:, lo - 1:hi], prev1[:, lo - 1:hi]), prev1[:, lo:hi + 1])
+            np.add(cost, best, out=current[:, lo:hi + 1])
+            band[k, :, :hi - lo + 1] = current[:, lo:hi + 1]
+            lo_of[k], hi_of[k] = lo, hi
+        prev2, prev1, current = prev1, current, prev2
+    distances = np.sqrt(prev1[:, t])
+
+    def lookup(i, j, r):
+        k = i + j
+        pos = i - lo_of[k]
+        valid = (i >= 1) & (j >= 1) & (pos >= 0) & (i <= hi_of[k])
+        out = np.full(len(i), np.inf)
+        out[valid] = band[k[valid], r[valid], pos[valid]]
+        return out
+
+    sums, counts = np.zeros(t), np.zeros(t)
+    i, j = np.full(batch, t), np.full(batch, t)
+    active = np.ones(batch, dtype=bool)
+    while active.any():
+        r = rows[active]
+        np.add.at(sums, i[r] - 1, series[r, j[r] - 1])
+        np.add.at(counts, i[r] - 1, 1)
+        active &= (i > 1) | (j > 1)
+        r = rows[active]
+        ir, jr = i[r], j[r]
+        step = np.argmin(np.stack([lookup(ir - 1, jr - 1, r), lookup(ir - 1, jr, r), lookup(ir, jr - 1, r)]), axis=0)
+        i[r] = ir - (step != 2)
+        j[r] = jr - (step != 1)
+    return distances, sums, counts
+
+
+def _path_sums(args):
+    centroid, chunk, radius = args
+    _, sums, counts = dtw_path_sums(centroid, chunk, radius)
+    return sums, counts
+
+
+def _dtw_to_centroids(args):
+    centroids, chunk, radius = args
+    return np.stack([dtw_batch(c, chunk, radius) for c in centroids])
+
+
+def _z_normalize(series):
+    series = np.asarray(series, dtype=float)
+    std = series.std(axis=-1, keepdims=True)
+    return (series - series.mean(axis=-1, keepdims=True)) / np.where(std > 0, std, 1)
+
+
+def shape_based_distance(centroids, series):
+    """
+    SBD de k-shape (1 - máxima correlación cruzada normalizada) entre cada
+    centroide y cada serie, con una FFT por serie y el producto de espectros
+    para todos los pares.
+
+    Returns:
+        distances [k x N], shifts [k x N] (desplazamiento que alinea la
+        serie con el centroide)
+    """
+    t = series.shape[1]
+    n_fft = fft.next_fast_len(2 * t - 1, real=True)
+    fc = fft.rfft(centroids, n=n_fft, axis=1)
+    fs = fft.rfft(series, n=n_fft, axis=1)
+    cc = fft.irfft(fc[:, None, :] * np.conj(fs[None, :, :]), n=n_fft, axis=2)
+    # Lags -(t-1)..(t-1); los negativos están al final
+    cc = np.concatenate([cc[:, :, n_fft - t + 1:], cc[:, :, :t]], axis=2)
+    norms = np.linalg.norm(centroids, axis=1)[:, None] * np.linalg.norm(series, axis=1)[None, :]
+    ncc = cc / np.where(norms > 0, norms, 1)[:, :, None]
+    best = ncc.argmax(axis=2)
+    return 1 - np.take_along_axis(ncc, best[:, :, None], axis=2)[:, :, 0], best - (t - 1)
+
+
+def _shift(series, shifts):
+    """Desplaza cada fila `shift` posiciones rellenando con ceros."""
+    t = series.shape[1]
+    idx = np.arange(t)[None, :] - shifts[:, None]
+    valid = (idx >= 0) & (idx < t)
+    return np.where(valid, np.take_along_axis(series, np.clip(idx, 0, t - 1), axis=1), 0.0)
+
+
+def _shape_extraction(scatter, t):
+    """Centroide de k-shape: autovector principal de Q·S·Q (Q centra)."""
+    q = np.eye(t) - 1.0 / t
+    _, vectors = eigh(q @ scatter @ q, subset_by_index=[t - 1, t - 1])
+    return vectors[:, 0]
+
+
+class _PartitionalRun:
+    """Una corrida (semilla) de k-means DBA o k-shape, con mini-lotes opcionales."""
+
+    def __init__(self, series, n_clusters, method, radius, batch_size, max_iter, tol, pool, n_jobs, seed):
+        self.series, self.k, self.method = series, n_clusters, method
+        self.radius, self.batch_size, self.max_iter, self.tol = radius, batch_size, max_iter, tol
+        self.pool, self.n_jobs = pool, n_jobs
+        self.rng = np.random.default_rng(seed)
+
+    def distances(self, centroids, series):
+        """Distancias [k x N]; la asignación DTW se reparte en el pool de procesos."""
+        if self.method == 'kshape':
+            return shape_based_distance(centroids, series)[0]
+        if self.pool is None or len(series) < 2 * self.n_jobs:
+            return _dtw_to_centroids((centroids, series, self.radius))
+        chunks = np.array_split(series, self.n_jobs)
+        return np.hstack(list(self.pool.map(_dtw_to_centroids, [(centroids, c, self.radius) for c in chunks])))
+
+    def path_sums(self, centroid, members):
+        """
+        Sumas y conteos DBA de los miembros, por tramos de PATH_CHUNK series
+        (la memoria no crece con el tamaño del cluster); los tramos se
+        reparten en el pool como la asignación.
+        """
+        chunks = [(centroid, members[i:i + PATH_CHUNK], self.radius) for i in range(0, len(members), PATH_CHUNK)]
+        parts = self.pool.map(_path_sums, chunks) if self.pool is not None and len(chunks) > 1 else map(_path_sums, chunks)
+        sums, counts = np.zeros(len(centroid)), np.zeros(len(centroid))
+        for s, c in parts:
+            sums += s
+            counts += c
+        return sums, counts
+
+    def init_centroids(self):
+        """k-means++ con la distancia del método."""
+        n = len(self.series)
+        chosen = [self.rng.integers(n)]
+        closest = self.distances(self.series[chosen], self.series)[0]
+        for _ in range(1, self.k):
+            weights = closest ** 2
+            nxt = self.rng.choice(n, p=weights / weights.sum()) if weights.sum() > 0 else self.rng.integers(n)
+            chosen.append(nxt)
+            closest = np.minimum(closest, self.distances(self.series[[nxt]], self.series)[0])
+        return self.series[chosen].copy()
+
+    def update(self, centroid, members, state, full_batch):
+        """Nuevo centroide a partir de los miembros del lote; `state` acumula entre lotes."""
+        if self.method == 'kshape':
+            _, shifts = shape_based_distance(centroid[None, :], members)
+            aligned = _z_normalize(_shift(members, shifts[0]))
+            scatter = aligned.T @ aligned
+            state['seen'] += len(members)
+            eta = 1.0 if full_batch else len(members) / state['seen']
+            state['scatter'] = scatter if state.get('scatter') is None else (1 - eta) * state['scatter'] + eta * scatter
+            new = _shape_extraction(state['scatter'], members.shape[1])
+            # El autovector tiene signo arbitrario: se elige el más cercano a los miembros
+            if np.linalg.norm(aligned - new * np.sqrt(len(new))) > np.linalg.norm(aligned + new * np.sqrt(len(new))):
+                new = -new
+            return _z_normalize(new)
+
+        sums, counts = self.path_sums(centroid, members)
+        barycenter = sums / np.where(counts > 0, counts, 1)
+        state['seen'] += len(members)
+        eta = 1.0 if full_batch else len(members) / state['seen']
+        return (1 - eta) * centroid + eta * barycenter
+
+    def fit(self):
+        n = len(self.series)
+        centroids = self.init_centroids()
+        states = [{'seen': 0, 'scatter': None} for _ in range(self.k)]
+        full_batch = self.batch_size is None or self.batch_size >= n
+        labels = None
+        # Última etiqueta de cada serie (-1 si todavía no salió en un lote) y lotes seguidos sin cambios
+        last, stable = np.full(n, -1), 0
+        for iteration in range(self.max_iter):
+            batch = np.arange(n) if full_batch else self.rng.choice(n, self.batch_size, replace=False)
+            batch_labels = self.distances(centroids, self.series[batch]).argmin(axis=0)
+            if full_batch and labels is not None and np.array_equal(batch_labels, labels):
+                break
+            labels = batch_labels if full_batch else labels
+            if not full_batch:
+                # La tasa de los mini-lotes decrece con los miembros vistos, así que el
+                # desplazamiento de los centroides no llega a tol: se mira si las asignaciones cambian
+                seen = last[batch] >= 0
+                stable = stable + 1 if seen.any() and np.array_equal(last[batch][seen], batch_labels[seen]) else 0
+                last[batch] = batch_labels
+                if stable >= STABLE_BATCHES:
+                    break
+
+            shift = 0.0
+            for c in range(self.k):
+                members = self.series[batch[batch_labels == c]]
+                if len(members) == 0:
+                    continue
+                new = self.update(centroids[c], members, states[c], full_batch)
+                shift = max(shift, float(np.abs(new - centroids[c]).max()))
+                centroids[c] = new
+            if shift < self.tol:
+                break
+
+        distances = self.distances(centroids, self.series)
+        labels = distances.argmin(axis=0)
+        inertia = float((distances.min(axis=0) ** 2).sum())
+        return labels, centroids, inertia, iteration + 1
+
+
+def partitional_labels(series, n_clusters=4, method='dba_kmeans', n_init=3, max_iter=30, batch_size=None,
+                       radius=None, n_jobs=1, tol=1e-4, seed=0, return_info=False):
+    """
+    Clustering particional de series: k-means con DTW y baricentros DBA, o
+    k-shape (distancia SBD y extracción de forma).
+
+    - Mini-lotes: con batch_size, cada iteración asigna una muestra y mueve
+      los centroides con tasa len(lote) / miembros vistos (como mini-batch
+      k-means); el costo por iteración no crece con N. Termina cuando
+      STABLE_BATCHES lotes seguidos no cambian la etiqueta de ninguna serie
+      ya asignada antes.
+    - Memoria: el promedio DBA se calcula por tramos de PATH_CHUNK series,
+      también repartidos en el pool.
+    - Multinúcleo: la asignación DTW (k x N distancias) se reparte en n_jobs
+      procesos.
+    - Reinicios: n_init corridas con semillas seed, seed+1, ...; se queda la
+      de menor inercia (suma de distancias al cuadrado a su centroide).
+
+    Args:
+        series: np.ndarray [N x T] escalado (como en cluster_and_export)
+        method: 'dba_kmeans' o 'kshape'
+        radius: radio de banda DTW (por defecto T // 10)
+
+    Returns:
+        labels (np.ndarray, 1..n_clusters) y, si return_info, un dict con
+        inercia, iteraciones, centroides y tiempo
+    """
+    if method not in ('dba_kmeans', 'kshape'):
+        raise ValueError(f"Método particional desconocido: {method}")
+    series = np.asarray(series, dtype=float)
+    if method == 'kshape':
+        series = _z_normalize(series)
+    radius = radius if radius is not None else max(1, series.shape[1] // 10)
+
+    t0 = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=n_jobs) if n_jobs > 1 and method == 'dba_kmeans' else None
+    try:
+        runs = [_PartitionalRun(series, n_clusters, method, radius, batch_size, max_iter, tol,
+                                pool, n_jobs, seed + i).fit() for i in range(n_init)]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    labels, centroids, inertia, iterations = min(runs, key=lambda run: run[2])
+
+    # Etiquetas 1..k como las de fcluster; la 1 es el cluster más grande
+    order = np.argsort(-np.bincount(labels, minlength=n_clusters), kind='stable')
+    relabel = np.empty(n_clusters, dtype=int)
+    relabel[order] = np.arange(1, n_clusters + 1)
+    labels = relabel[labels]
+    if not return_info:
+        return labels
+    return labels, {
+        'inertia': inertia,
+        'iterations': iterations,
+        'centroids': centroids[order],
+        'restarts': [run[2] for run in runs],
+        'seconds': time.perf_counter() - t0,
+    }
@@ -0,0 +1,400 @@
+import hashlib
+import json
+import os
+import re
+import runpy
+import sys
+import time
+import traceback
+from pathlib import Path
+
+import profiling
+
+ROOT = Path(__file__).resolve().parent.parent
+state_file = ROOT / 'build' / 'pipeline_state.json'
+profile_dir = ROOT / 'build' / 'profiles'
+
+data = 'dashboard_data'
+cases_file = 'original_data/cases_NSW.csv'
+raw_census_file = 'original_data/20200221-Upate-LGA-NSW.csv'
+geojson_file = 'original_data/nsw_lga_polygon_V5.geojson'
+covid_file = f'{data}/common/covid_clean.csv'
+census_file = f'{data}/common/census_clean.csv'
+monthly_file = f'{data}/map_of_cases_by_lga/covid_monthly_summary_filled.csv'
+clusters_file = f'{data}/cluster_time_series/lga_clusters.json'
+
+# Cada etapa es un script que se ejecuta como __main__ desde su carpeta (las
+# rutas relativas de los scripts suponen ese directorio de trabajo). Rutas de
+# entradas y salidas relativas a la raíz del repositorio; las dependencias
+# entre etapas se deducen de qué etapa produce cada entrada. 'optional' son
+# entradas que se usan si existen pero cuya falta no bloquea la etapa.
+STAGES = [
+    {'name': 'cleaning', 'script': 'cleaning.py',
+     'inputs': [cases_file, raw_census_file],
+     'outputs': [covid_file, census_file]},
+    {'name': 'time_series', 'script': 'preprocessing/serie_temporal.py',
+     'inputs': [cases_file],
+     'outputs': [f'{data}/time_series/quarterly_cases.csv', f'{data}/time_series/weekly_cases.csv',
+                 f'{data}/time_series/summary_stats.csv']},
+    {'name': 'monthly_map', 'script': 'preprocessing/mapa de casos covid por lga.py',
+     'inputs': [cases_file],
+     'outputs': [monthly_file]},
+    {'name': 'bar_chart', 'script': 'preprocessing/graficos de barras.py',
+     'inputs': [census_file],
+     'outputs': [f'{data}/bar_chart/lga_data_clean.csv']},
+    {'name': 'context_map', 'script': 'preprocessing/context_map.py',
+     'inputs': [census_file],
+     'outputs': [f'{data}/context_map/context_map.json']},
+    {'name': 'clustering', 'script': 'preprocessing/cluster_series2.py',
+     # La matriz DTW queda en build/ para que 'stability' la reutilice (ver pairwise.py)
+     'args': ['--distances-file', '../build/cluster_dtw.dist'],
+     'inputs': [covid_file],
+     'outputs': [f'{data}/cluster_time_series/cluster_timeseries_675days.csv', clusters_file]},
+    {'name': 'cluster_stats', 'script': 'preprocessing/cluster_stats.py',
+     'inputs': [covid_file, clusters_file],
+     'outputs': [f'{data}/cluster_time_series/cluster_window_stats.csv',
+                 f'{data}/cluster_time_series/monthly_cluster_stats_fixed.csv',
+                 f'{data}/cluster_time_series/monthly_global_stats_fixed.csv']},
+    {'name': 'incidence', 'script': 'preprocessing/incidence_cube.py',
+     'inputs': [monthly_file, f'{data}/time_series/weekly_cases.csv', census_file, clusters_file],
+     'optional': [covid_file],
+     'outputs': [f'{data}/map_of_cases_by_lga/covid_monthly_rates.csv', f'{data}/time_series/weekly_rates.csv']},
+    {'name': 'density', 'script': 'preprocessing/density_rasters.py',
+     'inputs': [geojson_file, monthly_file, census_file],
+     'outputs': [f'{data}/density/density_meta.json', f'{data}/density/density_frames.npz']},
+    {'name': 'spatial', 'script': 'preprocessing/spatial_weights.py',
+     'inputs': [geojson_file, f'{data}/map_of_cases_by_lga/covid_monthly_rates.csv', census_file],
+     'outputs': [f'{data}/spatial/moran_global.csv', f'{data}/spatial/lisa.csv',
+                 f'{data}/spatial/lisa_classes.json']},
+    {'name': 'rt', 'script': 'preprocessing/rt_estimation.py',
+     'inputs': [covid_file, clusters_file],
+     'outputs': [f'{data}/cluster_time_series/rt_estimates.csv']},
+    {'name': 'lead_lag', 'script': 'preprocessing/lead_lag.py',
+     'inputs': [covid_file, clusters_file],
+     'outputs': [f'{data}/lead_lag/lead_lag_edges.json', f'{data}/lead_lag/lead_lag_matrix.npz']},
+    {'name': 'factor_corr', 'script': 'preprocessing/factor_correlation.py',
+     'inputs': [covid_file, census_file, clusters_file],
+     'outputs': [f'{data}/factor_correlation/factor_correlation.json',
+                 f'{data}/factor_correlation/factor_correlation.npz']},
+    {'name': 'stability', 'script': 'preprocessing/cluster_stability.py',
+     'inputs': [covid_file, clusters_file],
+     'outputs': [f'{data}/cluster_stability/lga_stability.json', f'{data}/cluster_stability/coclustering.json',
+                 f'{data}/cluster_stability/coclustering.npz']},
+    {'name': 'scenarios', 'script': 'preprocessing/seir_scenarios.py',
+     'inputs': [covid_file, census_file, clusters_file, geojson_file],
+     'outputs': [f'{data}/scenarios/scenario_bands.csv', f'{data}/scenarios/scenario_lgas.json',
+                 f'{data}/scenarios/scenario_meta.json']},
+    {'name': 'hotspots', 'script': 'preprocessing/space_time_scan.py',
+     'inputs': [covid_file, geojson_file],
+     'outputs': [f'{data}/hotspots/space_time_hotspots.csv']},
+    {'name': 'neighbors', 'script': 'preprocessing/dtw_index.py',
+     'inputs': [covid_file],
+     'outputs': [f'{data}/cluster_time_series/lga_neighbors.json']},
+    {'name': 'view_bundles', 'script': 'preprocessing/view_bundles.py',
+     'inputs': [geojson_file, clusters_file, monthly_file, census_file,
+                f'{data}/cluster_time_series/cluster_timeseries_675days.csv',
+                f'{data}/cluster_time_series/monthly_global_stats_fixed.csv',
+                f'{data}/context_map/context_map.json'],
+     'optional': [f'{data}/density/density_meta.json'],
+     'outputs': [f'{data}/bundles/manifest.json']},
+]
+
+
+def stage_graph(stages):
+    """
+    Dependencias de cada etapa (las que producen alguna de sus entradas) y un
+    orden topológico.
+
+    Raises:
+        ValueError: si dos etapas producen el mismo archivo o hay un ciclo
+    """
+    producers = {}
+    for stage in stages:
+        for out in stage['outputs']:
+            if out in producers:
+                raise ValueError(f"{out} lo producen {producers[out]} y {stage['name']}")
+            producers[out] = stage['name']
+
+    deps = {stage['name']: sorted({producers[f] for f in stage['inputs'] + stage.get('optional', [])
+                                   if f in producers} - {stage['name']})
+            for stage in stages}
+    order, visiting = [], set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Ciclo de dependencias en la etapa {name}")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        visiting.discard(name)
+        order.append(name)
+
+    for stage in stages:
+        visit(stage['name'])
+    return deps, order
+
+
+def code_files(script):
+    """
+    El script y, recursivamente, los módulos hermanos que importa (o de
+    preprocessing/, que cleaning.py agrega al path): un cambio en cualquiera
+    de ellos cambia la huella de la etapa.
+    """
+    script = Path(script)
+    found, pending = [], [script]
+    while pending:
+        path = pending.pop()
+        if path in found or not path.is_file():
+            continue
+        found.append(path)
+        source = path.read_text(encoding='utf-8')
+        for module in re.findall(r'^\s*(?:from|import)\s+(\w+)', source, flags=re.MULTILINE):
+            pending += [path.parent / f'{module}.py', ROOT / 'preprocessing' / f'{module}.py']
+    return sorted(found)
+
+
+def file_digest(path, cache):
+    """sha256 del contenido, reutilizado mientras no cambien tamaño ni mtime."""
+    stat = path.stat()
+    key = os.path.relpath(path, ROOT)
+    entry = cache.get(key)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    cache[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+    return cache[key]['sha256']
+
+
+def fingerprint(stage, cache, workdir=ROOT):
+    """Huella de una etapa: hash de su código, argumentos y entradas presentes."""
+    digest = hashlib.sha256(json.dumps([stage['name'], stage.get('args', [])]).encode())
+    files = code_files(ROOT / stage['script'])
+    files += [workdir / f for f in stage['inputs'] + stage.get('optional', []) if (workdir / f).is_file()]
+    for path in files:
+        digest.update(f"{os.path.relpath(path, ROOT)}:{file_digest(path, cache)}\n".encode())
+    return digest.hexdigest()
+
+
+def _run_stage(job):
+    """
+    Ejecuta el script de una etapa en un proceso del pool. Con `profile`, la
+    etapa entera es un paso de profiling (los pasos internos del script
+    quedan como hijos) y el informe se guarda en profile_dir/<etapa>.json.
+    El directorio de trabajo es la carpeta equivalente a la del script dentro
+    de `workdir` (la raíz del repositorio o el espacio de un dataset).
+    """
+    name, script, args, profile, workdir = job
+    t0 = time.perf_counter()
+    os.chdir(Path(workdir) / Path(script).parent)
+    script = ROOT / script
+    sys.path.insert(0, str(script.parent))
+    sys.argv = [str(script), *args]
+    if profile is not None:
+        profiling.enable(memory=profile['memory'], cprofile_step=profile['cprofile'], cprofile_dir=profile_dir)
+    error = None
+    try:
+        with profiling.step(name):
+            runpy.run_path(str(script), run_name='__main__')
+    except SystemExit as exc:
+        if exc.code not in (None, 0):
+            error = f"SystemExit({exc.code})"
+    except Exception:
+        error = traceback.format_exc()
+    if profile is not None:
+        profiling.write_report(profile_dir / f'{name}.json')
+    return time.perf_counter() - t0, error
+
+
+def load_state(path=state_file):
+    if Path(path).is_file():
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {'stages': {}, 'files': {}}
+
+
+def save_state(state, path=state_file):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=2)
+
+
+def run_pipeline(stages=STAGES, only=None, force=False, jobs=None, dry_run=False, state_path=state_file,
+                 profile=None, workdir=ROOT):
+    """
+    Ejecuta las etapas en orden de dependencias.
+
+    - Una etapa se salta si su huella (código + entradas) coincide con la de
+      la última ejecución correcta y sus salidas existen.
+    - Las etapas cuyas dependencias ya terminaron se ejecutan a la vez en un
+      pool de procesos (un proceso nuevo por etapa, para aislar el estado).
+    - Si falta una entrada obligatoria la etapa queda 'bloqueada'; si falla
+      una dependencia, las etapas siguientes quedan 'omitidas'. Una entrada
+      que ya existe en disco sirve aunque su productora esté bloqueada.
+
+    Args:
+        only: nombres de etapas a ejecutar (más las que necesitan)
+        force: ejecuta aunque la huella no haya cambiado
+        jobs: procesos del pool (por defecto, los núcleos disponibles)
+        dry_run: solo informa qué se ejecutaría
+        profile: None o {'memory': bool, 'cprofile': paso o None}; perfila
+            las etapas ejecutadas y escribe build/run_report.json
+        workdir: carpeta con original_data/ y dashboard_data/ contra la que se
+            resuelven entradas y salidas (ver datasets.py)
+
+    Returns:
+        dict etapa -> {'status', 'seconds', 'detail'}
+    """
+    workdir = Path(workdir)
+    by_name = {stage['name']: stage for stage in stages}
+    deps, order = stage_graph(stages)
+    if only:
+        unknown = set(only) - set(by_name)
+        if unknown:
+            raise ValueError(f"Etapas desconocidas: {sorted(unknown)}")
+        selected, pending = set(), list(only)
+        while pending:
+            name = pending.pop()
+            if name not in selected:
+                selected.add(name)
+                pending.extend(deps[name])
+        order = [name for name in order if name in selected]
+
+    state = load_state(state_path)
+    results, prints = {}, {}
+
+    def prepare(name):
+        """Decide si la etapa se ejecuta; devuelve el estado si no hace falta."""
+        stage = by_name[name]
+        if any(results[d]['status'] in ('error', 'omitida') for d in deps[name]):
+            return 'omitida', 'falló una dependencia'
+        missing = [f for f in stage['inputs'] if not (workdir / f).is_file()]
+        if missing:
+            return 'bloqueada', f"falta {missing[0]}"
+        prints[name] = fingerprint(stage, state['files'], workdir)
+        outputs_ok = all((workdir / f).is_file() for f in stage['outputs'])
+        previous = state['stages'].get(name, {}).get('fingerprint')
+        # En el plan, una dependencia pendiente cambiará las entradas; al ejecutar
+        # basta la huella (si la dependencia regeneró lo mismo, no hay que repetir)
+        upstream_pending = any(results[d]['status'] == 'pendiente' for d in deps[name])
+        if not force and outputs_ok and previous == prints[name] and not upstream_pending:
+            return 'sin cambios', ''
+        return None, ''
+
+    t_start = time.perf_counter()
+    if dry_run:
+        for name in order:
+            status, detail = prepare(name)
+            results[name] = {'status': status or 'pendiente', 'seconds': 0.0, 'detail': detail}
+        print_summary(results, 0.0)
+        return results
+
+    # Solo al ejecutar: `python -m preprocessing list` importa este módulo por STAGES
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    remaining = list(order)
+    running = {}
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count(), max_tasks_per_child=1) as pool:
+        while remaining or running:
+            for name in list(remaining):
+                if any(d in remaining or d in running.values() for d in deps[name]):
+                    continue
+                remaining.remove(name)
+                status, detail = prepare(name)
+                if status:
+                    results[name] = {'status': status, 'seconds': 0.0, 'detail': detail}
+                    continue
+                print(f"▶ {name}")
+                stage = by_name[name]
+                job = (name, stage['script'], stage.get('args', []), profile, str(workdir))
+                running[pool.submit(_run_stage, job)] = name
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                seconds, error = future.result()
+                if error is None and all((workdir / f).is_file() for f in by_name[name]['outputs']):
+                    results[name] = {'status': 'ejecutada', 'seconds': seconds, 'detail': ''}
+                    state['stages'][name] = {'fingerprint': prints[name], 'seconds': round(seconds, 3),
+                                             'finished': time.strftime('%Y-%m-%dT%H:%M:%S')}
+                    # Las salidas nuevas se hashean ahora, mientras el resto sigue en curso
+                    for out in by_name[name]['outputs']:
+                        file_digest(workdir / out, state['files'])
+                else:
+                    detail = error.strip().splitlines()[-1] if error else 'no generó todas sus salidas'
+                    results[name] = {'status': 'error', 'seconds': seconds, 'detail': detail}
+                    state['stages'].pop(name, None)
+                save_state(state, state_path)
+
+    results = {name: results[name] for name in order}
+    wall_seconds = time.perf_counter() - t_start
+    print_summary(results, wall_seconds)
+    if profile is not None:
+        write_run_report(results, wall_seconds)
+    return results
+
+
+def write_run_report(results, wall_seconds, out_file=ROOT / 'build' / 'run_report.json'):
+    """
+    Informe JSON de la corrida: estado y tiempo de cada etapa y, para las
+    ejecutadas, sus pasos medidos (reloj, CPU, pico de memoria, filas y bytes).
+    """
+    stages = []
+    for name, result in results.items():
+        entry = {'name': name, **result}
+        report_file = profile_dir / f'{name}.json'
+        if result['status'] in ('ejecutada', 'error') and report_file.is_file():
+            with open(report_file, 'r') as f:
+                entry['steps'] = json.load(f)['steps']
+            print(f"\n[{name}]")
+            profiling.print_report(entry['steps'])
+        stages.append(entry)
+    Path(out_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(out_file, 'w') as f:
+        json.dump({'finished': time.strftime('%Y-%m-%dT%H:%M:%S'), 'wall_s': round(wall_seconds, 3),
+                   'stages': stages}, f, indent=2)
+    print(f"✅ Informe de la corrida guardado en: {out_file}")
+
+
+def print_summary(results, wall_seconds):
+    """Tabla de etapas con su estado y tiempo, y el tiempo total."""
+    print(f"\n{'Etapa':<16} {'Estado':<12} {'Tiempo (s)':>10}  Detalle")
+    for name, result in results.items():
+        seconds = f"{result['seconds']:.1f}" if result['status'] in ('ejecutada', 'error') else '-'
+        print(f"{name:<16} {result['status']:<12} {seconds:>10}  {result['detail']}")
+    busy = sum(r['seconds'] for r in results.values())
+    print(f"Total: {wall_seconds:.1f} s de reloj, {busy:.1f} s sumando etapas")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pipeline de preprocesamiento con caché por contenido')
+    parser.add_argument('stages', nargs='*', help='etapas a ejecutar (por defecto, todas)')
+    parser.add_argument('--force', action='store_true', help='ignora las huellas guardadas')
+    parser.add_argument('--jobs', type=int, default=None, help='etapas simultáneas')
+    parser.add_argument('--dry-run', action='store_true', help='muestra el plan sin ejecutar')
+    parser.add_argument('--list', action='store_true', help='lista las etapas y sus dependencias')
+    parser.add_argument('--profile', action='store_true', help='mide cada etapa y sus pasos (build/run_report.json)')
+    parser.add_argument('--cprofile', metavar='PASO', default=None,
+                        help='guarda un volcado cProfile del paso (etapa o sub-paso) en build/profiles/')
+    parser.add_argument('--no-memory', action='store_true', help='sin tracemalloc al perfilar')
+    args = parser.parse_args()
+
+    if args.list:
+        deps, order = stage_graph(STAGES)
+        for name in order:
+            print(f"{name:<16} <- {', '.join(deps[name]) or '-'}")
+    else:
+        profile = None
+        if args.profile or args.cprofile:
+            profile = {'memory': not args.no_memory, 'cprofile': args.cprofile}
+        results = run_pipeline(only=args.stages, force=args.force, jobs=args.jobs, dry_run=args.dry_run,
+                               profile=profile)
+        sys.exit(1 if any(r['status'] == 'error' for r in results.values()) else 0)
@@ -0,0 +1,189 @@
+import atexit
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from itertools import count
+from pathlib import Path
+
+# Instrumentación opcional de las etapas de preprocesamiento.
+#
+# Los scripts marcan sus pasos con `with step('nombre') as s:` o con el
+# decorador @profiled. Si el perfilado no está activo, step() no mide nada.
+# Se activa con enable() o con variables de entorno (así lo hace
+# pipeline.py --profile para cada etapa):
+#   PROFILE_REPORT=ruta.json   escribe el informe al terminar el proceso
+#   PROFILE_CPROFILE=paso      guarda un volcado cProfile de ese paso
+#   PROFILE_MEMORY=0           desactiva tracemalloc (que ralentiza el código Python)
+
+_config = {'enabled': False, 'memory': False, 'cprofile': None, 'cprofile_dir': '.'}
+_records = []
+_stack = []
+_started = count()
+
+
+class Step:
+    """Un paso en curso: acumula filas y bytes leídos o escritos."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows_in = self.rows_out = self.bytes_in = self.bytes_out = 0
+        self.peak = 0
+
+    def read(self, path=None, rows=0):
+        """Registra una lectura: filas y, si se da la ruta, el tamaño del archivo."""
+        self.rows_in += int(rows)
+        if path is not None and Path(path).is_file():
+            self.bytes_in += Path(path).stat().st_size
+
+    def wrote(self, path=None, rows=0):
+        """Registra una escritura (llamar después de cerrar el archivo)."""
+        self.rows_out += int(rows)
+        if path is not None and Path(path).is_file():
+            self.bytes_out += Path(path).stat().st_size
+
+
+class _NullStep:
+    def read(self, path=None, rows=0):
+        pass
+
+    def wrote(self, path=None, rows=0):
+        pass
+
+
+_NULL_STEP = _NullStep()
+
+
+def enable(report_file=None, memory=True, cprofile_step=None, cprofile_dir='.'):
+    """
+    Activa el perfilado en este proceso.
+
+    Args:
+        report_file: si se da, el informe JSON se escribe ahí al salir
+        memory: mide el pico de memoria con tracemalloc
+        cprofile_step: nombre del paso del que guardar un volcado cProfile
+        cprofile_dir: carpeta de los volcados (<paso>.prof)
+    """
+    _config.update(enabled=True, memory=memory, cprofile=cprofile_step, cprofile_dir=cprofile_dir)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if report_file:
+        atexit.register(write_report, report_file)
+
+
+def is_enabled():
+    return _config['enabled']
+
+
+@contextmanager
+def step(name):
+    """
+    Mide un paso: tiempo de reloj y de CPU, pico de memoria trazada y E/S
+    registrada con s.read() / s.wrote(). Los pasos anidados quedan como
+    hijos ('etapa/paso') y sus filas y bytes se suman al padre.
+    """
+    if not _config['enabled']:
+        yield _NULL_STEP
+        return
+
+    current = Step(name)
+    parent = _stack[-1] if _stack else None
+    if _config['memory']:
+        # El pico hasta ahora pertenece al padre; el del hijo empieza de cero
+        if parent is not None:
+            parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    profiler = cProfile.Profile() if _config['cprofile'] == name else None
+    path = '/'.join([s.name for s in _stack] + [name])
+    order = next(_started)
+    _stack.append(current)
+
+    t0, c0 = time.perf_counter(), time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield current
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+        _stack.pop()
+        record = {'order': order, 'name': name, 'path': path, 'depth': len(_stack),
+                  'wall_s': round(wall, 4), 'cpu_s': round(cpu, 4)}
+        if _config['memory']:
+            current.peak = max(current.peak, tracemalloc.get_traced_memory()[1])
+            record['peak_mb'] = round(current.peak / 2 ** 20, 2)
+            if parent is not None:
+                parent.peak = max(parent.peak, current.peak)
+            tracemalloc.reset_peak()
+        rows = max(current.rows_in, current.rows_out)
+        record.update(rows_in=current.rows_in, rows_out=current.rows_out,
+                      bytes_in=current.bytes_in, bytes_out=current.bytes_out,
+                      rows_per_s=round(rows / wall, 1) if rows and wall > 0 else None)
+        if parent is not None:
+            parent.rows_in += current.rows_in
+            parent.rows_out += current.rows_out
+            parent.bytes_in += current.bytes_in
+            parent.bytes_out += current.bytes_out
+        _records.append(record)
+        if profiler is not None:
+            out = Path(_config['cprofile_dir']) / f'{name}.prof'
+            out.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(out)
+            print(f"✅ Perfil cProfile de '{name}' guardado en: {out}")
+
+
+def current():
+    """Paso en curso, para registrar E/S desde funciones con @profiled."""
+    return _stack[-1] if _stack else _NULL_STEP
+
+
+def profiled(name=None):
+    """Decorador: mide cada llamada de la función como un paso."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with step(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def report():
+    """Informe de la ejecución: pasos en orden de inicio (padres antes que hijos)."""
+    steps = [{k: v for k, v in r.items() if k != 'order'} for r in sorted(_records, key=lambda r: r['order'])]
+    return {
+        'argv': sys.argv,
+        'python': sys.version.split()[0],
+        'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'memory_traced': _config['memory'],
+        'steps': steps,
+    }
+
+
+def write_report(report_file):
+    """Escribe el informe JSON (también se llama al salir si se activó con ruta)."""
+    Path(report_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(report_file, 'w') as f:
+        json.dump(report(), f, indent=2)
+
+
+def print_report(records=None):
+    """Tabla legible de los pasos medidos."""
+    records = records if records is not None else report()['steps']
+    print(f"{'Paso':<40} {'Reloj (s)':>9} {'CPU (s)':>8} {'Pico MB':>8} {'Filas':>10} {'Filas/s':>10}")
+    for r in records:
+        label = '  ' * r['depth'] + r['name']
+        rows = max(r['rows_in'], r['rows_out'])
+        print(f"{label:<40} {r['wall_s']:>9.2f} {r['cpu_s']:>8.2f} {r.get('peak_mb', '-'):>8} "
+              f"{rows or '-':>10} {r['rows_per_s'] or '-':>10}")
+
+
+if os.environ.get('PROFILE_REPORT') or os.environ.get('PROFILE_CPROFILE'):
+    enable(os.environ.get('PROFILE_REPORT'), memory=os.environ.get('PROFILE_MEMORY', '1') != '0',
+           cprofile_step=os.environ.get('PROFILE_CPROFILE'),
+           cprofile_dir=os.environ.get('PROFILE_CPROFILE_DIR', '.'))
@@ -0,0 +1,158 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+from cluster_stats import to_full_calendar, rolling_sums
+from incidence_cube import load_cluster_labels
+
+# Intervalo serial de COVID-19 (media 4.7 días, desviación 2.9; Nishiura et al. 2020)
+SERIAL_INTERVAL_MEAN = 4.7
+SERIAL_INTERVAL_SD = 2.9
+
+
+def discretize_serial_interval(mean=SERIAL_INTERVAL_MEAN, sd=SERIAL_INTERVAL_SD, max_days=21):
+    """
+    Distribución gamma del intervalo serial discretizada por días.
+
+    Returns:
+        w (np.ndarray [max_days + 1]) con w[0] = 0 y suma 1; w[s] es la
+        probabilidad de que el caso secundario aparezca s días después
+    """
+    from scipy import stats
+
+    shape, scale = (mean / sd) ** 2, sd ** 2 / mean
+    cdf = stats.gamma.cdf(np.arange(max_days + 1), shape, scale=scale)
+    w = np.concatenate([[0.0], np.diff(cdf)])
+    return w / w.sum()
+
+
+def infection_pressure(incidence, w):
+    """
+    Presión de infección Λ_t = Σ_s w_s I_{t-s} de todas las series a la vez,
+    como convolución a lo largo del eje temporal.
+
+    Args:
+        incidence: np.ndarray [series x días]
+        w: intervalo serial discretizado (w[0] = 0)
+
+    Returns:
+        np.ndarray [series x días]
+    """
+    from scipy.signal import fftconvolve
+
+    return np.clip(fftconvolve(incidence, w[None, :], axes=1)[:, :incidence.shape[1]], 0, None)
+
+
+def estimate_rt(incidence, w, window=7, prior_shape=1.0, prior_scale=5.0,
+                quantiles=(0.025, 0.5, 0.975), min_cases=12):
+    """
+    Estimación de Rt de Cori et al. (2013) para todas las series juntas.
+
+    Con un prior Gamma(a, b) y una ventana de `window` días que termina en t,
+    la posterior es Gamma(a + Σ I, 1 / (1/b + Σ Λ)). Las sumas por ventana
+    son diferencias de sumas acumuladas y los cuantiles se evalúan con
+    stats.gamma.ppf sobre la matriz completa.
+
+    Args:
+        incidence: np.ndarray [series x días] en calendario completo
+        w: intervalo serial discretizado
+        window: días de la ventana de suavizado
+        prior_shape, prior_scale: parámetros del prior gamma
+        quantiles: cuantiles del intervalo de credibilidad
+        min_cases: casos mínimos en la ventana; con menos, la estimación
+            queda en NaN (recomendación de Cori et al.)
+
+    Returns:
+        dict con 'mean' y un arreglo por cuantil, todos [series x días]; las
+        primeras window - 1 columnas (y las del primer caso) quedan en NaN
+    """
+    incidence = np.asarray(incidence, dtype=float)
+    pressure = infection_pressure(incidence, w)
+
+    n_series, n_days = incidence.shape
+    cases_sum = np.full((n_series, n_days), np.nan)
+    pressure_sum = np.full((n_series, n_days), np.nan)
+    cases_sum[:, window - 1:] = rolling_sums(incidence, window)
+    pressure_sum[:, window - 1:] = rolling_sums(pressure, window)
+
+    valid = (cases_sum >= min_cases) & (pressure_sum > 0)
+    shape = np.where(valid, prior_shape + cases_sum, np.nan)
+    scale = np.where(valid, 1 / (1 / prior_scale + np.where(valid, pressure_sum, 1)), np.nan)
+
+    from scipy import stats
+
+    result = {'mean': shape * scale}
+    for q in quantiles:
+        result[q] = stats.gamma.ppf(q, shape, scale=scale)
+    return result
+
+
+def aggregate_by_cluster(matrix, labels):
+    """
+    Suma las series por cluster y agrega una serie estatal.
+
+    Returns:
+        ids (list, clusters y 'NSW'), np.ndarray [grupos x días]
+    """
+    labels = np.asarray(labels)
+    clusters = [c for c in np.unique(labels) if c != 0]
+    indicator = np.vstack([labels == c for c in clusters] + [np.ones(len(labels), dtype=bool)]).astype(float)
+    return [str(c) for c in clusters] + ['NSW'], indicator @ matrix
+
+
+def rt_to_frame(ids, levels, calendar, incidence, estimate, quantiles=(0.025, 0.5, 0.975)):
+    """Tabla larga con una fila por (serie, día) con estimación válida."""
+    n_series, n_days = incidence.shape
+    frame = pd.DataFrame({
+        'level': np.repeat(levels, n_days),
+        'id': np.repeat(ids, n_days),
+        'date': np.tile(calendar.strftime('%Y-%m-%d'), n_series),
+        'cases': incidence.ravel().astype(int),
+        'rt_mean': estimate['mean'].ravel(),
+        'rt_lower': estimate[quantiles[0]].ravel(),
+        'rt_median': estimate[quantiles[1]].ravel(),
+        'rt_upper': estimate[quantiles[2]].ravel(),
+    })
+    return frame.dropna(subset=['rt_mean']).round(4)
+
+
+def export_rt(matrix, lga_codes, dates, serial_mean=SERIAL_INTERVAL_MEAN, serial_sd=SERIAL_INTERVAL_SD,
+              window=7, out_file='../dashboard_data/cluster_time_series/rt_estimates.csv'):
+    """
+    Estima y exporta Rt por LGA, por cluster y estatal con intervalos de
+    credibilidad del 95%.
+
+    Genera:
+    - rt_estimates.csv: level, id, date, cases, rt_mean, rt_lower,
+      rt_median, rt_upper
+    """
+    full, calendar = to_full_calendar(matrix, dates)
+    lga_codes = [str(code) for code in lga_codes]
+    group_ids, groups = aggregate_by_cluster(full, load_cluster_labels(lga_codes))
+
+    incidence = np.vstack([full, groups])
+    ids = lga_codes + group_ids
+    levels = ['lga'] * len(lga_codes) + ['cluster'] * (len(group_ids) - 1) + ['state']
+
+    w = discretize_serial_interval(serial_mean, serial_sd)
+    estimate = estimate_rt(incidence, w, window)
+    frame = rt_to_frame(np.array(ids), np.array(levels), calendar, incidence, estimate)
+
+    Path(out_file).parent.mkdir(parents=True, exist_ok=True)
+    frame.to_csv(out_file, index=False)
+    print(f"✅ Rt estimado para {len(ids)} series guardado en: {out_file}")
+    return frame
+
+
+if __name__ == "__main__":
+    import argparse
+    from cluster_series2 import process_covid_data
+
+    parser = argparse.ArgumentParser(description='Estimación de Rt (Cori) por LGA y cluster')
+    parser.add_argument('--serial-mean', type=float, default=SERIAL_INTERVAL_MEAN)
+    parser.add_argument('--serial-sd', type=float, default=SERIAL_INTERVAL_SD)
+    parser.add_argument('--window', type=int, default=7)
+    args = parser.parse_args()
+
+    matrix, lga_codes, dates = process_covid_data()
+    export_rt(matrix, lga_codes, dates, args.serial_mean, args.serial_sd, args.window)
@@ -0,0 +1,242 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cluster_stats import to_full_calendar
+from density_rasters import load_polygons
+from incidence_cube import census_file, load_cluster_labels, load_population
+from profiling import profiled, step
+from spatial_weights import contiguity_weights, polygon_centroids, row_standardize
+
+out_folder = '../dashboard_data/scenarios'
+
+# Escenarios "qué pasaría si" con un SEIR metapoblacional: una población por
+# LGA, acopladas por contigüidad. Todo el conjunto se simula a la vez: el
+# estado es un arreglo [miembros x LGAs x compartimentos (S, E, I, R)] y cada
+# día es una sola pasada vectorizada (binomiales encadenadas, paso de 1 día).
+#
+# Mezcla: una fracción m_i de los contactos de la LGA i ocurre con sus
+# vecinas (W, contigüidad estandarizada por filas) y el resto dentro de la
+# LGA. m_i = mixing x PercentofPublicTransportation / 100: el uso de
+# transporte público del censo es el proxy de movilidad entre LGAs. La
+# prevalencia que ve cada LGA es
+#     ((1 - m_i) I_i + m_i (W I)_i) / ((1 - m_i) N_i + m_i (W N)_i)
+# y W I es un solo producto disperso para todos los miembros.
+#
+# Cada miembro del conjunto sortea sus parámetros de PRIORS; los escenarios
+# escalan la transmisión o la movilidad.
+
+# Rangos (uniformes) de los parámetros por miembro
+PRIORS = {
+    'r0': (1.3, 2.5),
+    'incubation_days': (3.0, 6.0),
+    'infectious_days': (4.0, 8.0),
+    'mixing': (0.5, 1.5),
+    'reporting': (0.2, 0.5),
+}
+
+SCENARIOS = {
+    'baseline': {},
+    'distancing': {'r0_scale': 0.7},
+    'transit_halved': {'transit_scale': 0.5},
+    'lockdown': {'r0_scale': 0.5, 'transit_scale': 0.2},
+}
+
+QUANTILES = {'q05': 0.05, 'q25': 0.25, 'median': 0.5, 'q75': 0.75, 'q95': 0.95}
+
+
+def sample_parameters(n_members, rng, priors=PRIORS):
+    """Parámetros por miembro: dict nombre -> np.ndarray [miembros x 1] (para difundir sobre las LGAs)."""
+    return {name: rng.uniform(low, high, (n_members, 1)) for name, (low, high) in priors.items()}
+
+
+def initial_state(params, population, recent_cases, cumulative_cases):
+    """
+    Estado inicial [miembros x LGAs x 4] a partir de los casos notificados.
+
+    Los casos de los últimos días se toman como infecciosos y los acumulados
+    anteriores como recuperados, ambos divididos por la fracción notificada
+    de cada miembro; los expuestos se estiman con la razón incubación /
+    período infeccioso.
+    """
+    infectious = np.round(recent_cases / params['reporting'])
+    exposed = np.round(infectious * params['incubation_days'] / params['infectious_days'])
+    recovered = np.round((cumulative_cases - recent_cases) / params['reporting'])
+    # Nunca más infectados que habitantes
+    recovered = np.minimum(recovered, population)
+    infectious = np.minimum(infectious, population - recovered)
+    exposed = np.minimum(exposed, population - recovered - infectious)
+    susceptible = population - exposed - infectious - recovered
+    return np.stack([susceptible, exposed, infectious, recovered], axis=-1).astype(np.int64)
+
+
+@profiled()
+def simulate(state, params, population, weights, transit_share, groups, days, r0_scale=1.0, transit_scale=1.0,
+             seed=0):
+    """
+    Simula todos los miembros a la vez.
+
+    Args:
+        state: np.ndarray int [miembros x LGAs x 4] (S, E, I, R)
+        params: salida de sample_parameters
+        population: np.ndarray [LGAs]
+        weights: scipy.sparse [LGAs x LGAs] estandarizada por filas
+        transit_share: fracción de viajes en transporte público por LGA
+        groups: matriz indicadora [grupos x LGAs] (clusters y el estado)
+        days: días a simular
+        r0_scale, transit_scale: factores del escenario
+
+    Returns:
+        reported (np.ndarray float32 [miembros x grupos x días], casos
+        notificados esperados por día), attack (np.ndarray [miembros x
+        LGAs], nuevas infecciones acumuladas por habitante), seconds
+    """
+    rng = np.random.default_rng(seed)
+    state = state.copy()
+    population = np.asarray(population, dtype=float)
+    mixing = np.clip(params['mixing'] * transit_share * transit_scale, 0, 1)
+    # Denominador de la prevalencia vista por cada LGA (no cambia en el tiempo)
+    contacts = (1 - mixing) * population + mixing * (weights @ population)
+    beta = params['r0'] * r0_scale / params['infectious_days']
+    p_onset = 1 - np.exp(-1 / params['incubation_days'])
+    p_recover = 1 - np.exp(-1 / params['infectious_days'])
+    groups_t = groups.T.astype(np.float32)
+
+    reported = np.zeros((len(state), len(groups), days), dtype=np.float32)
+    infected = np.zeros(state.shape[:2], dtype=np.int64)
+    t0 = time.perf_counter()
+    for day in range(days):
+        s, e, i = state[..., 0], state[..., 1], state[..., 2]
+        neighbours = (weights @ i.T).T
+        prevalence = ((1 - mixing) * i + mixing * neighbours) / contacts
+        new_exposed = rng.binomial(s, -np.expm1(-beta * prevalence))
+        new_infectious = rng.binomial(e, p_onset)
+        new_recovered = rng.binomial(i, p_recover)
+        state[..., 0] -= new_exposed
+        state[..., 1] += new_exposed - new_infectious
+        state[..., 2] += new_infectious - new_recovered
+        state[..., 3] += new_recovered
+        infected += new_exposed
+        reported[:, :, day] = (new_infectious * params['reporting']).astype(np.float32) @ groups_t
+    seconds = time.perf_counter() - t0
+    return reported, infected / population, seconds
+
+
+def load_model_inputs(lga_codes, matrix, dates, start=None, recent_days=14,
+                      geojson_file='../original_data/nsw_lga_polygon_V5.geojson'):
+    """
+    LGAs simulables (en el mapa y con población en el censo) y sus datos.
+
+    Returns:
+        dict con lga_codes, population, transit_share, weights, recent y
+        cumulative (casos notificados hasta `start`) y start (Timestamp)
+    """
+    polygon_codes, rings, _ = load_polygons(geojson_file)
+    polygon_codes = [str(code) for code in polygon_codes]
+    census = pd.read_csv(census_file, dtype={'lga_code19': str}).drop_duplicates('lga_code19').set_index('lga_code19')
+    population = load_population().drop_duplicates('lga_code19').set_index('lga_code19')['Population']
+    keep = [k for k, code in enumerate(polygon_codes) if population.get(code, 0) > 0]
+    codes = [polygon_codes[k] for k in keep]
+
+    weights = contiguity_weights([rings[k] for k in keep], polygon_centroids([rings[k] for k in keep]))
+    transit = census['PercentofPublicTransportation'].reindex(codes).to_numpy(dtype=float)
+    transit_share = np.nan_to_num(transit, nan=np.nanmedian(transit)) / 100
+
+    full, calendar = to_full_calendar(matrix, dates)
+    start = calendar[-1] if start is None else pd.Timestamp(start)
+    cases = pd.DataFrame(full, index=[str(code) for code in lga_codes]).reindex(codes).fillna(0).to_numpy()
+    upto = calendar <= start
+    cumulative = cases[:, upto].sum(axis=1)
+    recent = cases[:, upto][:, -recent_days:].sum(axis=1)
+    return {'lga_codes': codes, 'population': population.reindex(codes).to_numpy(dtype=float),
+            'transit_share': transit_share, 'weights': row_standardize(weights).tocsr(),
+            'recent': recent, 'cumulative': cumulative, 'start': start}
+
+
+def group_indicator(labels):
+    """Matriz indicadora [grupos x LGAs]: cada cluster (1..k) y el estado."""
+    clusters = sorted(int(c) for c in np.unique(labels) if c != 0)
+    indicator = np.vstack([labels == c for c in clusters] + [np.ones(len(labels), dtype=bool)])
+    return clusters + ['NSW'], indicator
+
+
+def export_scenarios(matrix, lga_codes, dates, scenarios=None, n_members=200, days=120, start=None,
+                     recent_days=14, seed=0, out_dir=out_folder):
+    """
+    Conjuntos SEIR por escenario, desde los casos notificados hasta `start`.
+
+    Genera:
+    - scenario_bands.csv: mismo formato que cluster_timeseries
+      (date, cluster, type, value, series_id), con type = cuantil (q05, q25,
+      median, q75, q95) de los casos notificados por día, cluster = id del
+      cluster o 'NSW' y series_id = escenario
+    - scenario_lgas.json: por escenario y LGA, cuantiles (q05, median, q95)
+      de las nuevas infecciones por 100k en el horizonte, para el mapa
+    - scenario_meta.json: parámetros, escenarios y rendimiento (miembros-día/s)
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    scenarios = scenarios or list(SCENARIOS)
+
+    with step('inputs'):
+        inputs = load_model_inputs(lga_codes, matrix, dates, start, recent_days)
+    group_ids, indicator = group_indicator(load_cluster_labels(inputs['lga_codes']))
+    calendar = pd.date_range(inputs['start'] + pd.Timedelta(days=1), periods=days, freq='D').strftime('%Y-%m-%d')
+
+    # Mismos miembros (parámetros y estado inicial) en todos los escenarios: las diferencias son del escenario
+    params = sample_parameters(n_members, np.random.default_rng(seed))
+    state = initial_state(params, inputs['population'], inputs['recent'], inputs['cumulative'])
+
+    lga_bands, throughput = {}, {}
+    with open(out_dir / 'scenario_bands.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'cluster', 'type', 'value', 'series_id'])
+        for name in scenarios:
+            with step(f'simulate_{name}'):
+                reported, attack, seconds = simulate(state, params, inputs['population'], inputs['weights'],
+                                                     inputs['transit_share'], indicator, days, seed=seed + 1,
+                                                     **SCENARIOS[name])
+            throughput[name] = round(n_members * days / seconds) if seconds > 0 else None
+            bands = np.quantile(reported, list(QUANTILES.values()), axis=0)
+            for g, group in enumerate(group_ids):
+                for q, label in enumerate(QUANTILES):
+                    for day, date in enumerate(calendar):
+                        writer.writerow([date, group, label, round(float(bands[q, g, day]), 2), name])
+            attack_q = np.quantile(attack * 1e5, [0.05, 0.5, 0.95], axis=0).round(1)
+            lga_bands[name] = {code: attack_q[:, k].tolist() for k, code in enumerate(inputs['lga_codes'])}
+            print(f"  {name}: {n_members} miembros x {days} días en {seconds:.2f} s = "
+                  f"{throughput[name]:,} miembros-día/s")
+
+    with open(out_dir / 'scenario_lgas.json', 'w') as f:
+        json.dump({'quantiles': ['q05', 'median', 'q95'], 'unit': 'infections_per100k', 'scenarios': lga_bands},
+                  f, separators=(',', ':'))
+    with open(out_dir / 'scenario_meta.json', 'w') as f:
+        json.dump({'start': inputs['start'].strftime('%Y-%m-%d'), 'days': days, 'members': n_members,
+                   'n_lgas': len(inputs['lga_codes']), 'recent_days': recent_days, 'seed': seed,
+                   'priors': PRIORS, 'scenarios': {name: SCENARIOS[name] for name in scenarios},
+                   'member_days_per_second': throughput}, f, indent=2)
+    print(f"✅ {len(scenarios)} escenarios x {len(group_ids)} grupos guardados en: {out_dir / 'scenario_bands.csv'}")
+    return throughput
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from cluster_series2 import process_covid_data
+
+    parser = argparse.ArgumentParser(description='Escenarios SEIR metapoblacionales por LGA')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--members', type=int, default=200)
+    parser.add_argument('--days', type=int, default=120)
+    parser.add_argument('--start', default=None, help='fecha de inicio (por defecto, el último día con datos)')
+    parser.add_argument('--recent-days', type=int, default=14, help='días de casos que se toman como infecciosos')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    matrix, lga_codes, dates = process_covid_data()
+    export_scenarios(matrix, lga_codes, dates, args.scenarios, args.members, args.days, args.start,
+                     args.recent_days, args.seed)
@@ -0,0 +1,220 @@
+import os
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+
+from cluster_stats import to_full_calendar
+from density_rasters import load_polygons
+from spatial_weights import lga_adjacency, polygon_centroids
+
+out_folder = '../dashboard_data/hotspots'
+
+
+def contiguous_zones(adjacency, centroids, max_size=10):
+    """
+    Zonas candidatas conexas y acotadas: desde cada LGA se crece la zona
+    agregando, una a una, la LGA vecina (de alguna LGA de la zona) más
+    cercana al centro. Cada prefijo de ese crecimiento es una zona, lo que da
+    a lo sumo n x max_size zonas, todas contiguas (análogo contiguo de las
+    ventanas circulares de Kulldorff).
+
+    Returns:
+        zones (list de tuplas ordenadas de índices de polígono, sin repetir)
+    """
+    adjacency = adjacency.tocsr()
+    zones = set()
+    for seed in range(adjacency.shape[0]):
+        zone = [seed]
+        distances = np.linalg.norm(centroids - centroids[seed], axis=1)
+        zones.add((seed,))
+        frontier = set(adjacency.indices[adjacency.indptr[seed]:adjacency.indptr[seed + 1]])
+        while len(zone) < max_size and frontier:
+            nearest = min(frontier, key=lambda k: distances[k])
+            zone.append(nearest)
+            zones.add(tuple(sorted(zone)))
+            frontier.discard(nearest)
+            frontier |= set(adjacency.indices[adjacency.indptr[nearest]:adjacency.indptr[nearest + 1]])
+            frontier -= set(zone)
+    return sorted(zones, key=lambda z: (len(z), z))
+
+
+def zone_matrix(zones, row_of_polygon, n_rows):
+    """Matriz dispersa [zonas x filas de la matriz de casos] de pertenencia."""
+    rows, cols = [], []
+    for i, zone in enumerate(zones):
+        members = [row_of_polygon[k] for k in zone if row_of_polygon[k] >= 0]
+        rows += [i] * len(members)
+        cols += members
+    return sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(zones), n_rows))
+
+
+def _scan(cases, membership, window_lengths, period_bounds):
+    """
+    Evalúa todas las combinaciones zona x ventana temporal con sumas
+    prefijas y devuelve, por periodo, la mejor ventana de cada zona.
+
+    Las sumas prefijas a lo largo del tiempo (región x día) se agregan por
+    zona con un producto disperso; luego la suma de cualquier ventana
+    [t0, t1] de cualquier zona es una resta O(1). El valor esperado sigue el
+    modelo de permutación espacio-temporal: μ = C_zona · C_ventana / C.
+
+    Args:
+        cases: np.ndarray [regiones x días]
+        membership: matriz dispersa [zonas x regiones]
+        window_lengths: duraciones (días) de las ventanas candidatas
+        period_bounds: lista de (inicio, fin) de columnas por periodo; una
+            ventana pertenece al periodo en que termina
+
+    Returns:
+        llr, observed, expected, length, end: np.ndarray [zonas x periodos]
+    """
+    total = cases.sum()
+    prefix = np.concatenate([np.zeros((cases.shape[0], 1)), np.cumsum(cases, axis=1)], axis=1)
+    zone_prefix = np.asarray(membership @ prefix)                   # [zonas x días+1]
+    state_prefix = prefix.sum(axis=0)
+    zone_total = zone_prefix[:, -1:]
+
+    n_zones, n_periods = membership.shape[0], len(period_bounds)
+    best = {key: np.zeros((n_zones, n_periods)) for key in ('llr', 'observed', 'expected', 'length', 'end')}
+
+    for length in window_lengths:
+        if length > cases.shape[1]:
+            continue
+        observed = zone_prefix[:, length:] - zone_prefix[:, :-length]   # ventana que termina en t
+        window_total = state_prefix[length:] - state_prefix[:-length]
+        expected = zone_total * window_total[None, :] / total
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            llr = (observed * np.log(observed / expected)
+                   + (total - observed) * np.log((total - observed) / (total - expected)))
+        llr = np.where((observed > expected) & (expected > 0), np.nan_to_num(llr), 0.0)
+
+        for p, (start, stop) in enumerate(period_bounds):
+            # Columna j de llr = ventana que termina en el día j + length - 1
+            lo, hi = max(start - length + 1, 0), stop - length + 1
+            if hi <= lo:
+                continue
+            block = llr[:, lo:hi]
+            idx = block.argmax(axis=1)
+            value = block[np.arange(n_zones), idx]
+            better = value > best['llr'][:, p]
+            cols = lo + idx
+            best['llr'][better, p] = value[better]
+            best['observed'][better, p] = observed[better, cols[better]]
+            best['expected'][better, p] = expected[better, cols[better]]
+            best['length'][better, p] = length
+            best['end'][better, p] = cols[better] + length - 1
+    return best['llr'], best['observed'], best['expected'], best['length'], best['end']
+
+
+def _null_replicates(args):
+    """Máximo LLR por periodo en réplicas bajo la hipótesis nula."""
+    cases, membership, window_lengths, period_bounds, seeds = args
+    total = int(cases.sum())
+    # Sin interacción espacio-temporal: p(r, t) = C_r · C_t / C²
+    probabilities = np.outer(cases.sum(axis=1), cases.sum(axis=0)).ravel() / total ** 2
+    maxima = np.zeros((len(seeds), len(period_bounds)))
+    for i, seed in enumerate(seeds):
+        replicate = np.random.default_rng(seed).multinomial(total, probabilities).reshape(cases.shape).astype(float)
+        maxima[i] = _scan(replicate, membership, window_lengths, period_bounds)[0].max(axis=0)
+    return maxima
+
+
+def space_time_scan(matrix, lga_codes, dates, geojson_file='../original_data/nsw_lga_polygon_V5.geojson',
+                    max_size=10, window_lengths=(7, 14, 28), n_replicates=199, top_n=5,
+                    max_workers=None, seed=0):
+    """
+    Estadístico de scan espacio-temporal (modelo de permutación de
+    Kulldorff) sobre zonas contiguas de LGAs, con significancia por Monte
+    Carlo en un pool de procesos.
+
+    Para cada mes se reportan hasta top_n zonas que no se solapan, ordenadas
+    por razón de verosimilitud (LLR). El p-valor compara el LLR de cada zona
+    con el máximo del mes en las réplicas nulas.
+
+    Args:
+        matrix: np.ndarray [n_LGA x días] (salida de process_covid_data)
+        lga_codes: código de cada fila
+        dates: fechas de las columnas
+        max_size: máximo de LGAs por zona
+        window_lengths: duraciones de las ventanas temporales (días)
+        n_replicates: réplicas de Monte Carlo
+        top_n: zonas por periodo
+        max_workers: procesos del pool (None = todos los núcleos)
+        seed: semilla de las réplicas; el resultado no depende de max_workers
+
+    Returns:
+        pd.DataFrame con period, rank, zone, n_lgas, start, end,
+        observed, expected, relative_risk, llr, p_value
+    """
+    full, calendar = to_full_calendar(matrix, dates)
+    polygon_codes, rings, _ = load_polygons(geojson_file)
+    row_index = {str(code): i for i, code in enumerate(lga_codes)}
+    row_of_polygon = np.array([row_index.get(str(code), -1) for code in polygon_codes])
+
+    adjacency = lga_adjacency(rings)
+    zones = contiguous_zones(adjacency, polygon_centroids(rings), max_size)
+    membership = zone_matrix(zones, row_of_polygon, full.shape[0])
+
+    months = calendar.to_period('M')
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    period_bounds = list(zip(starts, list(starts[1:]) + [len(calendar)]))
+    periods = [str(months[s]) for s in starts]
+
+    llr, observed, expected, length, end = _scan(full, membership, window_lengths, period_bounds)
+
+    # Una semilla por réplica (SeedSequence.spawn): la distribución nula no
+    # depende de cuántos lotes ni procesos se usen
+    n_jobs = max_workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(n_replicates)
+    batches = [list(batch) for batch in np.array_split(np.array(seeds, dtype=object), n_jobs) if len(batch)]
+    jobs = [(full, membership, window_lengths, period_bounds, batch) for batch in batches]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        null_maxima = np.vstack(list(pool.map(_null_replicates, jobs)))
+
+    rows = []
+    for p, period in enumerate(periods):
+        used, rank = set(), 0
+        for z in np.argsort(-llr[:, p]):
+            if llr[z, p] <= 0 or rank == top_n:
+                break
+            # Zonas secundarias: sin LGAs en común con las ya reportadas
+            if used & set(zones[z]):
+                continue
+            used |= set(zones[z])
+            rank += 1
+            end_day = calendar[int(end[z, p])]
+            rows.append({
+                'period': period,
+                'rank': rank,
+                'zone': ';'.join(str(polygon_codes[k]) for k in zones[z]),
+                'n_lgas': len(zones[z]),
+                'start': (end_day - pd.Timedelta(days=int(length[z, p]) - 1)).strftime('%Y-%m-%d'),
+                'end': end_day.strftime('%Y-%m-%d'),
+                'observed': int(observed[z, p]),
+                'expected': round(float(expected[z, p]), 2),
+                'relative_risk': round(float(observed[z, p] / expected[z, p]), 3),
+                'llr': round(float(llr[z, p]), 3),
+                'p_value': round(float((1 + (null_maxima[:, p] >= llr[z, p]).sum()) / (len(null_maxima) + 1)), 4),
+            })
+    return pd.DataFrame(rows)
+
+
+def export_hotspots(hotspots, out_dir=out_folder):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    hotspots.to_csv(out_dir / 'space_time_hotspots.csv', index=False)
+    print(f"✅ {len(hotspots)} zonas guardadas en: {out_dir / 'space_time_hotspots.csv'}")
+
+
+if __name__ == "__main__":
+    import time
+    from cluster_series2 import process_covid_data
+
+    t0 = time.perf_counter()
+    matrix, lga_codes, dates = process_covid_data()
+    hotspots = space_time_scan(matrix, lga_codes, dates)
+    export_hotspots(hotspots)
+    print(f"Tiempo total: {time.perf_counter() - t0:.1f} s")
@@ -0,0 +1,247 @@
+import pandas as pd
+import numpy as np
+import json
+from pathlib import Path
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+from density_rasters import load_polygons
+
+folder = '../dashboard_data'
+out_folder = '../dashboard_data/spatial'
+
+# Columnas del censo que son identificadores, no factores
+ID_COLUMNS = ['LGA_code', 'lga_code19', 'lga_code19_2']
+
+LISA_LABELS = {1: 'HH', 2: 'LH', 3: 'LL', 4: 'HL'}
+
+
+def lga_adjacency(rings, tolerance=2e-6):
+    """
+    Grafo de contigüidad (queen) entre polígonos: dos LGAs son vecinas si
+    algún vértice de una está a menos de `tolerance` de un vértice de la
+    otra. Los pares se buscan con un KD-tree sobre todos los vértices, en
+    lugar de comparar cada par de polígonos.
+
+    Args:
+        rings: anillos por polígono en Mercator (salida de load_polygons)
+        tolerance: distancia máxima en radianes Mercator (2e-6 ~ 13 m)
+
+    Returns:
+        scipy.sparse.csr_matrix booleana simétrica [polígonos x polígonos]
+    """
+    vertices = np.concatenate([np.concatenate(r) for r in rings])
+    owner = np.concatenate([np.full(sum(len(ring) for ring in r), k) for k, r in enumerate(rings)])
+
+    pairs = cKDTree(vertices).query_pairs(tolerance, output_type='ndarray')
+    a, b = owner[pairs[:, 0]], owner[pairs[:, 1]]
+    keep = a != b
+    n = len(rings)
+    adjacency = sparse.coo_matrix((np.ones(keep.sum(), dtype=bool), (a[keep], b[keep])), shape=(n, n)).tocsr()
+    return (adjacency + adjacency.T).astype(bool)
+
+
+def polygon_centroids(rings):
+    """Centroide aproximado (promedio de vértices del anillo exterior) por polígono."""
+    return np.array([r[0].mean(axis=0) for r in rings])
+
+
+def knn_weights(centroids, k=5):
+    """
+    Pesos de k vecinos más cercanos entre centroides (KD-tree).
+
+    Returns:
+        scipy.sparse.csr_matrix binaria [n x n] (no simétrica)
+    """
+    _, idx = cKDTree(centroids).query(centroids, k=k + 1)
+    n = len(centroids)
+    rows = np.repeat(np.arange(n), k)
+    return sparse.csr_matrix((np.ones(n * k), (rows, idx[:, 1:].ravel())), shape=(n, n))
+
+
+def contiguity_weights(rings, centroids=None):
+    """
+    Pesos de contigüidad queen. Las LGAs sin vecinos (islas) se conectan a su
+    vecino más cercano para que ninguna fila quede vacía.
+
+    Returns:
+        scipy.sparse.csr_matrix binaria simétrica [n x n]
+    """
+    adjacency = lga_adjacency(rings).astype(float)
+    isolated = np.flatnonzero(np.asarray(adjacency.sum(axis=1)).ravel() == 0)
+    if len(isolated):
+        centroids = polygon_centroids(rings) if centroids is None else centroids
+        nearest = knn_weights(centroids, 1)[isolated]
+        links = sparse.csr_matrix((np.ones(len(isolated)), (isolated, nearest.indices)), shape=adjacency.shape)
+        adjacency = adjacency + links + links.T
+    return (adjacency > 0).astype(float).tocsr()
+
+
+def row_standardize(weights):
+    """W con filas que suman 1 (las filas vacías quedan en cero)."""
+    row_sums = np.asarray(weights.sum(axis=1)).ravel()
+    inverse = np.divide(1.0, row_sums, out=np.zeros_like(row_sums), where=row_sums > 0)
+    return sparse.diags(inverse) @ weights
+
+
+def _standardize_columns(values):
+    """z-scores por columna; los faltantes se imputan con la media (z = 0)."""
+    values = np.asarray(values, dtype=float)
+    mean, std = np.nanmean(values, axis=0), np.nanstd(values, axis=0)
+    z = (values - mean) / np.where(std > 0, std, 1)
+    return np.nan_to_num(z)
+
+
+def morans_i(values, weights, n_permutations=999, seed=0):
+    """
+    I de Moran global y local (LISA) para todas las columnas a la vez.
+
+    Con W estandarizada por filas, el rezago espacial de todas las variables
+    y todos los frames es un solo producto disperso W @ Z [n x columnas]:
+        I global  = Σ z·Wz / Σ z²
+        I local_i = z_i · (Wz)_i / m2,  m2 = Σ z² / n
+
+    Inferencia por permutaciones: para el global se permutan las filas de Z
+    (un producto W @ Z[perm] por permutación, para todas las columnas); para
+    el local, permutación condicional (el valor de i fijo, vecinos al azar),
+    vectorizada sobre LGAs y columnas.
+
+    Args:
+        values: np.ndarray [n x columnas]
+        weights: matriz dispersa [n x n] (se estandariza por filas)
+
+    Returns:
+        dict con global_i, global_p [columnas] y local_i, local_p, z, lag
+        [n x columnas]
+    """
+    rng = np.random.default_rng(seed)
+    W = row_standardize(weights).tocsr()
+    z = _standardize_columns(values)
+    n = z.shape[0]
+
+    lag = W @ z
+    m2 = (z ** 2).sum(axis=0) / n
+    m2 = np.where(m2 > 0, m2, 1)
+    global_i = (z * lag).sum(axis=0) / (m2 * n)
+    local_i = z * lag / m2
+
+    # Global: permutaciones de filas
+    extreme_global = np.zeros(z.shape[1])
+    for _ in range(n_permutations):
+        zp = z[rng.permutation(n)]
+        sim = (zp * (W @ zp)).sum(axis=0) / (m2 * n)
+        extreme_global += np.abs(sim) >= np.abs(global_i)
+
+    # Local: permutación condicional con el mismo número de vecinos y pesos
+    degree = np.diff(W.indptr)
+    max_degree = degree.max()
+    slot_weights = np.zeros((n, max_degree))
+    for i in range(n):
+        slot_weights[i, :degree[i]] = W.data[W.indptr[i]:W.indptr[i + 1]]
+
+    extreme_local = np.zeros_like(z)
+    for _ in range(n_permutations):
+        # Índices distintos de i y sin reemplazo: los primeros max_degree de una
+        # permutación al azar de los n-1 restantes (se sortea en n-1 y se salta i)
+        draws = np.argsort(rng.random((n, n - 1)), axis=1)[:, :max_degree]
+        draws += draws >= np.arange(n)[:, None]
+        lag_sim = np.einsum('nk,nkc->nc', slot_weights, z[draws])
+        sim = z * lag_sim / m2
+        extreme_local += np.abs(sim) >= np.abs(local_i)
+
+    return {
+        'global_i': global_i,
+        'global_p': (extreme_global + 1) / (n_permutations + 1),
+        'local_i': local_i,
+        'local_p': (extreme_local + 1) / (n_permutations + 1),
+        'z': z,
+        'lag': lag,
+    }
+
+
+def lisa_classes(z, lag, local_p, alpha=0.05):
+    """
+    Cuadrante de Moran por LGA y columna: 'HH', 'LH', 'LL', 'HL' si es
+    significativo, 'ns' si no.
+    """
+    quadrant = np.where(z > 0, np.where(lag > 0, 1, 4), np.where(lag > 0, 2, 3))
+    labels = np.vectorize(LISA_LABELS.get)(quadrant).astype(object)
+    labels[local_p > alpha] = 'ns'
+    return labels
+
+
+def load_variables(lga_codes, rates_file=f'{folder}/map_of_cases_by_lga/covid_monthly_rates.csv',
+                   census_file=f'{folder}/common/census_clean.csv'):
+    """
+    Matriz de variables alineada con los polígonos: casos por 100k de cada
+    mes (covid_monthly_rates.csv) y cada factor numérico del censo.
+
+    Returns:
+        values (np.ndarray [n x columnas]), columns (lista de (variable, frame))
+    """
+    rates = pd.read_csv(rates_file, dtype={'id': str})
+    rates = rates[rates['level'] == 'lga']
+    per100k = rates.pivot_table(index='id', columns='year_month', values='per100k').reindex(lga_codes)
+
+    census = pd.read_csv(census_file, dtype={'lga_code19': str}).set_index('lga_code19')
+    factors = census.drop(columns=ID_COLUMNS, errors='ignore').select_dtypes('number').reindex(lga_codes)
+
+    columns = [('per100k', month) for month in per100k.columns] + [(f, 'census') for f in factors.columns]
+    return np.hstack([per100k.to_numpy(), factors.to_numpy(dtype=float)]), columns
+
+
+def export_spatial_autocorrelation(geojson_file='../original_data/nsw_lga_polygon_V5.geojson',
+                                   out_dir=out_folder, scheme='contiguity', k=5, n_permutations=999):
+    """
+    Calcula el I de Moran global y local de casos por 100k (cada mes) y de
+    cada factor del censo.
+
+    Genera:
+    - moran_global.csv: variable, frame, moran_i, p_value
+    - lisa.csv: lgacode, variable, frame, local_i, p_value, lisa_class
+    - lisa_classes.json: clase LISA de casos por 100k por LGA y mes, para
+      el mapa ({'frames': [...], 'classes': {lgacode: [...]}})
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    lga_codes, rings, _ = load_polygons(geojson_file)
+    centroids = polygon_centroids(rings)
+    weights = contiguity_weights(rings, centroids) if scheme == 'contiguity' else knn_weights(centroids, k)
+
+    values, columns = load_variables(lga_codes)
+    result = morans_i(values, weights, n_permutations)
+    classes = lisa_classes(result['z'], result['lag'], result['local_p'])
+
+    variables, frames = [c[0] for c in columns], [c[1] for c in columns]
+    pd.DataFrame({'variable': variables, 'frame': frames, 'moran_i': result['global_i'].round(4),
+                  'p_value': result['global_p'].round(4)}).to_csv(out_dir / 'moran_global.csv', index=False)
+
+    n, m = values.shape
+    pd.DataFrame({
+        'lgacode': np.repeat(lga_codes, m),
+        'variable': np.tile(variables, n),
+        'frame': np.tile(frames, n),
+        'local_i': result['local_i'].ravel().round(4),
+        'p_value': result['local_p'].ravel().round(4),
+        'lisa_class': classes.ravel(),
+    }).to_csv(out_dir / 'lisa.csv', index=False)
+
+    case_columns = [i for i, c in enumerate(columns) if c[0] == 'per100k']
+    with open(out_dir / 'lisa_classes.json', 'w') as f:
+        json.dump({'weights': scheme,
+                   'frames': [frames[i] for i in case_columns],
+                   'classes': {code: classes[row, case_columns].tolist() for row, code in enumerate(lga_codes)}},
+                  f, separators=(',', ':'))
+    print(f"✅ I de Moran ({scheme}) para {m} columnas guardado en: {out_dir}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Autocorrelación espacial (I de Moran global y local)')
+    parser.add_argument('--weights', choices=['contiguity', 'knn'], default='contiguity')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--permutations', type=int, default=999)
+    args = parser.parse_args()
+    export_spatial_autocorrelation(scheme=args.weights, k=args.k, n_permutations=args.permutations)
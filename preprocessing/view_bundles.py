@@ -0,0 +1,194 @@
+import pandas as pd
+import numpy as np
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+folder = '../dashboard_data'
+out_folder = '../dashboard_data/bundles'
+
+# Atributos que usan los gráficos radiales del dashboard 4
+RADIAL_ATTRIBUTES = [
+    'LowIncome%',
+    'MedianFamilyIncome',
+    'MedianHouseholdIncome',
+    'MedianPersonIncome',
+    'Population_Density',
+    'Persons_per_Bedroom',
+    'PercentofPublicTransportation',
+    'Pct_0_1_Bedroom'
+]
+
+
+def round_coords(coords, decimals=4):
+    """Redondea recursivamente las coordenadas de una geometría (4 decimales ~ 11 m)."""
+    if isinstance(coords[0], (int, float)):
+        return [round(c, decimals) for c in coords]
+    return [round_coords(c, decimals) for c in coords]
+
+
+def build_map_bundle(geojson_file='../original_data/nsw_lga_polygon_V5.geojson',
+                     clusters_file=f'{folder}/cluster_time_series/lga_clusters.json',
+                     monthly_file=f'{folder}/map_of_cases_by_lga/covid_monthly_summary_filled.csv',
+                     density_file=f'{folder}/density/density_meta.json'):
+    """
+    Bundle de la vista de mapa: polígonos simplificados, clusters, casos
+    acumulados por mes y, si existen, los metadatos de los rasters de
+    densidad (density_rasters.py).
+
+    Returns:
+        bundle (dict), sources (list)
+    """
+    with open(geojson_file, 'r') as f:
+        geojson = json.load(f)
+    with open(clusters_file, 'r') as f:
+        lga_clusters = json.load(f)
+
+    # Solo se conserva lo que usa el mapa: la geometría y el lgacode
+    features = [{
+        'type': 'Feature',
+        'properties': {'lgacode': feat['properties']['lgacode']},
+        'geometry': {'type': feat['geometry']['type'],
+                     'coordinates': round_coords(feat['geometry']['coordinates'])}
+    } for feat in geojson['features']]
+
+    monthly = pd.read_csv(monthly_file, dtype={'lga_code19': str})
+    wide = monthly.pivot_table(index='lga_code19', columns='year_month', values='CumulativeCases',
+                               aggfunc='sum', fill_value=0).sort_index(axis=1)
+
+    bundle = {
+        'geojson': {'type': 'FeatureCollection', 'features': features},
+        'lga_clusters': lga_clusters,
+        'months': list(wide.columns),
+        'cumulative': {lga: row.astype(int).tolist() for lga, row in wide.iterrows()},
+    }
+    sources = [geojson_file, clusters_file, monthly_file]
+
+    if Path(density_file).is_file():
+        with open(density_file, 'r') as f:
+            density = json.load(f)
+        bundle['density'] = {k: density[k] for k in ('months', 'files', 'bounds')}
+        sources.append(density_file)
+    return bundle, sources
+
+
+def build_timeseries_bundle(series_file=f'{folder}/cluster_time_series/cluster_timeseries_675days.csv',
+                            global_file=f'{folder}/cluster_time_series/monthly_global_stats_fixed.csv'):
+    """
+    Bundle de la serie temporal: una fila de valores por serie (en lugar del
+    CSV largo fecha x serie) y las estadísticas globales mensuales.
+
+    Returns:
+        bundle (dict), sources (list)
+    """
+    df = pd.read_csv(series_file)
+    dates = sorted(df['date'].unique())
+    wide = df.pivot_table(index=['cluster', 'type', 'series_id'], columns='date', values='value',
+                          aggfunc='sum').reindex(columns=dates)
+
+    series = [{
+        'cluster': int(cluster),
+        'type': kind,
+        'series_id': series_id,
+        'values': [None if np.isnan(v) else round(float(v), 4) for v in row]
+    } for (cluster, kind, series_id), row in zip(wide.index, wide.to_numpy())]
+
+    monthly_global = pd.read_csv(global_file)
+    bundle = {
+        'dates': dates,
+        'series': series,
+        'monthly_global': monthly_global.to_dict(orient='records'),
+    }
+    return bundle, [series_file, global_file]
+
+
+def build_radial_bundle(census_file=f'{folder}/common/census_clean.csv',
+                        clusters_file=f'{folder}/cluster_time_series/lga_clusters.json',
+                        attributes=RADIAL_ATTRIBUTES):
+    """
+    Bundle de los gráficos radiales: perfil medio de cada cluster en los
+    atributos del censo.
+
+    Returns:
+        bundle (dict), sources (list)
+    """
+    census = pd.read_csv(census_file, dtype={'lga_code19': str})
+    with open(clusters_file, 'r') as f:
+        lga_clusters = json.load(f)
+
+    census = census[['lga_code19'] + attributes].copy()
+    census['cluster'] = census['lga_code19'].map(lga_clusters)
+    profiles = census.dropna(subset=['cluster']).groupby('cluster')[attributes].mean()
+
+    bundle = {
+        'attributes': attributes,
+        'clusters': {str(int(c)): {a: round(float(v), 4) for a, v in row.items()}
+                     for c, row in profiles.iterrows()},
+    }
+    return bundle, [census_file, clusters_file]
+
+
+def build_context_bundle(context_file=f'{folder}/context_map/context_map.json'):
+    """
+    Bundle del mapa de contexto (mismo contenido, sin indentación).
+
+    Returns:
+        bundle (dict), sources (list)
+    """
+    with open(context_file, 'r') as f:
+        return json.load(f), [context_file]
+
+
+VIEWS = {
+    'map': build_map_bundle,
+    'timeseries': build_timeseries_bundle,
+    'radial': build_radial_bundle,
+    'context': build_context_bundle,
+}
+
+
+def export_view_bundles(out_dir=out_folder, views=VIEWS):
+    """
+    Escribe un bundle JSON por vista, con el hash de su contenido en el
+    nombre, y un manifest.json con nombre, hash y tamaños de cada uno.
+
+    Args:
+        out_dir: carpeta de salida
+        views: dict vista -> función que construye (bundle, sources)
+
+    Returns:
+        manifest (dict)
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Eliminar bundles de ejecuciones anteriores
+    for old in out_dir.glob('*.json'):
+        old.unlink()
+
+    manifest = {'views': {}}
+    for view, builder in views.items():
+        bundle, sources = builder()
+        data = json.dumps(bundle, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        filename = f'{view}.{digest[:8]}.json'
+        (out_dir / filename).write_bytes(data)
+
+        manifest['views'][view] = {
+            'file': filename,
+            'sha256': digest,
+            'bytes': len(data),
+            'gzip_bytes': len(gzip.compress(data, mtime=0)),
+            'sources': [Path(s).name for s in sources],
+        }
+        print(f"{view:<12} {filename:<28} {len(data) / 1e3:>9.1f} kB")
+
+    with open(out_dir / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✅ Manifest guardado en: {out_dir / 'manifest.json'}")
+    return manifest
+
+
+if __name__ == "__main__":
+    export_view_bundles()
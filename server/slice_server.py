@@ -0,0 +1,557 @@
+"""
+Servidor local (asyncio) de consultas por tramos sobre los datos del dashboard.
+
+Carga una sola vez los agregados precalculados de ``dashboard_data`` en
+arreglos NumPy residentes en memoria y responde consultas por conjunto de
+LGAs, cluster, rango de fechas y granularidad, sin que el navegador tenga
+que descargar y filtrar los archivos completos.
+
+Endpoints (GET):
+    /slice     serie diaria por LGA (cluster_timeseries_675days.csv)
+               params: lgas, cluster, start, end, granularity (day|week|month),
+                       agg (none|sum|mean), format (json|bin)
+    /weekly    casos semanales por nombre de LGA (weekly_cases.csv)
+               params: lgas, start, end (semanas 'YYYY-Www'), format
+    /monthly   casos mensuales y acumulados por LGA
+               (covid_monthly_summary_filled.csv)
+               params: lgas, cluster, start, end (meses 'YYYY-MM'),
+                       metric (MonthlyCases|CumulativeCases), format
+    /geometry  subconjunto de features del GeoJSON
+               params: lgas, cluster
+    /clusters  mapeo LGA -> cluster
+    /stats     estado de la caché LRU
+
+Formato binario (format=bin, little-endian):
+    uint32 n_filas, uint32 n_columnas,
+    n_filas  x utf-8 con prefijo uint16 (etiqueta de fila),
+    n_columnas x utf-8 con prefijo uint16 (etiqueta de periodo),
+    n_filas*n_columnas float32 en orden por filas.
+
+Uso:
+    python slice_server.py serve --port 8765
+    python slice_server.py bench --clients 32 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import struct
+import time
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs, quote
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'dashboard_data'
+GEOJSON_FILE = Path(__file__).resolve().parent.parent / 'original_data' / 'nsw_lga_polygon_V5.geojson'
+
+GRANULARITIES = ('day', 'week', 'month')
+AGGREGATIONS = ('none', 'sum', 'mean')
+
+
+def load_daily_store(csv_file=DATA_DIR / 'cluster_time_series' / 'cluster_timeseries_675days.csv',
+                     json_file=DATA_DIR / 'cluster_time_series' / 'lga_clusters.json'):
+    """
+    Reconstruye la matriz [n_LGA x días] a partir del CSV largo de clusters.
+
+    El CSV identifica las series como ``LGA_{cluster}_{i}``, donde ``i`` es la
+    posición de la LGA dentro de su cluster en el orden de ``lga_clusters.json``
+    (mismo orden en que ``cluster_and_export`` recorre ``lga_codes``).
+
+    Args:
+        csv_file: ruta a cluster_timeseries_*.csv
+        json_file: ruta a lga_clusters.json
+
+    Returns:
+        dict con:
+            - matrix (np.ndarray float32): [n_LGA x días]
+            - lga_codes (np.ndarray de str): código de cada fila
+            - labels (np.ndarray int): cluster de cada fila
+            - dates (np.ndarray datetime64[D]): fechas ordenadas
+    """
+    with open(json_file, 'r') as f:
+        cluster_map = json.load(f)
+
+    # Posición i-ésima de cada LGA dentro de su cluster
+    series_to_lga = {}
+    counters = {}
+    for lga, cluster in cluster_map.items():
+        i = counters.get(cluster, 0)
+        series_to_lga[f'LGA_{cluster}_{i}'] = lga
+        counters[cluster] = i + 1
+
+    df = pd.read_csv(csv_file)
+    df = df[df['type'] == 'individual'].copy()
+    df['lga'] = df['series_id'].map(series_to_lga)
+    df = df.dropna(subset=['lga'])
+
+    wide = df.pivot_table(index='lga', columns='date', values='value', aggfunc='sum', fill_value=0)
+    wide = wide.reindex(columns=sorted(wide.columns))
+
+    lga_codes = wide.index.to_numpy().astype(str)
+    return {
+        'matrix': wide.to_numpy(dtype=np.float32),
+        'lga_codes': lga_codes,
+        'labels': np.array([cluster_map[code] for code in lga_codes], dtype=int),
+        'dates': pd.to_datetime(wide.columns).to_numpy().astype('datetime64[D]'),
+    }
+
+
+def load_wide_store(csv_file, row_col, period_col, value_col):
+    """
+    Pivotea un CSV largo (fila, periodo, valor) a una matriz densa.
+
+    Args:
+        csv_file: ruta del CSV
+        row_col: columna con la etiqueta de fila (LGA)
+        period_col: columna con la etiqueta de periodo (ordenable como texto)
+        value_col: columna (o lista de columnas) con los valores
+
+    Returns:
+        dict con matrix (o un dict de matrices si value_col es lista),
+        rows (np.ndarray de str) y periods (np.ndarray de str)
+    """
+    df = pd.read_csv(csv_file, dtype={row_col: str, period_col: str})
+    value_cols = value_col if isinstance(value_col, list) else [value_col]
+    wide = df.pivot_table(index=row_col, columns=period_col, values=value_cols, aggfunc='sum', fill_value=0)
+
+    rows = wide.index.to_numpy().astype(str)
+    periods = np.array(sorted(df[period_col].unique()), dtype=str)
+    matrices = {c: wide[c].reindex(columns=periods, fill_value=0).to_numpy(dtype=np.float32) for c in value_cols}
+    return {
+        'matrix': matrices if isinstance(value_col, list) else matrices[value_col],
+        'rows': rows,
+        'periods': periods,
+    }
+
+
+def load_geometry(geojson_file=GEOJSON_FILE):
+    """
+    Indexa las features del GeoJSON por ``lgacode``.
+
+    Returns:
+        dict lgacode -> feature
+    """
+    with open(geojson_file, 'r') as f:
+        geojson = json.load(f)
+    return {feat['properties']['lgacode']: feat for feat in geojson['features']}
+
+
+def load_stores(data_dir=DATA_DIR, geojson_file=GEOJSON_FILE):
+    """
+    Carga todos los agregados en memoria una sola vez.
+
+    Returns:
+        dict con los almacenes 'daily', 'weekly', 'monthly', 'geometry' y
+        'clusters'
+    """
+    data_dir = Path(data_dir)
+    clusters_file = data_dir / 'cluster_time_series' / 'lga_clusters.json'
+    with open(clusters_file, 'r') as f:
+        clusters = json.load(f)
+
+    return {
+        'daily': load_daily_store(data_dir / 'cluster_time_series' / 'cluster_timeseries_675days.csv',
+                                  clusters_file),
+        'weekly': load_wide_store(data_dir / 'time_series' / 'weekly_cases.csv',
+                                  'lga_name19', 'week', 'cases'),
+        'monthly': load_wide_store(data_dir / 'map_of_cases_by_lga' / 'covid_monthly_summary_filled.csv',
+                                   'lga_code19', 'year_month', ['MonthlyCases', 'CumulativeCases']),
+        'geometry': load_geometry(geojson_file),
+        'clusters': clusters,
+    }
+
+
+# ----------------------------- Consultas ---------------------------------- #
+
+def _select_rows(row_ids, lgas, cluster, clusters):
+    """Máscara booleana de filas según lista de LGAs y/o cluster."""
+    mask = np.ones(len(row_ids), dtype=bool)
+    if lgas:
+        mask &= np.isin(row_ids, list(lgas))
+    if cluster is not None:
+        mask &= np.array([clusters.get(r) == cluster for r in row_ids])
+    return mask
+
+
+def _aggregate_rows(values, row_labels, agg):
+    if agg == 'sum':
+        return values.sum(axis=0, keepdims=True), ['sum']
+    if agg == 'mean':
+        if len(values) == 0:
+            return np.zeros((1, values.shape[1]), dtype=np.float32), ['mean']
+        return values.mean(axis=0, keepdims=True), ['mean']
+    return values, list(row_labels)
+
+
+def slice_daily(store, clusters, lgas=(), cluster=None, start=None, end=None, granularity='day', agg='none'):
+    """
+    Recorta la matriz diaria por LGAs, cluster y fechas, y la reagrupa.
+
+    Args:
+        store: almacén 'daily' de load_stores
+        clusters: mapeo LGA -> cluster
+        lgas: tupla de códigos LGA (vacía = todas)
+        cluster: id de cluster o None
+        start, end: fechas ISO inclusivas o None
+        granularity: 'day', 'week' (semana que empieza en lunes) o 'month'
+        agg: 'none' (una fila por LGA), 'sum' o 'mean' sobre las LGAs
+
+    Returns:
+        (row_labels, period_labels, values)
+    """
+    dates = store['dates']
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, 'D'), side='right')
+
+    mask = _select_rows(store['lga_codes'], lgas, cluster, clusters)
+    values = store['matrix'][mask, lo:hi]
+    window = dates[lo:hi]
+
+    if granularity == 'week':
+        # Lunes de la semana (1970-01-01 fue jueves)
+        keys = window - ((window.astype('int64') + 3) % 7).astype('timedelta64[D]')
+    elif granularity == 'month':
+        keys = window.astype('datetime64[M]')
+    else:
+        keys = window
+
+    if granularity != 'day' and len(window):
+        period_keys, starts = np.unique(keys, return_index=True)
+        values = np.add.reduceat(values, starts, axis=1) if values.shape[0] else values[:, starts]
+    else:
+        period_keys = keys
+
+    values, row_labels = _aggregate_rows(values, store['lga_codes'][mask], agg)
+    return row_labels, [str(k) for k in period_keys], values
+
+
+def slice_wide(store, clusters, lgas=(), cluster=None, start=None, end=None, metric=None, agg='none'):
+    """
+    Recorta un almacén ancho (weekly / monthly) por filas y periodos.
+
+    Los periodos son etiquetas de texto ordenables ('2020-W05', '2021-03').
+
+    Returns:
+        (row_labels, period_labels, values)
+    """
+    periods = store['periods']
+    lo = 0 if start is None else np.searchsorted(periods, start, side='left')
+    hi = len(periods) if end is None else np.searchsorted(periods, end, side='right')
+
+    matrix = store['matrix'][metric] if metric is not None else store['matrix']
+    mask = _select_rows(store['rows'], lgas, cluster, clusters)
+    values, row_labels = _aggregate_rows(matrix[mask, lo:hi], store['rows'][mask], agg)
+    return row_labels, list(periods[lo:hi]), values
+
+
+def encode_json(row_labels, period_labels, values):
+    """JSON compacto: filas, periodos y matriz de valores."""
+    payload = {
+        'rows': [str(r) for r in row_labels],
+        'periods': period_labels,
+        'values': np.round(values.astype(float), 4).tolist(),
+    }
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def encode_binary(row_labels, period_labels, values):
+    """Codificación binaria descrita en la cabecera del módulo."""
+    parts = [struct.pack('<II', len(row_labels), len(period_labels))]
+    for label in list(row_labels) + list(period_labels):
+        raw = str(label).encode('utf-8')
+        parts.append(struct.pack('<H', len(raw)))
+        parts.append(raw)
+    parts.append(np.ascontiguousarray(values, dtype='<f4').tobytes())
+    return b''.join(parts)
+
+
+def decode_binary(body):
+    """Inversa de encode_binary (útil para clientes Python y pruebas)."""
+    n_rows, n_cols = struct.unpack_from('<II', body, 0)
+    offset = 8
+    labels = []
+    for _ in range(n_rows + n_cols):
+        (size,) = struct.unpack_from('<H', body, offset)
+        offset += 2
+        labels.append(body[offset:offset + size].decode('utf-8'))
+        offset += size
+    values = np.frombuffer(body, dtype='<f4', offset=offset).reshape(n_rows, n_cols)
+    return labels[:n_rows], labels[n_rows:], values
+
+
+def _parse_list(value):
+    return tuple(sorted(v for v in value.split(',') if v)) if value else ()
+
+
+def normalize_query(path, query):
+    """
+    Valida los parámetros y los normaliza a una tupla inmutable, que sirve
+    como clave de la caché LRU (consultas equivalentes comparten entrada).
+
+    Raises:
+        ValueError: si algún parámetro no es válido
+    """
+    params = {k: v[-1] for k, v in parse_qs(query).items()}
+    fmt = params.get('format', 'json')
+    if fmt not in ('json', 'bin'):
+        raise ValueError(f"format inválido: {fmt}")
+    granularity = params.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity inválida: {granularity}")
+    agg = params.get('agg', 'none')
+    if agg not in AGGREGATIONS:
+        raise ValueError(f"agg inválido: {agg}")
+    metric = params.get('metric', 'MonthlyCases')
+    if metric not in ('MonthlyCases', 'CumulativeCases'):
+        raise ValueError(f"metric inválida: {metric}")
+    cluster = params.get('cluster')
+    cluster = int(cluster) if cluster not in (None, '') else None
+    for key in ('start', 'end'):
+        if path == '/slice' and params.get(key):
+            np.datetime64(params[key], 'D')  # valida el formato ISO
+
+    return (path, _parse_list(params.get('lgas')), cluster, params.get('start') or None,
+            params.get('end') or None, granularity, agg, metric, fmt)
+
+
+def make_query_handler(stores, cache_size=512):
+    """
+    Construye la función que resuelve una consulta normalizada, envuelta en
+    una caché LRU en proceso.
+
+    Args:
+        stores: resultado de load_stores
+        cache_size: número máximo de respuestas en caché
+
+    Returns:
+        función key -> (status, content_type, body) con cache_info()
+    """
+    clusters = stores['clusters']
+
+    @lru_cache(maxsize=cache_size)
+    def handle(key):
+        path, lgas, cluster, start, end, granularity, agg, metric, fmt = key
+
+        if path == '/clusters':
+            return 200, 'application/json', json.dumps(clusters, separators=(',', ':')).encode('utf-8')
+        if path == '/geometry':
+            codes = [c for c in stores['geometry']
+                     if (not lgas or c in lgas) and (cluster is None or clusters.get(c) == cluster)]
+            geojson = {'type': 'FeatureCollection', 'features': [stores['geometry'][c] for c in codes]}
+            return 200, 'application/geo+json', json.dumps(geojson, separators=(',', ':')).encode('utf-8')
+
+        if path == '/slice':
+            result = slice_daily(stores['daily'], clusters, lgas, cluster, start, end, granularity, agg)
+        elif path == '/weekly':
+            result = slice_wide(stores['weekly'], clusters, lgas, None, start, end, None, agg)
+        elif path == '/monthly':
+            result = slice_wide(stores['monthly'], clusters, lgas, cluster, start, end, metric, agg)
+        else:
+            return 404, 'application/json', b'{"error":"not found"}'
+
+        if fmt == 'bin':
+            return 200, 'application/octet-stream', encode_binary(*result)
+        return 200, 'application/json', encode_json(*result)
+
+    return handle
+
+
+# ------------------------------ HTTP -------------------------------------- #
+
+def _response(status, content_type, body, keep_alive):
+    reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}[status]
+    head = (f'HTTP/1.1 {status} {reason}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Access-Control-Allow-Origin: *\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    return head.encode('latin-1') + body
+
+
+def make_connection_handler(handle):
+    """Manejador asyncio de conexiones HTTP/1.1 con keep-alive."""
+
+    async def on_connection(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    # Línea de petición mal formada: 400 y se cierra, como http.server
+                    writer.write(_response(400, 'application/json', b'{"error":"bad request line"}', False))
+                    await writer.drain()
+                    break
+                method, target, version = parts
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+
+                if method != 'GET':
+                    status, ctype, body = 405, 'application/json', b'{"error":"method not allowed"}'
+                else:
+                    url = urlsplit(target)
+                    if url.path == '/stats':
+                        info = handle.cache_info()
+                        status, ctype = 200, 'application/json'
+                        body = json.dumps(info._asdict()).encode('utf-8')
+                    else:
+                        try:
+                            status, ctype, body = handle(normalize_query(url.path, url.query))
+                        except ValueError as e:
+                            status, ctype = 400, 'application/json'
+                            body = json.dumps({'error': str(e)}).encode('utf-8')
+
+                writer.write(_response(status, ctype, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return on_connection
+
+
+async def serve(host='127.0.0.1', port=8765, cache_size=512, data_dir=DATA_DIR):
+    t0 = time.perf_counter()
+    stores = load_stores(data_dir)
+    handle = make_query_handler(stores, cache_size)
+    print(f"Datos cargados en {time.perf_counter() - t0:.2f} s "
+          f"({stores['daily']['matrix'].shape[0]} LGAs x {stores['daily']['matrix'].shape[1]} días)")
+
+    server = await asyncio.start_server(make_connection_handler(handle), host, port)
+    print(f"Sirviendo en http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+# --------------------------- Benchmark de carga ---------------------------- #
+
+def random_queries(stores, n, seed=42):
+    """Genera n URLs de consulta aleatorias pero realistas."""
+    rng = random.Random(seed)
+    codes = list(stores['daily']['lga_codes'])
+    names = list(stores['weekly']['rows'])
+    dates = stores['daily']['dates']
+    weeks = list(stores['weekly']['periods'])
+    queries = []
+    for _ in range(n):
+        kind = rng.random()
+        fmt = rng.choice(['json', 'bin'])
+        if kind < 0.6:
+            i, j = sorted(rng.sample(range(len(dates)), 2))
+            lgas = ','.join(rng.sample(codes, rng.randint(1, 8))) if rng.random() < 0.5 else ''
+            cluster = rng.randint(1, 4) if not lgas else ''
+            queries.append(f'/slice?lgas={lgas}&cluster={cluster}&start={dates[i]}&end={dates[j]}'
+                           f'&granularity={rng.choice(GRANULARITIES)}&agg={rng.choice(AGGREGATIONS)}&format={fmt}')
+        elif kind < 0.85:
+            i, j = sorted(rng.sample(range(len(weeks)), 2))
+            lgas = quote(','.join(rng.sample(names, rng.randint(1, 4))))
+            queries.append(f'/weekly?lgas={lgas}&start={weeks[i]}&end={weeks[j]}&format={fmt}')
+        else:
+            queries.append(f'/monthly?cluster={rng.randint(1, 4)}&metric=CumulativeCases&format={fmt}')
+    return queries
+
+
+async def _client(host, port, queries, latencies, sizes):
+    reader, writer = await asyncio.open_connection(host, port)
+    for q in queries:
+        t0 = time.perf_counter()
+        writer.write(f'GET {q} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode('latin-1'))
+        await writer.drain()
+        await reader.readline()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - t0)
+        sizes.append(length)
+    writer.close()
+
+
+async def _run_phase(host, port, queries, clients):
+    latencies, sizes = [], []
+    chunks = [queries[i::clients] for i in range(clients)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*[_client(host, port, c, latencies, sizes) for c in chunks if c])
+    elapsed = time.perf_counter() - t0
+    lat_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(float(np.percentile(lat_ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(lat_ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(lat_ms, 99)), 3),
+        'mean_bytes': round(float(np.mean(sizes)), 1),
+    }
+
+
+async def bench(clients=32, n_requests=2000, distinct=400, cache_size=512, port=0, report_file=None):
+    """
+    Lanza el servidor en proceso y lo somete a carga concurrente.
+
+    Fase 'cold': consultas distintas (caché vacía). Fase 'warm': las mismas
+    consultas repetidas, resueltas desde la caché LRU.
+
+    Returns:
+        dict con latencias (p50/p95/p99), throughput y estado de la caché
+    """
+    stores = load_stores()
+    handle = make_query_handler(stores, cache_size)
+    server = await asyncio.start_server(make_connection_handler(handle), '127.0.0.1', port)
+    host, port = server.sockets[0].getsockname()[:2]
+
+    distinct_queries = random_queries(stores, distinct)
+    rng = random.Random(0)
+    warm_queries = [rng.choice(distinct_queries) for _ in range(n_requests)]
+
+    async with server:
+        cold = await _run_phase(host, port, distinct_queries, clients)
+        warm = await _run_phase(host, port, warm_queries, clients)
+
+    report = {'clients': clients, 'cold': cold, 'warm': warm, 'cache': handle.cache_info()._asdict()}
+    print(json.dumps(report, indent=2))
+    if report_file:
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_serve = sub.add_parser('serve', help='sirve las consultas por HTTP')
+    p_serve.add_argument('--host', default='127.0.0.1')
+    p_serve.add_argument('--port', type=int, default=8765)
+    p_serve.add_argument('--cache-size', type=int, default=512)
+
+    p_bench = sub.add_parser('bench', help='reporte de latencia/throughput bajo carga')
+    p_bench.add_argument('--clients', type=int, default=32)
+    p_bench.add_argument('--requests', type=int, default=2000)
+    p_bench.add_argument('--distinct', type=int, default=400)
+    p_bench.add_argument('--cache-size', type=int, default=512)
+    p_bench.add_argument('--report', default=None, help='archivo JSON de salida')
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        asyncio.run(serve(args.host, args.port, args.cache_size))
+    else:
+        asyncio.run(bench(args.clients, args.requests, args.distinct, args.cache_size, report_file=args.report))
@@ -0,0 +1,418 @@
+"""
+Construcción y servidor estático para los dashboards (alternativa a Live Server).
+
+Paso de build:
+    - copia los HTML de ``dashboards/`` e ``index.html`` manteniendo su nombre;
+    - copia los datos que referencian (``dashboard_data/``, GeoJSON) con el
+      hash de su contenido en el nombre (``weekly_cases.3f2a9c1b.csv``) y
+      reescribe las rutas dentro de los HTML;
+    - genera versiones precomprimidas ``.gz`` (y ``.br`` si el paquete
+      ``brotli`` está instalado) de cada archivo;
+    - escribe ``asset-manifest.json`` con tamaños y ETags.
+
+Servidor:
+    - negocia ``br`` > ``gzip`` > identidad según ``Accept-Encoding``;
+    - ETag fuerte por representación y respuestas 304 con ``If-None-Match``;
+    - ``Cache-Control: immutable`` de un año para archivos con hash y
+      ``no-cache`` (revalidación) para los HTML;
+    - soporte de ``Range`` (un solo rango) sobre la representación sin
+      comprimir, con ``If-Range``.
+
+Uso:
+    python static_server.py build
+    python static_server.py serve --port 8000
+    python static_server.py report
+"""
+import argparse
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import re
+import shutil
+import threading
+from email.utils import formatdate
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = Path(__file__).resolve().parent.parent
+BUILD_DIR = ROOT / 'build'
+MANIFEST_NAME = 'asset-manifest.json'
+
+ENTRY_PAGES = ['index.html', 'dashboards/dashboard1.html', 'dashboards/dashboard2.html',
+               'dashboards/dashboard3.html', 'dashboards/dashboard4.html']
+# Directorios que se copian tal cual (ya traen hash en el nombre y su propio manifest)
+STATIC_DIRS = ['dashboard_data/bundles', 'dashboard_data/density']
+COMPRESSIBLE = ('.html', '.csv', '.json', '.geojson', '.js', '.css', '.svg', '.txt')
+
+# Rutas entre comillas a archivos de datos dentro del HTML
+DATA_REF = re.compile(r"""(["'])([^"'\s]+?\.(?:csv|json|geojson))\1""")
+# Nombre con hash: <base>.<8 hex>.<ext>
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8}\.[A-Za-z0-9]+$')
+
+MIME_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.csv': 'text/csv; charset=utf-8',
+    '.json': 'application/json',
+    '.geojson': 'application/geo+json',
+    '.js': 'text/javascript',
+    '.css': 'text/css',
+    '.png': 'image/png',
+}
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hashed_name(rel_path, data):
+    """``a/b/file.csv`` -> ``a/b/file.<hash8>.csv``"""
+    p = Path(rel_path)
+    return str(p.with_name(f'{p.stem}.{content_hash(data)[:8]}{p.suffix}')).replace(os.sep, '/')
+
+
+def _write_variants(out_file, data, gzip_level=9, brotli_quality=11):
+    """Escribe el archivo y sus versiones precomprimidas; devuelve los tamaños."""
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    out_file.write_bytes(data)
+    sizes = {'identity': len(data)}
+    if out_file.suffix in COMPRESSIBLE:
+        gz = gzip.compress(data, compresslevel=gzip_level, mtime=0)
+        if len(gz) < len(data):
+            Path(f'{out_file}.gz').write_bytes(gz)
+            sizes['gzip'] = len(gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=brotli_quality)
+            if len(br) < len(data):
+                Path(f'{out_file}.br').write_bytes(br)
+                sizes['br'] = len(br)
+    return sizes
+
+
+def build(root=ROOT, out_dir=BUILD_DIR, pages=ENTRY_PAGES, static_dirs=STATIC_DIRS):
+    """
+    Genera el directorio de build con assets con hash y precomprimidos.
+
+    Args:
+        root: raíz del repositorio
+        out_dir: directorio de salida (se regenera completo)
+        pages: páginas de entrada (rutas relativas a root)
+        static_dirs: directorios copiados sin renombrar (p. ej. los bundles
+            por vista de view_bundles.py, que se cargan vía su manifest)
+
+    Returns:
+        manifest: dict ruta_original -> {path, sha256, sizes}
+    """
+    root, out_dir = Path(root), Path(out_dir)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+
+    manifest = {}
+
+    def add_asset(rel_path):
+        if rel_path in manifest:
+            return manifest[rel_path]['path']
+        data = (root / rel_path).read_bytes()
+        target = hashed_name(rel_path, data)
+        sizes = _write_variants(out_dir / target, data)
+        manifest[rel_path] = {'path': target, 'sha256': content_hash(data), 'sizes': sizes}
+        return target
+
+    for page in pages:
+        page_path = root / page
+        html = page_path.read_text(encoding='utf-8')
+
+        def rewrite(match):
+            quote, ref = match.group(1), match.group(2)
+            source = (page_path.parent / unquote(ref)).resolve()
+            if not source.is_file() or root not in source.parents:
+                return match.group(0)  # referencias comentadas o inexistentes
+            target = add_asset(source.relative_to(root).as_posix())
+            new_ref = os.path.relpath(out_dir / target, (out_dir / page).parent).replace(os.sep, '/')
+            return f'{quote}{new_ref}{quote}'
+
+        data = DATA_REF.sub(rewrite, html).encode('utf-8')
+        sizes = _write_variants(out_dir / page, data)
+        manifest[page] = {'path': page, 'sha256': content_hash(data), 'sizes': sizes}
+
+    for static_dir in static_dirs:
+        for source in sorted((root / static_dir).glob('*')):
+            if source.is_file():
+                rel_path = source.relative_to(root).as_posix()
+                data = source.read_bytes()
+                sizes = _write_variants(out_dir / rel_path, data)
+                manifest[rel_path] = {'path': rel_path, 'sha256': content_hash(data), 'sizes': sizes}
+
+    with open(out_dir / MANIFEST_NAME, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    total = sum(m['sizes']['identity'] for m in manifest.values())
+    best = sum(min(m['sizes'].values()) for m in manifest.values())
+    print(f"✅ Build en {out_dir}: {len(manifest)} archivos, {total / 1e6:.2f} MB -> {best / 1e6:.2f} MB comprimidos")
+    return manifest
+
+
+# ------------------------------ Servidor ---------------------------------- #
+
+def _accepted_encodings(header):
+    """Codificaciones aceptadas (q > 0) de un encabezado Accept-Encoding."""
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            # Un q ilegible (p. ej. q=x) cuenta como 0: no se acepta
+            try:
+                weight = float(q[2:] or 0)
+            except ValueError:
+                weight = 0
+            if weight == 0:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _parse_range(header, size):
+    """Interpreta ``bytes=a-b`` (un solo rango). Devuelve (inicio, fin) o None."""
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', (header or '').strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        return 'unsatisfiable'
+    return first, last
+
+
+class StaticHandler(SimpleHTTPRequestHandler):
+    """Sirve el directorio de build con precompresión, ETags y rangos."""
+
+    etag_cache = {}
+
+    def log_message(self, format, *args):
+        if not getattr(self.server, 'quiet', False):
+            super().log_message(format, *args)
+
+    def _etag(self, file_path):
+        stat = file_path.stat()
+        key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+        if key not in self.etag_cache:
+            self.etag_cache[key] = '"' + content_hash(file_path.read_bytes())[:32] + '"'
+        return self.etag_cache[key]
+
+    def do_HEAD(self):
+        self._serve(head_only=True)
+
+    def do_GET(self):
+        self._serve(head_only=False)
+
+    def _serve(self, head_only):
+        root = Path(self.directory)
+        rel = unquote(urlsplit(self.path).path).lstrip('/') or 'index.html'
+        file_path = (root / rel).resolve()
+        if file_path.is_dir():
+            file_path = file_path / 'index.html'
+        if root.resolve() not in file_path.parents or not file_path.is_file():
+            self.send_error(404)
+            return
+
+        # Negociación de la representación precomprimida
+        encoding, body_path = 'identity', file_path
+        range_header = self.headers.get('Range')
+        if range_header is None:
+            accepted = _accepted_encodings(self.headers.get('Accept-Encoding'))
+            for name, ext in (('br', '.br'), ('gzip', '.gz')):
+                candidate = Path(f'{file_path}{ext}')
+                if name in accepted and candidate.is_file():
+                    encoding, body_path = name, candidate
+                    break
+
+        etag = self._etag(body_path)
+        size = body_path.stat().st_size
+        cache_control = ('public, max-age=31536000, immutable' if HASHED_NAME.search(file_path.name)
+                         else 'no-cache')
+
+        def common_headers():
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Accept-Ranges', 'bytes')
+
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or
+                              etag in [t.strip() for t in if_none_match.split(',')]):
+            self.send_response(304)
+            common_headers()
+            self.end_headers()
+            return
+
+        byte_range = None
+        if range_header is not None:
+            if_range = self.headers.get('If-Range')
+            if if_range is None or if_range.strip() == etag:
+                byte_range = _parse_range(range_header, size)
+        if byte_range == 'unsatisfiable':
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        length = max(end - start + 1, 0)
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', MIME_TYPES.get(file_path.suffix, 'application/octet-stream'))
+        self.send_header('Content-Length', str(length))
+        self.send_header('Last-Modified', formatdate(file_path.stat().st_mtime, usegmt=True))
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        common_headers()
+        self.end_headers()
+
+        if head_only or length == 0:
+            return
+        with open(body_path, 'rb') as f:
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(64 * 1024, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+def make_server(host='127.0.0.1', port=8000, directory=BUILD_DIR, quiet=False):
+    handler = lambda *args, **kwargs: StaticHandler(*args, directory=str(directory), **kwargs)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.quiet = quiet
+    return server
+
+
+# ------------------------------ Reporte ----------------------------------- #
+
+def _page_assets(build_dir, page):
+    """Assets de datos que referencia una página del build."""
+    html = (Path(build_dir) / page).read_text(encoding='utf-8')
+    base = Path(page).parent
+    refs = []
+    for _, ref in DATA_REF.findall(html):
+        rel = os.path.normpath(base / unquote(ref)).replace(os.sep, '/')
+        if (Path(build_dir) / rel).is_file() and rel not in refs:
+            refs.append(rel)
+    # Bundles cargados dinámicamente vía manifest (cota superior: todos)
+    for static_dir in STATIC_DIRS:
+        if static_dir in html:
+            refs += sorted(p.relative_to(build_dir).as_posix() for p in (Path(build_dir) / static_dir).glob('*.json'))
+    return refs
+
+
+def _fetch(conn, path, headers):
+    conn.request('GET', '/' + path, headers=headers)
+    resp = conn.getresponse()
+    body = resp.read()
+    return resp.status, dict(resp.getheaders()), len(body)
+
+
+def simulate_load(port, page, build_dir=BUILD_DIR, accept_encoding='br, gzip'):
+    """
+    Simula una carga en frío y una en caliente de una página.
+
+    En caliente se comporta como un navegador: los archivos con hash y
+    ``immutable`` no se piden; el resto se revalida con ``If-None-Match``.
+
+    Returns:
+        dict con bytes transferidos y peticiones de cada carga
+    """
+    paths = [page] + _page_assets(build_dir, page)
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+
+    cache = {}
+    cold = {'requests': 0, 'bytes': 0}
+    for path in paths:
+        status, resp_headers, size = _fetch(conn, path, headers)
+        cold['requests'] += 1
+        cold['bytes'] += size
+        cache[path] = resp_headers
+
+    warm = {'requests': 0, 'bytes': 0, 'not_modified': 0}
+    for path in paths:
+        if 'immutable' in cache[path].get('Cache-Control', ''):
+            continue
+        status, _, size = _fetch(conn, path, {**headers, 'If-None-Match': cache[path]['ETag']})
+        warm['requests'] += 1
+        warm['bytes'] += size
+        warm['not_modified'] += status == 304
+    conn.close()
+    return {'assets': len(paths), 'cold': cold, 'warm': warm}
+
+
+def report(build_dir=BUILD_DIR, pages=ENTRY_PAGES[1:], report_file=None):
+    """
+    Levanta el servidor en un hilo y mide bytes transferidos por página:
+    sin compresión, con compresión en frío y en caliente.
+    """
+    if not (Path(build_dir) / MANIFEST_NAME).is_file():
+        build(out_dir=build_dir)
+    server = make_server(port=0, directory=build_dir, quiet=True)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    results = {}
+    try:
+        print(f"{'página':<28}{'assets':>7}{'sin comprimir':>16}{'frío':>14}{'caliente':>12}")
+        for page in pages:
+            plain = simulate_load(port, page, build_dir, accept_encoding=None)
+            compressed = simulate_load(port, page, build_dir)
+            results[page] = {'uncompressed': plain['cold'], **compressed}
+            print(f"{page:<28}{compressed['assets']:>7}{plain['cold']['bytes']:>16,}"
+                  f"{compressed['cold']['bytes']:>14,}{compressed['warm']['bytes']:>12,}")
+    finally:
+        server.shutdown()
+
+    if report_file:
+        with open(report_file, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('build', help='genera build/ con assets con hash y precomprimidos')
+
+    p_serve = sub.add_parser('serve', help='sirve build/')
+    p_serve.add_argument('--host', default='127.0.0.1')
+    p_serve.add_argument('--port', type=int, default=8000)
+
+    p_report = sub.add_parser('report', help='bytes transferidos en carga fría y caliente')
+    p_report.add_argument('--report', default=None, help='archivo JSON de salida')
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        build()
+    elif args.command == 'serve':
+        server = make_server(args.host, args.port)
+        print(f"Sirviendo {BUILD_DIR} en http://{args.host}:{args.port}/")
+        server.serve_forever()
+    else:
+        report(report_file=args.report)